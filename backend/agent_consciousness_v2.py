@@ -20,10 +20,13 @@ Version: 0.2.0
 import asyncio
 import logging
 import time
+from itertools import islice
 from dataclasses import dataclass, field, asdict
 from typing import Dict, List, Any, Optional
 from enum import Enum
 
+import numpy as np
+
 logger = logging.getLogger("agents_v3")
 
 
@@ -548,7 +551,8 @@ class ConsciousnessBuilder:
 
             if hasattr(bot_service, 'signals_queue') and bot_service.signals_queue:
                 # Use in-memory queue (includes synthetic)
-                signals_data = bot_service.signals_queue[-20:]  # Last 20
+                queue = bot_service.signals_queue
+                signals_data = list(islice(reversed(queue), 20))[::-1]  # Last 20 (O(20) depuis la fin du deque)
                 logger.debug(f"[ConsciousnessBuilder] Using {len(signals_data)} signals from in-memory queue")
             else:
                 # Fallback to file-based signals
@@ -628,27 +632,33 @@ class ConsciousnessBuilder:
 
             # 1. Get active positions (OWNS relations)
             positions_data = entity_graph.get_user_positions(user_entity.id)
-            active_positions = []
-            total_portfolio_value = 0.0
-
-            for pos in positions_data:
-                entry = pos.get('entry_price', 0)
-                current = pos.get('current_price', 0)
-                amount = pos.get('amount', 0)
-
-                if current > 0 and entry > 0:
-                    pnl_pct = ((current - entry) / entry) * 100
-                    pnl_usd = amount * (current - entry)
-                    total_portfolio_value += amount * current
-
-                    active_positions.append(UserPosition(
-                        asset=pos.get('symbol', pos.get('asset', 'UNKNOWN')),
-                        amount=amount,
-                        entry_price=entry,
-                        current_price=current,
-                        pnl_pct=pnl_pct,
-                        pnl_usd=pnl_usd
-                    ))
+            count = len(positions_data)
+
+            # PnL de toutes les positions en opérations vectorisées (positions sans prix ignorées)
+            entry = np.fromiter((pos.get('entry_price', 0) for pos in positions_data), dtype=np.float64, count=count)
+            current = np.fromiter((pos.get('current_price', 0) for pos in positions_data), dtype=np.float64, count=count)
+            amount = np.fromiter((pos.get('amount', 0) for pos in positions_data), dtype=np.float64, count=count)
+            priced = (current > 0) & (entry > 0)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pnl_pct = (current - entry) / entry * 100
+            pnl_usd = amount * (current - entry)
+            total_portfolio_value = sum((amount * current)[priced].tolist(), 0.0)
+
+            active_positions = [
+                UserPosition(
+                    asset=pos.get('symbol', pos.get('asset', 'UNKNOWN')),
+                    amount=pos.get('amount', 0),
+                    entry_price=pos.get('entry_price', 0),
+                    current_price=pos.get('current_price', 0),
+                    pnl_pct=position_pnl_pct,
+                    pnl_usd=position_pnl_usd
+                )
+                for pos, position_pnl_pct, position_pnl_usd, is_priced in zip(
+                    positions_data, pnl_pct.tolist(), pnl_usd.tolist(), priced.tolist()
+                )
+                if is_priced
+            ]
 
             # 2. Get favorite assets (WATCHES relations)
             watches_rels = entity_graph.get_relations(user_entity.id, "out", "WATCHES")
@@ -76,6 +76,10 @@ AGENT_V3_LOG = LOGS_DIR / 'agent_v3.log'  # Logs de l'agent v3
 CACHE_DIR = DATA_DIR / 'cache'
 MARKET_DATA_CACHE = CACHE_DIR / 'market_data'
 NEWS_CACHE = CACHE_DIR / 'news_cache'
+RAG_EMBEDDINGS_CACHE = CACHE_DIR / 'rag_embeddings'  # Matrices d'embeddings RAG (.npy)
+SCRAPE_CACHE = CACHE_DIR / 'scraped_urls'  # Pages scrapées + validateurs HTTP (ETag)
+DSPY_PROGRAMS = CACHE_DIR / 'dspy_programs'  # État sauvegardé des programmes DSPy (démos, instructions)
+ENTITY_GRAPH_SNAPSHOTS = CACHE_DIR / 'entity_graph'  # Snapshots des graphes d'entités (chargement rapide)
 
 # ============================================================================
 # Chemins de la config
@@ -111,6 +115,10 @@ def ensure_directories():
         CACHE_DIR,
         MARKET_DATA_CACHE,
         NEWS_CACHE,
+        RAG_EMBEDDINGS_CACHE,
+        SCRAPE_CACHE,
+        DSPY_PROGRAMS,
+        ENTITY_GRAPH_SNAPSHOTS,
         CONFIG_DIR
     ]
     for d in dirs:
@@ -196,6 +204,10 @@ __all__ = [
     'CACHE_DIR',
     'MARKET_DATA_CACHE',
     'NEWS_CACHE',
+    'RAG_EMBEDDINGS_CACHE',
+    'SCRAPE_CACHE',
+    'DSPY_PROGRAMS',
+    'ENTITY_GRAPH_SNAPSHOTS',
 
     # Config
     'CONFIG_DIR',
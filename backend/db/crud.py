@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, select
 from typing import List, Optional, Dict, Any, Tuple
 import datetime
 from decimal import Decimal
@@ -1239,7 +1239,7 @@ def add_rag_chunk(
 ) -> RagChunk:
     """
     Ajoute un chunk lié à un RagDocument.
-    embedding_bytes = vecteur numpy.float32.tobytes()
+    embedding_bytes = vecteur numpy.float32.tobytes() ou rag_helpers.vector_to_blob(vecteur)
     """
     chunk = RagChunk(
         doc_id=doc_id,
@@ -1280,6 +1280,34 @@ def get_rag_chunks_by_domain(
     return q.all()
 
 
+def get_rag_chunk_rows_by_domain(
+    db: Session,
+    *,
+    domain: Optional[str] = None,
+) -> List[Tuple[int, str, Optional[bytes]]]:
+    """
+    Retourne les chunks d'un domaine (ou tous si domain=None) sous forme de
+    tuples (id, content, embedding), sans hydratation ORM. Triés par id.
+    """
+    stmt = select(RagChunk.id, RagChunk.content, RagChunk.embedding).order_by(RagChunk.id)
+    if domain:
+        stmt = stmt.where(RagChunk.domain == domain)
+    return [tuple(row) for row in db.execute(stmt).all()]
+
+
+def get_rag_chunks_by_ids(db: Session, chunk_ids: List[int]) -> List[RagChunk]:
+    """
+    Retourne les RagChunk correspondant aux ids, dans l'ordre des ids fournis
+    (ids inexistants ignorés).
+    """
+    if not chunk_ids:
+        return []
+    by_id = {
+        c.id: c for c in db.query(RagChunk).filter(RagChunk.id.in_(chunk_ids)).all()
+    }
+    return [by_id[i] for i in chunk_ids if i in by_id]
+
+
 def search_rag_chunks(
     db: Session,
     *,
@@ -1300,37 +1328,41 @@ def search_rag_chunks(
         Liste de tuples (chunk, similarité) triée par similarité décroissante
     """
     import numpy as np
+    from ..utils.rag_helpers import blob_to_vector
 
-    # Récupérer les chunks (avec filtre domaine optionnel)
-    q = db.query(RagChunk).filter(RagChunk.embedding.isnot(None))
+    # Récupérer (id, embedding) des chunks, sans hydratation ORM
+    stmt = select(RagChunk.id, RagChunk.embedding).where(RagChunk.embedding.isnot(None))
     if domain:
-        q = q.filter(RagChunk.domain == domain)
+        stmt = stmt.where(RagChunk.domain == domain)
 
-    chunks = q.all()
+    rows = db.execute(stmt).all()
 
-    if not chunks:
+    if not rows:
         return []
 
     # Calculer les similarités
-    results = []
+    scored = []
     query_norm = query_embedding / (np.linalg.norm(query_embedding) + 1e-8)
 
-    for chunk in chunks:
+    for chunk_id, embedding in rows:
         # Désérialiser l'embedding (stocké en BLOB)
         try:
-            chunk_emb = np.frombuffer(chunk.embedding, dtype=np.float32)
+            chunk_emb = blob_to_vector(embedding)
             chunk_norm = chunk_emb / (np.linalg.norm(chunk_emb) + 1e-8)
 
             # Similarité cosine
             similarity = float(np.dot(query_norm, chunk_norm))
-            results.append((chunk, similarity))
+            scored.append((chunk_id, similarity))
         except Exception as e:
             # Skip chunks avec embeddings corrompus
             continue
 
-    # Trier par similarité décroissante et retourner top_k
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results[:top_k]
+    # Trier par similarité décroissante, puis hydrater uniquement les top_k
+    scored.sort(key=lambda x: x[1], reverse=True)
+    scored = scored[:top_k]
+    chunks = get_rag_chunks_by_ids(db, [chunk_id for chunk_id, _ in scored])
+    similarity_by_id = dict(scored)
+    return [(chunk, similarity_by_id[chunk.id]) for chunk in chunks]
 
 
 def create_rag_trace(
@@ -782,6 +782,9 @@ def create_db_and_tables():
     # Create view for RAG queries (Qdrant handles vectors separately)
     _create_rag_view()
 
+    # Version of each domain's chunks, bumped by every write (caches of the corpus)
+    _create_rag_chunk_versions()
+
 def _create_rag_view():
     """Create view for RAG queries - vectors stored in Qdrant"""
     try:
@@ -801,6 +804,34 @@ def _create_rag_view():
     except Exception as e:
         print(f"⚠️ Warning: Could not create RAG view: {e}")
 
+def _create_rag_chunk_versions():
+    """
+    Per-domain version of rag_chunks, incremented by triggers on every INSERT,
+    UPDATE and DELETE (including bulk and raw SQL writes)
+    """
+    try:
+        from sqlalchemy import text
+
+        bump = (
+            "INSERT INTO rag_chunk_versions (domain, version) VALUES (COALESCE({row}.domain, ''), 1) "
+            "ON CONFLICT(domain) DO UPDATE SET version = version + 1;"
+        )
+        with engine.connect() as conn:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS rag_chunk_versions ("
+                "domain TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            ))
+            for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS rag_chunks_version_{event.lower()} "
+                    f"AFTER {event} ON rag_chunks BEGIN "
+                    + " ".join(bump.format(row=row) for row in rows)
+                    + " END"
+                ))
+            conn.commit()
+    except Exception as e:
+        print(f"⚠️ Warning: Could not create RAG chunk version triggers: {e}")
+
 def get_db():
     """Générateur de session de base de données"""
     db = SessionLocal()
@@ -24,13 +24,26 @@ Usage:
 
 from __future__ import annotations
 from dataclasses import dataclass, field, asdict
+from pathlib import Path
 from typing import Dict, List, Optional, Literal, Any, Tuple
 from time import time
+import json
+import os
+import threading
 import uuid
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Si activé (run_server.py --snapshot), get_entity_graph charge le snapshot du graphe
+# au lieu de relire les tables SQL ligne par ligne
+SNAPSHOT_ENV = "ENTITY_GRAPH_SNAPSHOT"
+
 # ============================================================================
 # Type Definitions
 # ============================================================================
@@ -90,7 +103,7 @@ def _gen_id(prefix: str = "ent") -> str:
     return f"{prefix}_{uuid.uuid4().hex[:12]}"
 
 
-@dataclass
+@dataclass(slots=True)
 class EntityNode:
     """Nœud d'entité dans le graphe"""
     id: str
@@ -115,7 +128,7 @@ class EntityNode:
         return asdict(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class EntityRelation:
     """Relation entre deux entités"""
     id: str
@@ -156,6 +169,8 @@ class EntityGraph:
         self._relations_by_source: Dict[str, List[EntityRelation]] = {}
         self._relations_by_target: Dict[str, List[EntityRelation]] = {}
         self._entities_by_type: Dict[EntityType, List[str]] = {}
+        # (source, type) -> {target: nombre de relations}, pour has_relation en O(1)
+        self._adjacency: Dict[Tuple[str, str], Dict[str, int]] = {}
 
     # ========================================================================
     # CRUD - Create
@@ -239,6 +254,7 @@ class EntityGraph:
         if target not in self._relations_by_target:
             self._relations_by_target[target] = []
         self._relations_by_target[target].append(relation)
+        self._adjacency_add(relation)
 
         # Increment consolidation (like DoT)
         if source in self.entities:
@@ -249,6 +265,82 @@ class EntityGraph:
         logger.debug(f"[EntityGraph] Added relation: {source} --[{type}]--> {target}")
         return rid
 
+    def add_entities_bulk(self, entities: List[Dict[str, Any]]) -> List[str]:
+        """
+        Ajoute plusieurs entités en une passe (index par type mis à jour une fois par type)
+
+        Args:
+            entities: Dicts avec les arguments de add_entity
+                (type, label, attributes, importance, tags, entity_id)
+
+        Returns:
+            entity_ids, dans l'ordre d'entrée
+        """
+        ids = []
+        ids_by_type: Dict[EntityType, List[str]] = {}
+
+        for spec in entities:
+            eid = spec.get("entity_id") or _gen_id("ent")
+            self.entities[eid] = EntityNode(
+                id=eid,
+                type=spec["type"],
+                label=spec["label"],
+                attributes=spec.get("attributes") or {},
+                importance=spec.get("importance", 0.5),
+                tags=spec.get("tags") or [],
+            )
+            ids_by_type.setdefault(spec["type"], []).append(eid)
+            ids.append(eid)
+
+        # Update index
+        for type, type_ids in ids_by_type.items():
+            self._entities_by_type.setdefault(type, []).extend(type_ids)
+
+        logger.debug(f"[EntityGraph] Added {len(ids)} entities (bulk)")
+        return ids
+
+    def add_relations_bulk(self, relations: List[Dict[str, Any]]) -> List[str]:
+        """
+        Ajoute plusieurs relations en une passe (validées avant toute modification)
+
+        Args:
+            relations: Dicts avec les arguments de add_relation
+                (source, target, type, attributes, strength, relation_id)
+
+        Returns:
+            relation_ids, dans l'ordre d'entrée
+        """
+        # Validate entities exist
+        for spec in relations:
+            if spec["source"] not in self.entities:
+                raise ValueError(f"Source entity not found: {spec['source']}")
+            if spec["target"] not in self.entities:
+                raise ValueError(f"Target entity not found: {spec['target']}")
+
+        new_relations = [
+            EntityRelation(
+                id=spec.get("relation_id") or _gen_id("rel"),
+                source=spec["source"],
+                target=spec["target"],
+                type=spec["type"],
+                attributes=spec.get("attributes") or {},
+                strength=spec.get("strength", 0.7),
+            )
+            for spec in relations
+        ]
+        self.relations.extend(new_relations)
+
+        # Update indexes + consolidation (like DoT)
+        for relation in new_relations:
+            self._relations_by_source.setdefault(relation.source, []).append(relation)
+            self._relations_by_target.setdefault(relation.target, []).append(relation)
+            self._adjacency_add(relation)
+            self.entities[relation.source].consolidation += 0.05
+            self.entities[relation.target].consolidation += 0.05
+
+        logger.debug(f"[EntityGraph] Added {len(new_relations)} relations (bulk)")
+        return [relation.id for relation in new_relations]
+
     # ========================================================================
     # CRUD - Read
     # ========================================================================
@@ -277,6 +369,7 @@ class EntityGraph:
             Liste d'entités matchant les critères
         """
         results = []
+        required_tags = set(tags) if tags else None
 
         # Start with type filter if specified (uses index)
         if type:
@@ -287,7 +380,7 @@ class EntityGraph:
 
         for entity in candidates:
             # Tags filter
-            if tags and not set(tags).issubset(set(entity.tags)):
+            if required_tags and not required_tags.issubset(entity.tags):
                 continue
 
             # Importance filter
@@ -362,6 +455,15 @@ class EntityGraph:
 
         return results
 
+    def has_relation(
+        self,
+        source: str,
+        target: str,
+        type: RelationType,
+    ) -> bool:
+        """Existe-t-il une relation source --[type]--> target ? (O(1))"""
+        return target in self._adjacency.get((source, type), ())
+
     def neighbors(
         self,
         entity_id: str,
@@ -463,6 +565,9 @@ class EntityGraph:
 
         # Remove relations if cascade
         if cascade:
+            for relation in self._relations_by_source.get(entity_id, []) + self._relations_by_target.get(entity_id, []):
+                self._adjacency_remove(relation)
+
             # Remove from relations list
             self.relations = [
                 r for r in self.relations
@@ -490,6 +595,7 @@ class EntityGraph:
             return
 
         # Update indexes
+        self._adjacency_remove(relation)
         if relation.source in self._relations_by_source:
             self._relations_by_source[relation.source] = [
                 r for r in self._relations_by_source[relation.source]
@@ -504,6 +610,22 @@ class EntityGraph:
 
         logger.debug(f"[EntityGraph] Removed relation: {relation_id}")
 
+    def _adjacency_add(self, relation: EntityRelation) -> None:
+        """Indexe une relation dans l'adjacence (source, type) -> targets"""
+        targets = self._adjacency.setdefault((relation.source, relation.type), {})
+        targets[relation.target] = targets.get(relation.target, 0) + 1
+
+    def _adjacency_remove(self, relation: EntityRelation) -> None:
+        """Retire une relation de l'adjacence (compteur: relations dupliquées possibles)"""
+        targets = self._adjacency.get((relation.source, relation.type))
+        if not targets or relation.target not in targets:
+            return
+        targets[relation.target] -= 1
+        if targets[relation.target] <= 0:
+            del targets[relation.target]
+            if not targets:
+                del self._adjacency[(relation.source, relation.type)]
+
     # ========================================================================
     # Graph Queries
     # ========================================================================
@@ -564,30 +686,54 @@ class EntityGraph:
         """
         Trouve tous les chemins entre deux entités (DFS)
 
+        Un BFS inverse depuis target (index par cible) donne la distance de
+        chaque entité à target, bornée à max_depth: le DFS n'explore que les
+        voisins qui peuvent encore atteindre target avec la profondeur restante.
+
         Returns:
             Liste de chemins (chaque chemin = liste d'entity IDs)
         """
-        if source not in self.entities or target not in self.entities:
+        if source not in self.entities or target not in self.entities or max_depth < 0:
             return []
 
-        paths = []
+        # Distance minimale (en relations) vers target, limitée à max_depth
+        distance = {target: 0}
+        frontier = [target]
+        for depth in range(1, max_depth + 1):
+            next_frontier = []
+            for entity_id in frontier:
+                for rel in self._relations_by_target.get(entity_id, ()):
+                    # Relations orphelines (remove_entity sans cascade) ignorées
+                    if rel.source not in distance and rel.source in self.entities:
+                        distance[rel.source] = depth
+                        next_frontier.append(rel.source)
+            frontier = next_frontier
+
+        if source not in distance:
+            return []
 
-        def dfs(current: str, path: List[str], depth: int):
-            if depth > max_depth:
-                return
+        paths = []
+        path = [source]
+        on_path = {source}
 
+        def dfs(current: str, remaining: int):
             if current == target:
                 paths.append(path[:])
                 return
 
-            neighbors = self.neighbors(current, "out")
-            for neighbor, _ in neighbors:
-                if neighbor.id not in path:  # Avoid cycles
-                    path.append(neighbor.id)
-                    dfs(neighbor.id, path, depth + 1)
-                    path.pop()
+            for rel in self._relations_by_source.get(current, ()):
+                neighbor_id = rel.target
+                # Avoid cycles, skip branches that cannot reach target in time
+                if (neighbor_id in on_path or neighbor_id not in self.entities
+                        or distance.get(neighbor_id, remaining) >= remaining):
+                    continue
+                path.append(neighbor_id)
+                on_path.add(neighbor_id)
+                dfs(neighbor_id, remaining - 1)
+                on_path.discard(neighbor_id)
+                path.pop()
 
-        dfs(source, [source], 0)
+        dfs(source, max_depth)
         return paths
 
     # ========================================================================
@@ -702,56 +848,85 @@ class EntityGraph:
     # SQL Persistence (Phase 2.5)
     # ========================================================================
 
-    def save_to_sql(self) -> None:
+    def save_to_sql(self, bulk_load: bool = False) -> None:
         """
         Sauvegarde le graphe dans SQL (tables agent_entity_nodes, agent_entity_relations)
 
         Stratégie:
         - DELETE all existing entities/relations for this agent
-        - INSERT all current entities/relations
+        - INSERT all current entities/relations (bulk, une seule transaction)
+
+        Args:
+            bulk_load: Population initiale (SQLite): PRAGMA synchronous=OFF le temps
+                de la transaction (pas de fsync; en cas de crash, relancer la population)
         """
         try:
+            from sqlalchemy import text
             from .db.models import SessionLocal, AgentEntityNode, AgentEntityRelation
             import datetime
 
+            fromtimestamp = datetime.datetime.fromtimestamp
+
             with SessionLocal() as db:
-                # 1. Delete existing data for this agent
-                db.query(AgentEntityRelation).filter_by(agent_id=self.agent_id).delete()
-                db.query(AgentEntityNode).filter_by(agent_id=self.agent_id).delete()
-
-                # 2. Insert entities
-                for entity_id, entity in self.entities.items():
-                    db_entity = AgentEntityNode(
-                        id=entity.id,
-                        agent_id=self.agent_id,
-                        type=entity.type,
-                        label=entity.label,
-                        attributes=entity.attributes,
-                        created_at=datetime.datetime.fromtimestamp(entity.created_at),
-                        updated_at=datetime.datetime.fromtimestamp(entity.updated_at),
-                        tags=entity.tags,
-                        importance=entity.importance,
-                        consolidation=entity.consolidation,
-                    )
-                    db.add(db_entity)
-
-                # 3. Insert relations
-                for relation in self.relations:
-                    db_relation = AgentEntityRelation(
-                        id=relation.id,
-                        agent_id=self.agent_id,
-                        source_id=relation.source,
-                        target_id=relation.target,
-                        type=relation.type,
-                        attributes=relation.attributes,
-                        created_at=datetime.datetime.fromtimestamp(relation.created_at),
-                        strength=relation.strength,
-                    )
-                    db.add(db_relation)
+                sqlite_bulk = bulk_load and db.get_bind().dialect.name == "sqlite"
+                if sqlite_bulk:
+                    # Avant le premier DML: pysqlite n'a pas encore ouvert de transaction
+                    previous_sync = db.execute(text("PRAGMA synchronous")).scalar()
+                    db.execute(text("PRAGMA synchronous=OFF"))
+
+                try:
+                    # 1. Delete existing data for this agent
+                    db.query(AgentEntityRelation).filter_by(agent_id=self.agent_id).delete(synchronize_session=False)
+                    db.query(AgentEntityNode).filter_by(agent_id=self.agent_id).delete(synchronize_session=False)
+
+                    # 2. Insert entities (executemany, sans unit-of-work ORM par ligne)
+                    db.bulk_insert_mappings(AgentEntityNode, [
+                        {
+                            "id": entity.id,
+                            "agent_id": self.agent_id,
+                            "type": entity.type,
+                            "label": entity.label,
+                            "attributes": entity.attributes,
+                            "created_at": fromtimestamp(entity.created_at),
+                            "updated_at": fromtimestamp(entity.updated_at),
+                            "tags": entity.tags,
+                            "importance": entity.importance,
+                            "consolidation": entity.consolidation,
+                        }
+                        for entity in self.entities.values()
+                    ])
+
+                    # 3. Insert relations
+                    db.bulk_insert_mappings(AgentEntityRelation, [
+                        {
+                            "id": relation.id,
+                            "agent_id": self.agent_id,
+                            "source_id": relation.source,
+                            "target_id": relation.target,
+                            "type": relation.type,
+                            "attributes": relation.attributes,
+                            "created_at": fromtimestamp(relation.created_at),
+                            "strength": relation.strength,
+                        }
+                        for relation in self.relations
+                    ])
+
+                    db.commit()
+                finally:
+                    if sqlite_bulk:
+                        db.rollback()
+                        db.execute(text(f"PRAGMA synchronous={int(previous_sync)}"))
+                        db.commit()
 
-                db.commit()
                 logger.info(f"[EntityGraph] Saved to SQL: {len(self.entities)} entities, {len(self.relations)} relations")
 
+            # Garder un snapshot existant cohérent avec SQL
+            try:
+                if _snapshot_path(self.agent_id).exists():
+                    self.save_snapshot()
+            except Exception as e:
+                logger.warning(f"[EntityGraph] Could not refresh snapshot: {e}")
+
         except Exception as e:
             logger.error(f"[EntityGraph] Error saving to SQL: {e}", exc_info=True)
             raise
@@ -798,6 +973,7 @@ class EntityGraph:
                 self.relations = []
                 self._relations_by_source = {}
                 self._relations_by_target = {}
+                self._adjacency = {}
 
                 for db_relation in db_relations:
                     relation = EntityRelation(
@@ -820,6 +996,7 @@ class EntityGraph:
                     if relation.target not in self._relations_by_target:
                         self._relations_by_target[relation.target] = []
                     self._relations_by_target[relation.target].append(relation)
+                    self._adjacency_add(relation)
 
                 logger.info(f"[EntityGraph] Loaded from SQL: {len(self.entities)} entities, {len(self.relations)} relations")
 
@@ -840,6 +1017,52 @@ class EntityGraph:
             "relations": [r.to_dict() for r in self.relations],
         }
 
+    def snapshot(self) -> bytes:
+        """Sérialise le graphe en JSON (orjson si disponible), pour save_snapshot/restore"""
+        if orjson is not None:
+            return orjson.dumps(self.to_dict())
+        return json.dumps(self.to_dict()).encode("utf-8")
+
+    def restore(self, data: bytes) -> None:
+        """
+        Remplace le contenu du graphe par un snapshot() (en place: les références
+        à cette instance, ex. le singleton de get_entity_graph, restent valides)
+        """
+        restored = self.from_dict(orjson.loads(data) if orjson is not None else json.loads(data))
+        self.entities = restored.entities
+        self.relations = restored.relations
+        self._relations_by_source = restored._relations_by_source
+        self._relations_by_target = restored._relations_by_target
+        self._entities_by_type = restored._entities_by_type
+        self._adjacency = restored._adjacency
+
+    def save_snapshot(self, path: Optional[Path] = None) -> Path:
+        """
+        Sauvegarde le graphe en un seul fichier JSON (orjson si disponible)
+
+        Écriture atomique (fichier temporaire + os.replace)
+
+        Returns:
+            Chemin du snapshot
+        """
+        path = Path(path) if path else _snapshot_path(self.agent_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(self.snapshot())
+        os.replace(tmp_path, path)
+
+        logger.info(f"[EntityGraph] Snapshot saved: {path} ({len(self.entities)} entities, {len(self.relations)} relations)")
+        return path
+
+    @classmethod
+    def load_snapshot(cls, path: Path) -> EntityGraph:
+        """Charge un graphe depuis un snapshot (une lecture + from_dict, sans SQL)"""
+        data = Path(path).read_bytes()
+        graph = cls.from_dict(orjson.loads(data) if orjson is not None else json.loads(data))
+        logger.info(f"[EntityGraph] Snapshot loaded: {path} ({len(graph.entities)} entities, {len(graph.relations)} relations)")
+        return graph
+
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> EntityGraph:
         """Deserialize graph from dict"""
@@ -868,6 +1091,7 @@ class EntityGraph:
             if relation.target not in graph._relations_by_target:
                 graph._relations_by_target[relation.target] = []
             graph._relations_by_target[relation.target].append(relation)
+            graph._adjacency_add(relation)
 
         return graph
 
@@ -877,6 +1101,14 @@ class EntityGraph:
 # ============================================================================
 
 _entity_graphs: Dict[str, EntityGraph] = {}
+# Sérialise le premier chargement d'un graphe (un seul chargement SQL par agent)
+_entity_graphs_lock = threading.Lock()
+
+
+def _snapshot_path(agent_id: str) -> Path:
+    """Chemin du snapshot d'un agent"""
+    from .config.paths import ENTITY_GRAPH_SNAPSHOTS
+    return ENTITY_GRAPH_SNAPSHOTS / f"{agent_id}.json"
 
 
 def get_entity_graph(agent_id: str = "default_agent", auto_load: bool = True) -> EntityGraph:
@@ -885,28 +1117,53 @@ def get_entity_graph(agent_id: str = "default_agent", auto_load: bool = True) ->
 
     Args:
         agent_id: Agent ID
-        auto_load: If True, automatically load from SQL on first access
+        auto_load: If True, automatically load on first access (from the snapshot
+            if ENTITY_GRAPH_SNAPSHOT is set and one exists, otherwise from SQL)
+
+    Le graphe est chargé une seule fois par agent puis servi depuis le cache
+    (jusqu'à reset_entity_graph): les appels suivants ne relisent pas SQL.
 
     Returns:
         EntityGraph instance
     """
-    if agent_id not in _entity_graphs:
-        _entity_graphs[agent_id] = EntityGraph(agent_id=agent_id)
-        logger.info(f"[EntityGraph] Created new graph for agent: {agent_id}")
+    graph = _entity_graphs.get(agent_id)
+    if graph is not None:
+        return graph
 
-        # Auto-load from SQL if enabled
-        if auto_load:
+    with _entity_graphs_lock:
+        # Un autre thread a pu charger le graphe pendant l'attente du verrou
+        if agent_id in _entity_graphs:
+            return _entity_graphs[agent_id]
+
+        graph = None
+        if auto_load and os.getenv(SNAPSHOT_ENV):
             try:
-                _entity_graphs[agent_id].load_from_sql()
+                snapshot = _snapshot_path(agent_id)
+                if snapshot.exists():
+                    graph = EntityGraph.load_snapshot(snapshot)
             except Exception as e:
-                logger.warning(f"[EntityGraph] Could not auto-load from SQL: {e}")
-                # Continue with empty graph
+                logger.warning(f"[EntityGraph] Could not load snapshot, falling back to SQL: {e}")
+
+        if graph is None:
+            graph = EntityGraph(agent_id=agent_id)
+            logger.info(f"[EntityGraph] Created new graph for agent: {agent_id}")
+
+            # Auto-load from SQL if enabled
+            if auto_load:
+                try:
+                    graph.load_from_sql()
+                except Exception as e:
+                    logger.warning(f"[EntityGraph] Could not auto-load from SQL: {e}")
+                    # Continue with empty graph
+
+        # Publié seulement une fois chargé: jamais de graphe partiel visible
+        _entity_graphs[agent_id] = graph
 
-    return _entity_graphs[agent_id]
+    return graph
 
 
 def reset_entity_graph(agent_id: str = "default_agent") -> None:
     """Reset entity graph (for testing)"""
-    if agent_id in _entity_graphs:
-        del _entity_graphs[agent_id]
-        logger.info(f"[EntityGraph] Reset graph for agent: {agent_id}")
+    with _entity_graphs_lock:
+        if _entity_graphs.pop(agent_id, None) is not None:
+            logger.info(f"[EntityGraph] Reset graph for agent: {agent_id}")
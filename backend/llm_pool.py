@@ -223,7 +223,9 @@ class LlamaCppServerClient(BaseLLMClient):
                 "messages": messages,
                 "max_tokens": max_tokens,
                 "temperature": temperature,
-                "stream": False
+                "stream": False,
+                # Réutilise le KV cache du préfixe commun (system prompt, historique) entre requêtes
+                "extra_body": {"cache_prompt": True}
             }
 
             # Ajouter l'ID de conversation si fourni (optimise KV cache dans llama.cpp)
@@ -317,7 +319,8 @@ class LlamaCppServerClient(BaseLLMClient):
                 "messages": messages,
                 "max_tokens": tokens,
                 "temperature": temperature,
-                "stream": True
+                "stream": True,
+                "extra_body": {"cache_prompt": True}
             }
 
             # Ajouter l'ID de conversation si fourni (optimise KV cache dans llama.cpp)
@@ -218,6 +218,14 @@ async def startup_event():
     # Re-enable essential functionality only
     models.create_db_and_tables()
 
+    # Encodeur tiktoken chargé en arrière-plan (peut télécharger son fichier BPE)
+    from .utils.token_counter import preload_encoder
+    preload_encoder()
+
+    # Client httpx partagé vers l'API FedEdge, fermé dans shutdown_event
+    import fededge_node_client
+    fededge_node_client.open_async_client()
+
     # Initialiser les cryptos supportées et restaurer les simulations
     db = SessionLocal()
     try:
@@ -471,6 +479,8 @@ async def startup_event():
 async def shutdown_event():
     """Arrêt propre de tous les services"""
     print("🛑 Arrêt de FedEdge AI Backend...")
+    import fededge_node_client
+    await fededge_node_client.aclose()
     print("✅ FedEdge AI Backend arrêté proprement")
 
 
@@ -730,7 +740,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                     from fededge_node_client import FedEdgeNodeClient
                     node_client = FedEdgeNodeClient()
                     print(f"📤 Calling start_session with client_ip={final_client_ip}")
-                    result = node_client.start_session(client_ip=final_client_ip)
+                    result = await node_client.astart_session(client_ip=final_client_ip)
                     print(f"✅ Client session updated with IP: {final_client_ip}, result: {result}")
                 except Exception as e:
                     print(f"❌ Error updating session with client IP: {e}")
@@ -741,7 +751,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 try:
                     from fededge_node_client import FedEdgeNodeClient
                     node_client = FedEdgeNodeClient()
-                    info = node_client.get_node_info()
+                    info = await node_client.aget_node_info()
                     response = {
                         "type": "node_info",
                         **info
@@ -754,7 +764,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 try:
                     from fededge_node_client import FedEdgeNodeClient
                     node_client = FedEdgeNodeClient()
-                    result = node_client.register_user(
+                    result = await node_client.aregister_user(
                         email=message.get("email", ""),
                         name=message.get("name", ""),
                         client_ip=client_ip
@@ -765,7 +775,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                     }
                     await websocket.send_text(json.dumps(response))
 
-                    info = node_client.get_node_info()
+                    info = await node_client.aget_node_info()
                     node_info_response = {
                         "type": "node_info",
                         **info
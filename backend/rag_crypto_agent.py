@@ -8,8 +8,6 @@ from datetime import datetime
 from sqlalchemy import create_engine, Column, Integer, String, Text, BLOB, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-from PyPDF2 import PdfReader
-from rank_bm25 import BM25Okapi
 from typing import List, Dict, Any
 
 # ===================== CONFIG =====================
@@ -23,6 +21,7 @@ DB_PATH = "sqlite:///rag_crypto.db"
 
 # ===================== SQLALCHEMY =====================
 from .db.models import RagDocument, RagChunk, RagTrace, SessionLocal as Session
+from .utils.rag_helpers import blob_to_vector, make_bm25, bm25_get_scores, extract_pdf_text
 # ===================== EMBEDDING =====================
 def get_embedding(text: str) -> np.ndarray:
     try:
@@ -35,9 +34,6 @@ def get_embedding(text: str) -> np.ndarray:
         print(f"[Embedding Error] {e}")
         return np.zeros(768, dtype=np.float32)
 
-def blob_to_vector(blob: bytes) -> np.ndarray:
-    return np.frombuffer(blob, dtype=np.float32)
-
 def cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
     return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-8)
 
@@ -49,18 +45,12 @@ def build_bm25_index(session):
         domain = domain[0]
         chunks = session.query(RagChunk).filter(RagChunk.domain == domain).all()
         texts = [c.content.split() for c in chunks]
-        bm25_index[domain] = BM25Okapi(texts)
+        bm25_index[domain] = make_bm25(texts)
 
 # ===================== CHUNKING =====================
 def chunk_text(text: str):
     words = text.split()
-    chunks = []
-    i = 0
-    while i < len(words):
-        chunk = " ".join(words[i:i + CHUNK_SIZE])
-        chunks.append(chunk)
-        i += CHUNK_SIZE - OVERLAP
-    return chunks
+    return [" ".join(words[i:i + CHUNK_SIZE]) for i in range(0, len(words), CHUNK_SIZE - OVERLAP)]
 
 # ===================== INGESTION =====================
 def ingest_pdf(pdf_path: str, url: str, domain: str, title: str):
@@ -74,12 +64,7 @@ def ingest_pdf(pdf_path: str, url: str, domain: str, title: str):
         return True
 
     try:
-        reader = PdfReader(pdf_path)
-        full_text = ""
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                full_text += text + "\n"
+        full_text = extract_pdf_text(pdf_path)
 
         doc = RagDocument(title=title, url=url, domain=domain, file_path=pdf_path)
         session.add(doc)
@@ -118,11 +103,13 @@ def hybrid_search(query: str, domain: str = None, top_k: int = 10) -> List[tuple
     scores = []
     bm25 = bm25_index.get(domain)
     query_tokens = query.split()
+    # Scores BM25 calculés une seule fois (et non une fois par candidat)
+    bm25_first_score = bm25_get_scores(bm25, query_tokens)[0] if bm25 else 0
 
     for c in candidates:
         vec = blob_to_vector(c.embedding)
         e_score = cosine_sim(q_emb, vec)
-        b_score = bm25.get_scores(query_tokens)[0] if bm25 else 0
+        b_score = bm25_first_score
         final_score = 0.7 * e_score + 0.3 * (b_score / 10)
         scores.append((c, final_score))
 
@@ -43,7 +43,7 @@ async def register_node(request: Request, data: RegistrationRequest):
         from fededge_node_client import FedEdgeNodeClient
         node_client = FedEdgeNodeClient()
 
-        result = node_client.register_user(
+        result = await node_client.aregister_user(
             email=data.email,
             name=data.name,
             client_ip=final_client_ip
@@ -85,7 +85,7 @@ async def resend_verification(request: Request):
         node_client = FedEdgeNodeClient()
 
         # Get node info to get the email
-        info = node_client.get_node_info()
+        info = await node_client.aget_node_info()
 
         if not info.get('user_email'):
             return {
@@ -94,7 +94,7 @@ async def resend_verification(request: Request):
             }
 
         # Re-register to trigger verification email
-        result = node_client.register_user(
+        result = await node_client.aregister_user(
             email=info['user_email'],
             name=info.get('user_name', ''),
             client_ip=client_ip
@@ -7,8 +7,8 @@ import os
 import numpy as np
 from typing import List, Optional, Tuple
 import logging
-import aiohttp
 import asyncio
+import requests
 import re
 
 logger = logging.getLogger(__name__)
@@ -112,6 +112,8 @@ class LlamaCppEmbeddingService:
         self.timeout = timeout
         self.embeddings_url = f"{self.base_url}/v1/embeddings"
         self.model_name = "embeddinggemma-300M"  # Model identifier
+        # Persistent HTTP session (keep-alive) reused across calls and batches
+        self.session = requests.Session()
 
         logger.info(f"LlamaCpp Embedding Service configured: {self.base_url}")
         logger.info(f"Model: {self.model_name}")
@@ -133,41 +135,30 @@ class LlamaCppEmbeddingService:
         try:
             # Truncate very long texts (server has parallel=1, needs small batches)
             text = text[:600] if len(text) > 600 else text
-
-            # Check if we're in an async context
-            try:
-                loop = asyncio.get_running_loop()
-                # We're in async context - use run_in_executor to avoid blocking
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(self._sync_embed_text, text)
-                    embedding_np = future.result(timeout=self.timeout)
-                return embedding_np
-            except RuntimeError:
-                # No running loop - create one (sync context)
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    embedding_np = loop.run_until_complete(self._embed_text_async(text))
-                    return embedding_np
-                finally:
-                    loop.close()
+            return self._embed_text_sync(text)
 
         except Exception as e:
             logger.error(f"Error generating LlamaCpp embedding: {e}")
             return np.zeros(self.embedding_dim, dtype=np.float32)
 
-    def _sync_embed_text(self, text: str) -> np.ndarray:
-        """Synchronous wrapper for async embed - runs in thread"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self._embed_text_async(text))
-        finally:
-            loop.close()
-
     async def _embed_text_async(self, text: str) -> np.ndarray:
-        """Async implementation of embed_text"""
+        """Async variant of embed_text (the request runs in a worker thread on the shared session)"""
+        return await asyncio.to_thread(self._embed_text_sync, text)
+
+    def _post_embeddings(self, inputs):
+        """POST inputs to the OpenAI-compatible endpoint, returning the parsed JSON or None on a server error"""
+        payload = {
+            "input": inputs,
+            "model": self.model_name  # embeddinggemma-300M
+        }
+        response = self.session.post(self.embeddings_url, json=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            logger.error(f"Embedding server error {response.status_code}: {response.text}")
+            return None
+        return response.json()
+
+    def _embed_text_sync(self, text: str) -> np.ndarray:
+        """Embed a single text in one request"""
         try:
             # Truncate text to max 150 tokens (~600 chars for safety)
             # Server has parallel=1, so we need small batches to avoid 500 errors
@@ -177,55 +168,87 @@ class LlamaCppEmbeddingService:
             if len(text) > max_chars:
                 logger.warning(f"Text truncated from {len(text)} to {max_chars} chars for embedding")
 
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                payload = {
-                    "input": truncated_text,
-                    "model": self.model_name  # embeddinggemma-300M
-                }
+            result = self._post_embeddings(truncated_text)
+            if result is None:
+                return np.zeros(self.embedding_dim, dtype=np.float32)
 
-                async with session.post(self.embeddings_url, json=payload) as response:
-                    if response.status == 200:
-                        result = await response.json()
-
-                        # Extract embedding from OpenAI-compatible response
-                        # Format: {"data": [{"embedding": [...], "index": 0}]}
-                        if "data" in result and result["data"]:
-                            embedding_vector = result["data"][0]["embedding"]
-                        else:
-                            logger.error(f"Unexpected embedding response format: {result}")
-                            return np.zeros(self.embedding_dim, dtype=np.float32)
+            # Extract embedding from OpenAI-compatible response
+            # Format: {"data": [{"embedding": [...], "index": 0}]}
+            if "data" in result and result["data"]:
+                embedding_vector = result["data"][0]["embedding"]
+            else:
+                logger.error(f"Unexpected embedding response format: {result}")
+                return np.zeros(self.embedding_dim, dtype=np.float32)
 
-                        # Convert to numpy array
-                        embedding_np = np.array(embedding_vector, dtype=np.float32)
+            # Convert to numpy array
+            embedding_np = np.array(embedding_vector, dtype=np.float32)
 
-                        # L2 normalization
-                        norm = np.linalg.norm(embedding_np)
-                        if norm > 0:
-                            embedding_np = embedding_np / norm
+            # L2 normalization
+            norm = np.linalg.norm(embedding_np)
+            if norm > 0:
+                embedding_np = embedding_np / norm
 
-                        return embedding_np
+            return embedding_np
 
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Embedding server error {response.status}: {error_text}")
-                        return np.zeros(self.embedding_dim, dtype=np.float32)
-
-        except asyncio.TimeoutError:
+        except requests.Timeout:
             logger.error(f"Timeout connecting to embedding server at {self.base_url}")
             return np.zeros(self.embedding_dim, dtype=np.float32)
-        except aiohttp.ClientError as e:
+        except requests.RequestException as e:
             logger.error(f"Connection error to embedding server: {e}")
             return np.zeros(self.embedding_dim, dtype=np.float32)
         except Exception as e:
             logger.error(f"Unexpected error in embedding generation: {e}")
             return np.zeros(self.embedding_dim, dtype=np.float32)
 
-    def embed_batch(self, texts: List[str]) -> np.ndarray:
+    def _embed_batch_sync(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a list of texts in a single request (OpenAI-compatible list input).
+        Empty texts and failed requests yield zero vectors.
         """
-        Generate embeddings for multiple texts
+        embeddings = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+
+        max_chars = 600
+        positions = [i for i, t in enumerate(texts) if t and t.strip()]
+        if not positions:
+            return embeddings
+        inputs = [texts[i][:max_chars] for i in positions]
+
+        try:
+            result = self._post_embeddings(inputs)
+            if result is None:
+                return embeddings
+
+            data = result.get("data") if isinstance(result, dict) else None
+            if not data:
+                logger.error(f"Unexpected embedding response format: {result}")
+                return embeddings
+
+            # Items carry their input index; fall back to response order
+            for order, item in enumerate(data):
+                idx = item.get("index", order)
+                if 0 <= idx < len(positions):
+                    embeddings[positions[idx]] = np.asarray(item["embedding"], dtype=np.float32)
+
+            # L2 normalization (row-wise)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+            return embeddings
+
+        except requests.Timeout:
+            logger.error(f"Timeout connecting to embedding server at {self.base_url}")
+        except requests.RequestException as e:
+            logger.error(f"Connection error to embedding server: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error in batch embedding generation: {e}")
+        return np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+
+    def embed_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts, one HTTP request per batch
 
         Args:
             texts: List of texts to embed
+            batch_size: Number of texts sent per request
 
         Returns:
             numpy array of shape (len(texts), embedding_dim)
@@ -233,15 +256,16 @@ class LlamaCppEmbeddingService:
         if not texts:
             return np.zeros((0, self.embedding_dim), dtype=np.float32)
 
-        embeddings = []
-        for i, text in enumerate(texts):
-            if i % 10 == 0:
-                logger.info(f"Embedding batch progress: {i}/{len(texts)}")
-
-            emb = self.embed_text(text)
-            embeddings.append(emb)
+        embeddings = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            logger.info(f"Embedding batch progress: {start}/{len(texts)}")
+            batch = texts[start:start + batch_size]
+            try:
+                embeddings[start:start + len(batch)] = self._embed_batch_sync(batch)
+            except Exception as e:
+                logger.error(f"Error generating LlamaCpp batch embeddings: {e}")
 
-        return np.array(embeddings, dtype=np.float32)
+        return embeddings
 
     def get_embedding_dimension(self) -> int:
         """Get the dimension of the embeddings (768 for EmbeddingGemma-300M)"""
@@ -6,7 +6,7 @@ Alternative plus rapide à LlamaCpp pour les embeddings
 import requests
 import numpy as np
 import logging
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +26,8 @@ class OllamaEmbedder:
         self.base_url = base_url.rstrip('/')
         self.model = model
         self.embed_url = f"{self.base_url}/api/embed"
+        # Session HTTP persistante (keep-alive) réutilisée entre les appels
+        self.session = requests.Session()
 
     def embed_text(self, text: str) -> np.ndarray:
         """
@@ -43,7 +45,7 @@ class OllamaEmbedder:
                 "input": text
             }
 
-            response = requests.post(
+            response = self.session.post(
                 self.embed_url,
                 json=payload,
                 timeout=30
@@ -74,10 +76,56 @@ class OllamaEmbedder:
             logger.error(f"Embedding error: {e}")
             raise
 
+    def embed_batch(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Génère les embeddings d'une liste de textes (une requête /api/embed par lot)
+
+        Args:
+            texts: Textes à embedder
+            batch_size: Nombre de textes envoyés par requête
+
+        Returns:
+            Matrice numpy (len(texts), dimension), lignes normalisées L2
+        """
+        vectors = []
+        try:
+            for start in range(0, len(texts), batch_size):
+                payload = {
+                    "model": self.model,
+                    "input": texts[start:start + batch_size]
+                }
+
+                response = self.session.post(
+                    self.embed_url,
+                    json=payload,
+                    timeout=30
+                )
+                response.raise_for_status()
+
+                data = response.json()
+                if 'embeddings' not in data:
+                    raise ValueError(f"No embeddings in response: {data}")
+                vectors.extend(data['embeddings'])
+
+            embeddings = np.array(vectors, dtype=np.float32)
+
+            # Normaliser L2 chaque ligne
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            np.divide(embeddings, norms, out=embeddings, where=norms > 0)
+
+            return embeddings
+
+        except requests.RequestException as e:
+            logger.error(f"Ollama API error: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Embedding error: {e}")
+            raise
+
     def test_connection(self) -> bool:
         """Test la connexion à Ollama"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             response.raise_for_status()
             return True
         except:
@@ -8,16 +8,29 @@ from typing import List, Dict, Any, Optional
 
 import numpy as np
 from sqlalchemy.orm import Session
-from rank_bm25 import BM25Okapi
-from PyPDF2 import PdfReader
+
+try:
+    # Noyaux SIMD (AVX2/AVX-512/NEON) pour la similarité cosinus, optionnel
+    import simsimd
+except ImportError:
+    simsimd = None
 
 from ..db.crud import (
     get_or_create_rag_document,
     add_rag_chunk,
-    get_rag_chunks_by_domain,
+    get_rag_chunk_rows_by_domain,
+    get_rag_chunks_by_ids,
     create_rag_trace,
 )
 from ..db.models import RagChunk
+from ..utils.rag_helpers import (
+    blob_to_vector,
+    vector_to_blob,
+    make_bm25,
+    bm25_get_scores,
+    extract_pdf_text,
+    top_k_indices,
+)
 from ..embeddings_pool import embeddings_pool
 from ..llm_pool import llm_pool
 
@@ -40,32 +53,42 @@ def get_embedding(text: str) -> np.ndarray:
     return embeddings_pool.get_embedding(text)
 
 
-def blob_to_vector(blob: bytes) -> np.ndarray:
-    return np.frombuffer(blob, dtype=np.float32)
-
-
 def cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
     if a is None or b is None or a.size == 0 or b.size == 0:
         return 0.0
+    if simsimd is not None and a.size == b.size:
+        # simsimd renvoie la distance cosinus (norme + produit scalaire en une passe)
+        return 1.0 - float(simsimd.cosine(
+            np.ascontiguousarray(a, dtype=np.float32),
+            np.ascontiguousarray(b, dtype=np.float32),
+        ))
     denom = (np.linalg.norm(a) * np.linalg.norm(b) + 1e-8)
     return float(np.dot(a, b) / denom) if denom > 0 else 0.0
 
 
+def cosine_sim_matrix(q: np.ndarray, m: np.ndarray) -> np.ndarray:
+    """
+    Similarité cosinus entre q et chaque ligne de m (N, D), en un seul produit matriciel.
+    """
+    if q is None or m is None or q.size == 0 or m.size == 0:
+        return np.zeros(0 if m is None else m.shape[0], dtype=np.float32)
+    if simsimd is not None:
+        distances = simsimd.cdist(
+            np.ascontiguousarray(q, dtype=np.float32)[None, :],
+            np.ascontiguousarray(m, dtype=np.float32),
+            metric="cosine",
+        )
+        return 1.0 - np.asarray(distances, dtype=np.float32).reshape(-1)
+    denom = np.linalg.norm(m, axis=1) * np.linalg.norm(q) + 1e-8
+    return (m @ q) / denom
+
+
 # ===================== CHUNKING =====================
 
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP) -> List[str]:
     words = text.split()
-    chunks: List[str] = []
-    i = 0
-    n = len(words)
     step = max(1, chunk_size - overlap)
-
-    while i < n:
-        chunk = " ".join(words[i : i + chunk_size])
-        chunks.append(chunk)
-        i += step
-
-    return chunks
+    return [" ".join(words[i : i + chunk_size]) for i in range(0, len(words), step)]
 
 
 # ===================== INGESTION =====================
@@ -104,12 +127,7 @@ def ingest_pdf(
         return doc.id
 
     try:
-        reader = PdfReader(pdf_path)
-        full_text = ""
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                full_text += text + "\n"
+        full_text = extract_pdf_text(pdf_path)
 
         chunks = chunk_text(full_text)
         for idx, chunk in enumerate(chunks):
@@ -118,7 +136,7 @@ def ingest_pdf(
                 db,
                 doc_id=doc.id,
                 content=chunk,
-                embedding_bytes=emb.tobytes(),
+                embedding_bytes=vector_to_blob(emb),
                 page_number=None,
                 chunk_index=idx,
                 domain=domain,
@@ -164,7 +182,7 @@ def ingest_text_document(
                 db,
                 doc_id=doc.id,
                 content=chunk,
-                embedding_bytes=emb.tobytes(),
+                embedding_bytes=vector_to_blob(emb),
                 page_number=None,
                 chunk_index=idx,
                 domain=domain,
@@ -195,27 +213,46 @@ def hybrid_search(
     """
     q_emb = get_embedding(query)
 
-    # Charger les candidats (filtrés par domaine ou non)
-    candidates: List[RagChunk] = get_rag_chunks_by_domain(db, domain=domain)
+    # Charger les candidats (filtrés par domaine ou non) en tuples
+    # (id, content, embedding), sans hydratation ORM
+    candidates = get_rag_chunk_rows_by_domain(db, domain=domain)
     if not candidates:
         return []
 
     # BM25 sur les candidats
-    tokenized = [c.content.split() for c in candidates]
-    bm25 = BM25Okapi(tokenized)
+    tokenized = [content.split() for _, content, _ in candidates]
+    bm25 = make_bm25(tokenized)
     query_tokens = query.split()
-    bm25_scores = bm25.get_scores(query_tokens)  # array-like
-
-    scores: List[tuple] = []
-    for idx, c in enumerate(candidates):
-        vec = blob_to_vector(c.embedding) if c.embedding else None
-        e_score = cosine_sim(q_emb, vec) if vec is not None else 0.0
-        b_score = float(bm25_scores[idx]) if bm25_scores is not None else 0.0
-        final_score = 0.7 * e_score + 0.3 * (b_score / 10.0)
-        scores.append((c, final_score))
-
-    scores.sort(key=lambda x: x[1], reverse=True)
-    return scores[:top_k]
+    bm25_scores = bm25_get_scores(bm25, query_tokens)
+
+    # Embeddings des candidats empilés en une matrice (N, D): un seul matmul
+    # au lieu d'un cosine_sim par candidat. Sans embedding (ou dimension
+    # différente) => score embedding nul.
+    e_scores = np.zeros(len(candidates), dtype=np.float32)
+    if q_emb is not None and q_emb.size:
+        rows = []
+        vecs = []
+        for idx, (_, _, embedding) in enumerate(candidates):
+            if embedding:
+                vec = blob_to_vector(embedding)
+                if vec.size == q_emb.size:
+                    rows.append(idx)
+                    vecs.append(vec)
+        if vecs:
+            e_scores[rows] = cosine_sim_matrix(q_emb, np.vstack(vecs))
+
+    b_scores = (
+        np.asarray(bm25_scores, dtype=np.float32)
+        if bm25_scores is not None
+        else np.zeros(len(candidates), dtype=np.float32)
+    )
+    final_scores = 0.7 * e_scores + 0.3 * (b_scores / 10.0)
+
+    # Hydrater en RagChunk uniquement les top_k
+    top = top_k_indices(final_scores, top_k)
+    score_by_id = {candidates[i][0]: float(final_scores[i]) for i in top}
+    chunks = get_rag_chunks_by_ids(db, [candidates[i][0] for i in top])
+    return [(c, score_by_id[c.id]) for c in chunks]
 
 
 def rerank_with_llm(
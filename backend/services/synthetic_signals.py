@@ -336,12 +336,9 @@ def inject_signals_to_bot_service(signals: List[Dict[str, Any]]):
             logger.error("[SyntheticSignals] Bot service not available")
             return False
 
+        # La queue est bornée (deque maxlen): les plus anciens signaux sortent seuls
         bot_service.signals_queue.extend(signals)
 
-        # Trim si dépasse max
-        if len(bot_service.signals_queue) > bot_service.max_signals:
-            bot_service.signals_queue = bot_service.signals_queue[-bot_service.max_signals:]
-
         logger.info(f"[SyntheticSignals] Injected {len(signals)} signals into bot service queue")
         return True
 
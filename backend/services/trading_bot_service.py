@@ -8,6 +8,7 @@ from typing import List, Dict, Any, Optional
 from pathlib import Path
 import pandas as pd
 import concurrent.futures
+from collections import deque
 
 # Import du bot core adapté pour le backend
 import sys
@@ -64,8 +65,8 @@ class TradingBotService:
     def __init__(self):
         self.config_manager = get_bot_config_manager()
         self.is_running = False
-        self.signals_queue = []  # FIFO pour les signaux
         self.max_signals = 100  # Limite des signaux en mémoire
+        self.signals_queue = deque(maxlen=self.max_signals)  # FIFO bornée: les plus anciens sortent seuls
         self.bot_globals = {}
         self.state_file = Path("data/bot_state.json")
         self._load_bot_modules()
@@ -167,8 +168,6 @@ class TradingBotService:
 
                 # Ajouter à la queue
                 self.signals_queue.extend(signals)
-                if len(self.signals_queue) > self.max_signals:
-                    self.signals_queue = self.signals_queue[-self.max_signals:]
 
                 return {
                     "success": True,
@@ -225,8 +224,6 @@ class TradingBotService:
             
             # Ajoute à la queue FIFO
             self.signals_queue.extend(signals)
-            if len(self.signals_queue) > self.max_signals:
-                self.signals_queue = self.signals_queue[-self.max_signals:]
             
             # Paper trading si activé
             if self.bot_globals.get('PAPER_TRADING', True):
@@ -103,8 +103,8 @@ def ingest_news_to_rag(batch_size: int = 5):
 
             # Reconstruire l'index BM25 une seule fois à la fin
             if success_count > 0:
-                logger.info("🔨 Rebuilding BM25 index...")
-                build_bm25_index(db)
+                logger.info("🔨 Rebuilding BM25 index (news)...")
+                build_bm25_index(db, domain="news")
 
             logger.info(f"📊 RAG ingestion complete: {success_count} success, {fail_count} failed")
 
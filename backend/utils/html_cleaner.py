@@ -5,8 +5,26 @@ Supprime les balises HTML, décode les entités HTML, et formate le texte propre
 
 import re
 import html
+import logging
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+# Balises supprimées avec leur contenu (scripts, styles, médias) et commentaires HTML
+_RE_STRIP_WITH_BODY = re.compile(
+    r'<(script|style|video|audio)\b[^>]*>.*?</\1>|<!--.*?-->',
+    re.DOTALL | re.IGNORECASE,
+)
+# Toute balise restante; les sauts de ligne/blocs (br, p, div) deviennent un espace
+_RE_ANY_TAG = re.compile(r'(?P<brk></?(?:br|p|div)\b[^>]*>)|<[^>]+>', re.IGNORECASE)
+_RE_TAG = re.compile(r'<[^>]+>')
+_RE_WS = re.compile(r'\s+')
+_RE_ANGLE_BRACKETS = re.compile(r'[<>]')
+
+
+def _replace_tag(match: re.Match) -> str:
+    return ' ' if match.group('brk') else ''
+
 def clean_html_content(content: str) -> str:
     """
     Nettoie le contenu HTML d'un article
@@ -21,47 +39,38 @@ def clean_html_content(content: str) -> str:
         return ""
     
     try:
-        # 1. Décoder les entités HTML (&#039; -> ', &amp; -> &, etc.)
-        cleaned = html.unescape(content)
-        
-        # 2. Supprimer les balises de script et style avec leur contenu
-        cleaned = re.sub(r'<(script|style)[^>]*>.*?</\1>', '', cleaned, flags=re.DOTALL | re.IGNORECASE)
+        cleaned = content
         
-        # 3. Supprimer les commentaires HTML
-        cleaned = re.sub(r'<!--.*?-->', '', cleaned, flags=re.DOTALL)
-        
-        # 4. Remplacer les balises de saut de ligne par des espaces
-        cleaned = re.sub(r'<br\s*/?>', ' ', cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r'</?p[^>]*>', ' ', cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r'</?div[^>]*>', ' ', cleaned, flags=re.IGNORECASE)
-        
-        # 5. Supprimer les balises d'image et médias (souvent inutiles pour le texte)
-        cleaned = re.sub(r'<img[^>]*>', '', cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r'<video[^>]*>.*?</video>', '', cleaned, flags=re.DOTALL | re.IGNORECASE)
-        cleaned = re.sub(r'<audio[^>]*>.*?</audio>', '', cleaned, flags=re.DOTALL | re.IGNORECASE)
-        
-        # 6. Supprimer toutes les autres balises HTML restantes
-        cleaned = re.sub(r'<[^>]+>', '', cleaned)
+        # Texte déjà propre (ni balise ni entité): seules les étapes 4-6 s'appliquent
+        if '<' in cleaned or '&' in cleaned:
+            # 1. Décoder les entités HTML (&#039; -> ', &amp; -> &, etc.)
+            cleaned = html.unescape(cleaned)
+            
+            # 2. Supprimer script/style/vidéo/audio avec leur contenu, et les commentaires HTML
+            cleaned = _RE_STRIP_WITH_BODY.sub('', cleaned)
+            
+            # 3. Supprimer toutes les autres balises (br/p/div remplacées par un espace)
+            cleaned = _RE_ANY_TAG.sub(_replace_tag, cleaned)
         
-        # 7. Nettoyer les espaces multiples
-        cleaned = re.sub(r'\s+', ' ', cleaned)
+        # 4. Nettoyer les espaces multiples
+        cleaned = _RE_WS.sub(' ', cleaned)
         
-        # 8. Supprimer les espaces en début et fin
+        # 5. Supprimer les espaces en début et fin
         cleaned = cleaned.strip()
         
-        # 9. Limiter la longueur si trop long (éviter les articles géants)
+        # 6. Limiter la longueur si trop long (éviter les articles géants)
         if len(cleaned) > 2000:
             cleaned = cleaned[:2000] + "..."
         
         return cleaned
         
     except Exception as e:
-        print(f"Erreur lors du nettoyage HTML: {e}")
+        logger.warning("Erreur lors du nettoyage HTML: %s", e)
         # Fallback: au moins supprimer les balises de base
         try:
-            fallback = re.sub(r'<[^>]+>', '', content)
+            fallback = _RE_TAG.sub('', content)
             return fallback.strip()[:2000]
-        except:
+        except Exception:
             return content[:500] if len(content) > 500 else content
 
 def clean_article_title(title: str) -> str:
@@ -82,10 +91,10 @@ def clean_article_title(title: str) -> str:
         cleaned = html.unescape(title)
         
         # Supprimer les balises HTML si présentes
-        cleaned = re.sub(r'<[^>]+>', '', cleaned)
+        cleaned = _RE_TAG.sub('', cleaned)
         
         # Nettoyer les espaces
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = _RE_WS.sub(' ', cleaned).strip()
         
         # Limiter la longueur du titre
         if len(cleaned) > 200:
@@ -94,7 +103,7 @@ def clean_article_title(title: str) -> str:
         return cleaned
         
     except Exception as e:
-        print(f"Erreur lors du nettoyage du titre: {e}")
+        logger.warning("Erreur lors du nettoyage du titre: %s", e)
         return title[:200] if len(title) > 200 else title
 
 def extract_text_preview(content: str, max_length: int = 300) -> str:
@@ -172,7 +181,7 @@ def clean_url(url: str) -> Optional[str]:
         return url
         
     except Exception as e:
-        print(f"Erreur lors du nettoyage URL: {e}")
+        logger.warning("Erreur lors du nettoyage URL: %s", e)
         return url if url.startswith(('http://', 'https://')) else None
 
 def clean_article_data(article_data: dict) -> dict:
@@ -185,30 +194,32 @@ def clean_article_data(article_data: dict) -> dict:
     Returns:
         Dictionnaire avec les données nettoyées
     """
-    cleaned = article_data.copy()
+    updates = {}
     
     # Nettoyer le titre
-    if 'title' in cleaned:
-        cleaned['title'] = clean_article_title(cleaned['title'])
+    if 'title' in article_data:
+        updates['title'] = clean_article_title(article_data['title'])
     
     # Nettoyer la description/contenu
-    if 'description' in cleaned:
-        cleaned['description'] = clean_html_content(cleaned['description'])
+    if 'description' in article_data:
+        updates['description'] = clean_html_content(article_data['description'])
     
-    if 'content' in cleaned:
-        cleaned['content'] = clean_html_content(cleaned['content'])
+    if 'content' in article_data:
+        updates['content'] = clean_html_content(article_data['content'])
     
     # Nettoyer l'URL
-    if 'url' in cleaned:
-        cleaned['url'] = clean_url(cleaned['url'])
+    if 'url' in article_data:
+        updates['url'] = clean_url(article_data['url'])
     
-    # Nettoyer la source (au cas où)
-    if 'source' in cleaned:
-        source = cleaned['source']
-        if isinstance(source, str):
-            cleaned['source'] = re.sub(r'[<>]', '', source).strip()
+    # Nettoyer la source (au cas où) - regex seulement si des chevrons sont présents
+    source = article_data.get('source')
+    if isinstance(source, str):
+        if '<' in source or '>' in source:
+            source = _RE_ANGLE_BRACKETS.sub('', source)
+        updates['source'] = source.strip()
     
-    return cleaned
+    # Une seule fusion de dictionnaires au lieu de copie + réécritures successives
+    return {**article_data, **updates}
 
 # Fonction de test pour valider le nettoyage
 def test_html_cleaner():
@@ -4,26 +4,84 @@ Gestion des embeddings, chunking, BM25, et recherche hybride
 """
 
 import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from typing import List, Tuple, Optional
-from rank_bm25 import BM25Okapi
+import bm25s
 from PyPDF2 import PdfReader
+from sqlalchemy import select, func, text
 
 from ..db.models import RagDocument, RagChunk, SessionLocal
+from ..config.paths import RAG_EMBEDDINGS_CACHE
 
 # ===================== CONFIG =====================
 CHUNK_SIZE = 300  # Nombre de mots par chunk
 OVERLAP = 50      # Overlap entre chunks pour la continuité
+EMBEDDING_WORKERS = int(os.getenv("RAG_EMBEDDING_WORKERS", "8"))  # Requêtes d'embedding concurrentes
 
 # ===================== BLOB <-> VECTOR =====================
+# Les embeddings sont stockés quantifiés sur 8 bits par composante (4x plus petits
+# qu'en float32) avec un couple (alpha, shift) par vecteur:
+#   MAGIC (2 octets) + D (uint32) + q.tobytes() (D x uint8) + struct.pack("<ff", alpha, shift)
+# et v ~= q * alpha + shift. Le format est reconnu à son en-tête et à sa longueur
+# exacte 6 + D + 8. Les vecteurs sont normalisés L2 avant stockage, ainsi la
+# similarité cosinus se réduit à un produit scalaire. Les anciens BLOB float32
+# bruts restent lisibles.
+QUANTIZE_EMBEDDINGS = os.getenv("RAG_QUANTIZE_EMBEDDINGS", "true").lower() == "true"
+_Q8_MAGIC = b"Q8"
+_Q8_HEADER = struct.Struct("<2sI")
+_Q8_TRAILER = struct.Struct("<ff")
+
+
+def normalize_vector(vector: np.ndarray) -> np.ndarray:
+    """Normalise un vecteur (L2) en float32; un vecteur nul reste nul"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
 
 def vector_to_blob(vector: np.ndarray) -> bytes:
     """Convertit un vecteur numpy en BLOB pour stockage SQLite"""
-    return vector.astype(np.float32).tobytes()
+    vector = normalize_vector(vector)
+    if not QUANTIZE_EMBEDDINGS or vector.size == 0:
+        return vector.tobytes()
+
+    shift = float(vector.min())
+    alpha = (float(vector.max()) - shift) / 255.0
+    if alpha > 0:
+        q = np.rint((vector - shift) / alpha).astype(np.uint8)
+    else:
+        q = np.zeros(vector.size, dtype=np.uint8)
+    return _Q8_HEADER.pack(_Q8_MAGIC, q.size) + q.tobytes() + _Q8_TRAILER.pack(alpha, shift)
+
+
+def _quantized_dim(blob: bytes) -> Optional[int]:
+    """Nombre de composantes d'un BLOB quantifié 8 bits, None pour un BLOB float32"""
+    if blob[:2] != _Q8_MAGIC:
+        return None
+    if len(blob) < _Q8_HEADER.size + _Q8_TRAILER.size:
+        return None
+    _, dim = _Q8_HEADER.unpack_from(blob)
+    return dim if len(blob) == _Q8_HEADER.size + dim + _Q8_TRAILER.size else None
+
+
+def is_quantized_blob(blob: bytes) -> bool:
+    """True si le BLOB est au format quantifié 8 bits"""
+    return _quantized_dim(blob) is not None
 
 
 def blob_to_vector(blob: bytes) -> np.ndarray:
-    """Convertit un BLOB SQLite en vecteur numpy"""
+    """Convertit un BLOB SQLite en vecteur numpy (float32, déquantifié si besoin)"""
+    dim = _quantized_dim(blob)
+    if dim is not None:
+        alpha, shift = _Q8_TRAILER.unpack_from(blob, len(blob) - _Q8_TRAILER.size)
+        q = np.frombuffer(blob, dtype=np.uint8, offset=len(blob) - _Q8_TRAILER.size - dim, count=dim)
+        return q.astype(np.float32) * np.float32(alpha) + np.float32(shift)
     return np.frombuffer(blob, dtype=np.float32)
 
 
@@ -34,13 +92,47 @@ def cosine_sim(a: np.ndarray, b: np.ndarray) -> float:
     return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-8)
 
 
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices des k meilleurs scores, triés par score décroissant (argpartition en O(N))"""
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.intp)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
 # ===================== BM25 INDEX =====================
 # Index BM25 global pour recherche lexicale rapide
+# (bm25s: IDF/TF précalculés en matrices creuses SciPy, une requête = un produit creux)
 bm25_index = {}
+# Version de l'index par domaine: incrémentée à chaque reconstruction, permet
+# d'invalider les caches dérivés du corpus d'un domaine
+bm25_version = {}
+
+
+def make_bm25(tokenized_corpus: List[List[str]]) -> bm25s.BM25:
+    """Construit un index BM25 sur un corpus déjà tokenisé (un document = une liste de mots)"""
+    bm25 = bm25s.BM25()
+    bm25.index(tokenized_corpus, show_progress=False)
+    return bm25
 
 
-def build_bm25_index(session=None):
-    """Construit l'index BM25 pour tous les domaines"""
+def bm25_get_scores(bm25: bm25s.BM25, query_tokens: List[str]) -> np.ndarray:
+    """Scores BM25 de la requête pour tous les documents de l'index (0 si aucun mot connu)"""
+    token_ids = bm25.get_tokens_ids(query_tokens)
+    if not token_ids:
+        return np.zeros(bm25.scores["num_docs"], dtype=np.float32)
+    return bm25.get_scores_from_ids(token_ids)
+
+
+def build_bm25_index(session=None, domain: Optional[str] = None):
+    """
+    Construit l'index BM25 d'un domaine, ou de tous les domaines si domain est None.
+    Chaque reconstruction incrémente bm25_version[domain].
+    """
     if session is None:
         session = SessionLocal()
         close_session = True
@@ -48,29 +140,193 @@ def build_bm25_index(session=None):
         close_session = False
 
     try:
-        for domain_tuple in session.query(RagChunk.domain).distinct():
-            domain = domain_tuple[0]
+        if domain is not None:
+            domains = [domain]
+        else:
+            domains = [d[0] for d in session.query(RagChunk.domain).distinct()]
+
+        for domain in domains:
             if not domain:
                 continue
 
-            chunks = session.query(RagChunk).filter(RagChunk.domain == domain).all()
-            if not chunks:
+            contents = session.execute(
+                select(RagChunk.content).where(RagChunk.domain == domain).order_by(RagChunk.id)
+            ).scalars().all()
+            if not contents:
+                # Domaine vidé (suppression): retirer l'index périmé
+                if bm25_index.pop(domain, None) is not None:
+                    bm25_version[domain] = bm25_version.get(domain, 0) + 1
                 continue
 
-            texts = [c.content.split() for c in chunks]
-            bm25_index[domain] = BM25Okapi(texts)
-            print(f"✅ Index BM25 construit pour {domain}: {len(chunks)} chunks")
+            texts = [content.split() for content in contents]
+            bm25_index[domain] = make_bm25(texts)
+            bm25_version[domain] = bm25_version.get(domain, 0) + 1
+            print(f"✅ Index BM25 construit pour {domain}: {len(contents)} chunks")
 
     finally:
         if close_session:
             session.close()
 
 
-def get_bm25_index(domain: str) -> Optional[BM25Okapi]:
+def get_bm25_index(domain: str) -> Optional[bm25s.BM25]:
     """Récupère l'index BM25 pour un domaine"""
     return bm25_index.get(domain)
 
 
+# ===================== CORPUS CACHE =====================
+# Corpus en mémoire par domaine (None = tous les domaines), trié par id de chunk
+# comme l'index BM25: {domain: (clé de validité, ids, matrice (N, D) normalisée)}
+_corpus_cache = {}
+
+
+def _chunk_version(session, domain: Optional[str]) -> Optional[int]:
+    """
+    Version persistée des chunks d'un domaine (somme de tous les domaines si None),
+    incrémentée par les triggers de rag_chunks; None si la table n'existe pas
+    """
+    try:
+        if domain:
+            version = session.execute(
+                text("SELECT version FROM rag_chunk_versions WHERE domain = :domain"),
+                {"domain": domain},
+            ).scalar()
+        else:
+            version = session.execute(text("SELECT SUM(version) FROM rag_chunk_versions")).scalar()
+        return version or 0
+    except Exception:
+        return None
+
+
+def _corpus_key(session, domain: Optional[str]) -> tuple:
+    """
+    Clé de validité du corpus d'un domaine: version BM25 + (nombre, id max) des chunks
+    + version persistée, pour détecter aussi les écritures qui ne reconstruisent pas
+    l'index BM25 (suppressions hors delete_document, ids réutilisés par SQLite)
+    """
+    stmt = select(func.count(RagChunk.id), func.max(RagChunk.id))
+    if domain:
+        stmt = stmt.where(RagChunk.domain == domain)
+        version = bm25_version.get(domain, 0)
+    else:
+        version = tuple(sorted(bm25_version.items()))
+    count, max_id = session.execute(stmt).one()
+    return (version, count, max_id, _chunk_version(session, domain))
+
+
+def _load_domain_corpus(
+    session, domain: Optional[str], key: Optional[tuple] = None
+) -> Tuple[List[int], np.ndarray]:
+    """
+    Retourne (ids, matrice d'embeddings normalisés L2) pour un domaine,
+    depuis le cache si le corpus n'a pas changé, sinon via un SELECT en bloc
+    """
+    if key is None:
+        key = _corpus_key(session, domain)
+    cached = _corpus_cache.get(domain)
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+
+    # Démarrage à froid: matrice déjà persistée sur disque pour ce corpus
+    # (seulement si la version persistée des chunks est connue)
+    _, count, max_id, chunk_version = key
+    loaded = None
+    if chunk_version is not None:
+        loaded = _load_corpus_files(domain, count, max_id, chunk_version)
+    if loaded is not None:
+        ids, matrix = loaded
+        _corpus_cache[domain] = (key, ids, matrix)
+        return ids, matrix
+
+    stmt = select(RagChunk.id, RagChunk.embedding).order_by(RagChunk.id)
+    if domain:
+        stmt = stmt.where(RagChunk.domain == domain)
+    rows = session.execute(stmt).all()
+
+    ids = [row[0] for row in rows]
+    vectors = [blob_to_vector(row[1]) if row[1] else None for row in rows]
+    dim = next((v.size for v in vectors if v is not None and v.size), 0)
+
+    # Chunks sans embedding (ou de dimension différente) => ligne nulle
+    matrix = np.zeros((len(ids), dim), dtype=np.float32)
+    for i, vec in enumerate(vectors):
+        if vec is not None and vec.size == dim:
+            matrix[i] = vec
+
+    # Normalisation des lignes une fois au chargement (anciens BLOB non normalisés,
+    # erreur de quantification): le score cosinus devient un simple produit scalaire
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+    if ids and chunk_version is not None:
+        _save_corpus_files(domain, count, max_id, chunk_version, ids, matrix)
+
+    _corpus_cache[domain] = (key, ids, matrix)
+    return ids, matrix
+
+
+# Persistance disque: rag_emb_<domaine>_<nombre>_<id max>_<version>.{ids,emb}.npy
+# La version des chunks (table rag_chunk_versions, incrémentée par trigger à chaque
+# écriture) identifie le contenu du corpus entre deux redémarrages; (nombre, id max)
+# écarte en plus les fichiers d'une autre base.
+
+_CORPUS_FILE_SUFFIX = re.compile(r"\d+_(?:\d+|None)(?:_\d+)?\.(?:ids|emb)\.npy")
+
+
+def _corpus_file_prefix(domain: Optional[str]) -> str:
+    return "rag_emb_" + (re.sub(r"[^\w-]", "_", domain) if domain else "_all_") + "_"
+
+
+def _load_corpus_files(
+    domain: Optional[str], count: int, max_id, version: int
+) -> Optional[Tuple[List[int], np.ndarray]]:
+    """Charge (ids, matrice en memmap lecture seule) si les fichiers du corpus existent"""
+    stem = RAG_EMBEDDINGS_CACHE / f"{_corpus_file_prefix(domain)}{count}_{max_id}_{version}"
+    ids_path = stem.with_name(stem.name + ".ids.npy")
+    emb_path = stem.with_name(stem.name + ".emb.npy")
+    if not (ids_path.exists() and emb_path.exists()):
+        return None
+    try:
+        ids = np.load(ids_path).tolist()
+        matrix = np.load(emb_path, mmap_mode="r")
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            return None
+        return ids, matrix
+    except Exception as e:
+        print(f"⚠️ Cache embeddings illisible pour {domain}: {e}")
+        return None
+
+
+def _drop_corpus_files(domain: Optional[str]):
+    """Supprime les fichiers persistés d'un corpus (les ids peuvent être réutilisés après suppression)"""
+    prefix = _corpus_file_prefix(domain)
+    for old in RAG_EMBEDDINGS_CACHE.glob(prefix + "*.npy"):
+        if _CORPUS_FILE_SUFFIX.fullmatch(old.name[len(prefix):]):
+            old.unlink(missing_ok=True)
+    _corpus_cache.pop(domain, None)
+
+
+def _save_corpus_files(
+    domain: Optional[str], count: int, max_id, version: int, ids: List[int], matrix: np.ndarray
+):
+    """Écrit atomiquement (tmp + rename) les fichiers du corpus et supprime les versions périmées"""
+    prefix = _corpus_file_prefix(domain)
+    stem = f"{prefix}{count}_{max_id}_{version}"
+    try:
+        for suffix, array in ((".ids.npy", np.asarray(ids, dtype=np.int64)), (".emb.npy", matrix)):
+            path = RAG_EMBEDDINGS_CACHE / (stem + suffix)
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+
+        for old in RAG_EMBEDDINGS_CACHE.glob(prefix + "*.npy"):
+            rest = old.name[len(prefix):]
+            if _CORPUS_FILE_SUFFIX.fullmatch(rest) and not old.name.startswith(stem + "."):
+                old.unlink(missing_ok=True)
+    except Exception as e:
+        print(f"⚠️ Impossible de persister le cache embeddings pour {domain}: {e}")
+
+
 # ===================== CHUNKING =====================
 
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP) -> List[str]:
@@ -86,19 +342,76 @@ def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = OVERLAP)
         Liste de chunks de texte
     """
     words = text.split()
-    chunks = []
-    i = 0
+    step = max(1, chunk_size - overlap)
+    return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), step)]
 
-    while i < len(words):
-        chunk = " ".join(words[i:i + chunk_size])
-        chunks.append(chunk)
-        i += chunk_size - overlap
 
-    return chunks
+# ===================== PDF =====================
+
+def extract_pdf_text(pdf_path: str) -> str:
+    """
+    Extrait le texte de toutes les pages d'un PDF (pages séparées par un saut de ligne)
+    """
+    reader = PdfReader(pdf_path)
+    parts = []
+    for page in reader.pages:
+        text = page.extract_text()
+        if text:
+            parts.append(text)
+    return "\n".join(parts)
 
 
 # ===================== EMBEDDING =====================
 
+# Services d'embedding instanciés une seule fois par (type, url, modèle)
+_embedder_cache = {}
+
+
+def _get_embedder():
+    """
+    Retourne le service d'embedding correspondant à la configuration par défaut
+    (LlamaCpp, Ollama, ou fallback LlamaCpp), mis en cache par (type, url, modèle)
+    """
+    from ..config_manager import config_manager
+
+    # Récupérer la configuration d'embedding par défaut
+    emb_config = config_manager.get_default_embedding()
+
+    if not emb_config:
+        key = (None, "http://localhost:9002", None)
+    else:
+        key = (emb_config.type.value, emb_config.url, getattr(emb_config, "model", None))
+
+    embedder = _embedder_cache.get(key)
+    if embedder is None:
+        embedder = _create_embedder(emb_config)
+        _embedder_cache[key] = embedder
+    return embedder
+
+
+def _create_embedder(emb_config):
+    """Instancie le service d'embedding (imports paresseux des backends)"""
+    if not emb_config:
+        print("⚠️ Aucune configuration d'embedding trouvée, utilisation du fallback LlamaCpp")
+        from ..services.llamacpp_embeddings import get_llamacpp_embedder
+        return get_llamacpp_embedder(base_url="http://localhost:9002")
+    elif emb_config.type.value == "llamacpp":
+        from ..services.llamacpp_embeddings import LlamaCppEmbeddingService
+        return LlamaCppEmbeddingService(base_url=emb_config.url)
+    elif emb_config.type.value == "ollama":
+        from ..services.ollama_embeddings import OllamaEmbedder
+        return OllamaEmbedder(base_url=emb_config.url, model=emb_config.model)
+    elif emb_config.type.value == "openai":
+        # TODO: Implement OpenAI embeddings
+        print(f"⚠️ Type {emb_config.type.value} non encore implémenté, fallback LlamaCpp")
+        from ..services.llamacpp_embeddings import LlamaCppEmbeddingService
+        return LlamaCppEmbeddingService(base_url="http://localhost:9002")
+    else:
+        print(f"⚠️ Type d'embedding non supporté: {emb_config.type.value}, fallback LlamaCpp")
+        from ..services.llamacpp_embeddings import LlamaCppEmbeddingService
+        return LlamaCppEmbeddingService(base_url="http://localhost:9002")
+
+
 def get_embedding(text: str) -> np.ndarray:
     """
     Génère un embedding pour un texte en utilisant le service configuré
@@ -110,38 +423,10 @@ def get_embedding(text: str) -> np.ndarray:
         Vecteur numpy de dimension configurée (défaut: 768, float32)
     """
     try:
-        from ..config_manager import config_manager
-
-        # Récupérer la configuration d'embedding par défaut
-        emb_config = config_manager.get_default_embedding()
-
-        if not emb_config:
-            print("⚠️ Aucune configuration d'embedding trouvée, utilisation du fallback LlamaCpp")
-            from ..services.llamacpp_embeddings import get_llamacpp_embedder
-            embedder = get_llamacpp_embedder(base_url="http://localhost:9002")
-            embedding = embedder.embed_text(text)
-        elif emb_config.type.value == "llamacpp":
-            from ..services.llamacpp_embeddings import LlamaCppEmbeddingService
-            embedder = LlamaCppEmbeddingService(base_url=emb_config.url)
-            embedding = embedder.embed_text(text)
-        elif emb_config.type.value == "ollama":
-            from ..services.ollama_embeddings import OllamaEmbedder
-            embedder = OllamaEmbedder(base_url=emb_config.url, model=emb_config.model)
-            embedding = embedder.embed_text(text)
-        elif emb_config.type.value == "openai":
-            # TODO: Implement OpenAI embeddings
-            print(f"⚠️ Type {emb_config.type.value} non encore implémenté, fallback LlamaCpp")
-            from ..services.llamacpp_embeddings import LlamaCppEmbeddingService
-            embedder = LlamaCppEmbeddingService(base_url="http://localhost:9002")
-            embedding = embedder.embed_text(text)
-        else:
-            print(f"⚠️ Type d'embedding non supporté: {emb_config.type.value}, fallback LlamaCpp")
-            from ..services.llamacpp_embeddings import LlamaCppEmbeddingService
-            embedder = LlamaCppEmbeddingService(base_url="http://localhost:9002")
-            embedding = embedder.embed_text(text)
+        embedding = np.asarray(_get_embedder().embed_text(text), dtype=np.float32)
 
-        # Vérifier que l'embedding est valide (pas que des zéros)
-        if np.count_nonzero(embedding) == 0:
+        # Vérifier que l'embedding est valide (pas que des zéros); any() s'arrête au premier non-nul
+        if not embedding.any():
             print(f"⚠️ Embedding vide généré pour: {text[:50]}...")
 
         return embedding
@@ -154,6 +439,61 @@ def get_embedding(text: str) -> np.ndarray:
         return np.zeros(768, dtype=np.float32)
 
 
+def get_embeddings(
+    texts: List[str],
+    batch_size: int = 32,
+    max_workers: int = EMBEDDING_WORKERS
+) -> np.ndarray:
+    """
+    Génère les embeddings d'une liste de textes, par lots (une requête HTTP par lot)
+
+    Les lots sont envoyés en parallèle (appels IO-bound) et réassemblés dans
+    l'ordre des textes.
+
+    Args:
+        texts: Textes à embedder
+        batch_size: Nombre de textes par requête
+        max_workers: Nombre maximal de requêtes simultanées
+
+    Returns:
+        Matrice numpy (len(texts), dim) float32; les lots en erreur sont des vecteurs zéro
+    """
+    try:
+        embedder = _get_embedder()
+    except Exception as e:
+        print(f"❌ Erreur génération embedding: {e}")
+        return np.zeros((len(texts), 768), dtype=np.float32)
+
+    starts = range(0, len(texts), batch_size)
+    if not starts:
+        return np.zeros((0, 768), dtype=np.float32)
+
+    def embed(start):
+        batch = texts[start:start + batch_size]
+        try:
+            return np.asarray(embedder.embed_batch(batch, batch_size=batch_size), dtype=np.float32)
+        except Exception as e:
+            print(f"❌ Erreur génération embeddings (lot {start}-{start + len(batch)}): {e}")
+            return None
+
+    workers = max(1, min(max_workers, len(starts)))
+    if workers == 1:
+        results = [embed(start) for start in starts]
+    else:
+        # executor.map conserve l'ordre des lots, quel que soit l'ordre de complétion
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(embed, starts))
+
+    dim = next((r.shape[1] for r in results if r is not None and r.ndim == 2), 768)
+    embeddings = np.zeros((len(texts), dim), dtype=np.float32)
+    for start, batch_embs in zip(starts, results):
+        # Fallback : les lots en erreur restent des vecteurs zéro
+        if batch_embs is not None and batch_embs.ndim == 2 and batch_embs.shape[1] == dim:
+            embeddings[start:start + len(batch_embs)] = batch_embs
+
+    return embeddings
+
+
 # ===================== INGESTION =====================
 
 def ingest_pdf(
@@ -197,13 +537,7 @@ def ingest_pdf(
             return True
 
         # Extraire le texte du PDF
-        reader = PdfReader(pdf_path)
-        full_text = ""
-
-        for page_num, page in enumerate(reader.pages):
-            text = page.extract_text()
-            if text:
-                full_text += text + "\n"
+        full_text = extract_pdf_text(pdf_path)
 
         if not full_text.strip():
             print(f"⚠️  PDF vide ou illisible: {pdf_path}")
@@ -225,30 +559,31 @@ def ingest_pdf(
         chunks = chunk_text(full_text)
         print(f"📄 {len(chunks)} chunks créés pour {title}")
 
-        # Créer les chunks avec embeddings
-        for idx, chunk in enumerate(chunks):
-            print(f"   Chunk {idx+1}/{len(chunks)}: génération embedding...", end=" ", flush=True)
-            emb = get_embedding(chunk)
-            print(f"✓ (dim={emb.shape[0]})", end=" ", flush=True)
+        # Générer les embeddings par lots (une requête par lot au lieu d'une par chunk)
+        print(f"   Génération des embeddings ({len(chunks)} chunks)...", end=" ", flush=True)
+        embeddings = get_embeddings(chunks)
+        print(f"✓ (dim={embeddings.shape[1]})")
 
-            db_chunk = RagChunk(
+        # Insérer tous les chunks en une seule passe (sans suivi ORM objet par objet)
+        session.bulk_insert_mappings(RagChunk, [
+            dict(
                 doc_id=doc.id,
                 content=chunk,
-                embedding=vector_to_blob(emb),  # Utiliser la fonction helper
+                embedding=vector_to_blob(emb),
                 page_number=None,  # Pourrait être calculé si nécessaire
                 chunk_index=idx,
                 domain=domain
             )
-            session.add(db_chunk)
-            print("✓ ajouté")
+            for idx, (chunk, emb) in enumerate(zip(chunks, embeddings))
+        ])
 
         print("💾 Commit en base...", end=" ", flush=True)
         session.commit()
         print("✓")
         print(f"✅ [INGESTED] {title} ({len(chunks)} chunks)")
 
-        # Reconstruire l'index BM25 pour ce domaine
-        build_bm25_index(session)
+        # Reconstruire l'index BM25 pour ce domaine uniquement
+        build_bm25_index(session, domain=domain)
 
         return True
 
@@ -263,6 +598,79 @@ def ingest_pdf(
 
 
 # ===================== SEARCH =====================
+# Cache LRU+TTL des résultats de hybrid_search: {clé: (timestamp, [(chunk_id, score), ...])}
+# La clé inclut la clé de validité du corpus, donc toute écriture l'invalide.
+SEARCH_CACHE_TTL = 60        # secondes
+SEARCH_CACHE_MAX_SIZE = 256
+_search_cache = OrderedDict()
+# Recherches concurrentes (threads): l'accès à l'OrderedDict doit être sérialisé
+_search_cache_lock = threading.Lock()
+
+
+def _search_cache_get(key: tuple) -> Optional[List[Tuple[int, float]]]:
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is None:
+            return None
+        timestamp, ranked = entry
+        if time.monotonic() - timestamp > SEARCH_CACHE_TTL:
+            _search_cache.pop(key, None)
+            return None
+        _search_cache.move_to_end(key)
+        return ranked
+
+
+def _search_cache_put(key: tuple, ranked: List[Tuple[int, float]]):
+    with _search_cache_lock:
+        _search_cache[key] = (time.monotonic(), ranked)
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > SEARCH_CACHE_MAX_SIZE:
+            _search_cache.popitem(last=False)
+
+
+def _rank_chunks(
+    session,
+    query: str,
+    query_tokens: List[str],
+    domain: Optional[str],
+    top_k: int,
+    corpus_key: Optional[tuple] = None,
+) -> List[Tuple[int, float]]:
+    """Calcule les scores hybrides et retourne les top_k (chunk_id, score)"""
+    # Générer l'embedding de la requête
+    q_emb = get_embedding(query)
+
+    # Corpus du domaine (ids + matrice d'embeddings) depuis le cache mémoire
+    ids, matrix = _load_domain_corpus(session, domain, corpus_key)
+
+    if not ids:
+        print(f"⚠️  Aucun chunk trouvé pour le domaine: {domain}")
+        return []
+
+    # Score embedding (similarité cosinus) pour tous les chunks en un seul produit matriciel:
+    # lignes et requête normalisées => cosinus = produit scalaire
+    e_scores = np.zeros(len(ids), dtype=np.float32)
+    if q_emb is not None and q_emb.size == matrix.shape[1]:
+        e_scores = matrix @ normalize_vector(q_emb)
+
+    # Score BM25 (recherche lexicale), calculé une seule fois pour tous les chunks
+    b_scores = np.zeros(len(ids), dtype=np.float32)
+    bm25 = bm25_index.get(domain) if domain else None
+    if bm25:
+        try:
+            bm25_scores = bm25_get_scores(bm25, query_tokens)
+            n = min(len(ids), len(bm25_scores))
+            b_scores[:n] = bm25_scores[:n]
+        except Exception:
+            pass
+
+    # Score hybride : 70% embedding + 30% BM25
+    final_scores = 0.7 * e_scores + 0.3 * (b_scores / 10.0)
+
+    # Trier par score décroissant
+    top = top_k_indices(final_scores, top_k)
+    return [(ids[i], float(final_scores[i])) for i in top]
+
 
 def hybrid_search(
     query: str,
@@ -290,46 +698,30 @@ def hybrid_search(
         close_session = False
 
     try:
-        # Générer l'embedding de la requête
-        q_emb = get_embedding(query)
-
-        # Construire les filtres
-        filters = []
-        if domain:
-            filters.append(RagChunk.domain == domain)
-
-        # Récupérer les candidats
-        candidates = session.query(RagChunk).filter(*filters).all()
-
-        if not candidates:
-            print(f"⚠️  Aucun chunk trouvé pour le domaine: {domain}")
-            return []
-
-        # Calculer les scores
-        scores = []
-        bm25 = bm25_index.get(domain) if domain else None
+        # Requête identique récente sur un corpus inchangé: pas de ré-embedding ni de re-scoring
+        # Tokenisation unique de la requête (clé de cache + BM25)
         query_tokens = query.split()
 
-        for idx, chunk in enumerate(candidates):
-            # Score embedding (similarité cosinus)
-            vec = blob_to_vector(chunk.embedding)
-            e_score = cosine_sim(q_emb, vec)
+        corpus_key = _corpus_key(session, domain)
+        cache_key = (domain, " ".join(query_tokens), top_k, corpus_key)
+        ranked = _search_cache_get(cache_key)
+        if ranked is None:
+            ranked = _rank_chunks(session, query, query_tokens, domain, top_k, corpus_key)
+            _search_cache_put(cache_key, ranked)
 
-            # Score BM25 (recherche lexicale)
-            b_score = 0.0
-            if bm25:
-                try:
-                    bm25_scores = bm25.get_scores(query_tokens)
-                    b_score = bm25_scores[idx] if idx < len(bm25_scores) else 0.0
-                except:
-                    b_score = 0.0
-
-            # Score hybride : 70% embedding + 30% BM25
-            final_score = 0.7 * e_score + 0.3 * (b_score / 10.0)
-            scores.append((chunk, final_score))
+        if not ranked:
+            return []
 
-        # Trier par score décroissant
-        results = sorted(scores, key=lambda x: x[1], reverse=True)[:top_k]
+        # Hydrater uniquement les chunks retenus
+        top_ids = [chunk_id for chunk_id, _ in ranked]
+        chunks_by_id = {
+            c.id: c for c in session.query(RagChunk).filter(RagChunk.id.in_(top_ids)).all()
+        }
+        results = [
+            (chunks_by_id[chunk_id], score)
+            for chunk_id, score in ranked
+            if chunk_id in chunks_by_id
+        ]
 
         return results
 
@@ -369,12 +761,21 @@ def delete_document(doc_id: int, session=None) -> bool:
         if not doc:
             return False
 
+        # Domaines touchés, à collecter avant la suppression
+        domains = {c.domain for c in doc.chunks if c.domain}
+        if doc.domain:
+            domains.add(doc.domain)
+
         session.delete(doc)  # Cascade supprimera aussi les chunks
         session.commit()
         print(f"✅ Document supprimé: {doc.title}")
 
-        # Reconstruire l'index BM25
-        build_bm25_index(session)
+        # Invalider les matrices persistées puis reconstruire l'index BM25
+        # des domaines touchés uniquement
+        _drop_corpus_files(None)
+        for domain in domains:
+            _drop_corpus_files(domain)
+            build_bm25_index(session, domain=domain)
 
         return True
 
@@ -6,8 +6,9 @@ Limite stricte: 40 appels/minute (1 appel toutes les 1.5 secondes)
 import time
 import threading
 from typing import Optional, Dict, Any
-import json
+import pickle
 import os
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import hashlib
 
@@ -25,8 +26,9 @@ class CoinGeckoRateLimiter:
         self.window_duration = 60.0  # Fenêtre d'1 minute
         self.max_requests_per_window = 35  # Limite à 35/minute pour être sûr
         
-        # Cache global
-        self.cache = {}
+        # Cache global (LRU borné pour limiter la RAM)
+        self.cache = OrderedDict()
+        self.max_cache_entries = 1024
         self.cache_dir = str(CACHE_DIR)
         os.makedirs(self.cache_dir, exist_ok=True)
         
@@ -75,15 +77,14 @@ class CoinGeckoRateLimiter:
             # La métrique est disponible via self.request_count si besoin
     
     def get_cache_key(self, data_type: str, **params) -> str:
-        """Génère une clé de cache unique avec hash pour éviter les noms trop longs"""
-        param_str = "_".join([f"{k}:{v}" for k, v in sorted(params.items())])
-        
-        # Si la chaîne est trop longue, utiliser un hash
-        if len(param_str) > 100:  # Limite arbitraire
-            param_hash = hashlib.md5(param_str.encode()).hexdigest()
-            return f"{data_type}_{param_hash}"
-        else:
-            return f"{data_type}_{param_str}"
+        """Génère une clé de cache unique et courte (BLAKE2b des paramètres triés)"""
+        h = hashlib.blake2b(digest_size=10)
+        for k in sorted(params):
+            h.update(k.encode())
+            h.update(b"=")
+            h.update(repr(params[k]).encode())
+            h.update(b"\x00")
+        return f"{data_type}_{h.hexdigest()}"
     
     def get_cached_data(self, data_type: str, **params) -> Optional[Dict[str, Any]]:
         """Récupère des données du cache si elles sont valides"""
@@ -93,26 +94,37 @@ class CoinGeckoRateLimiter:
         if cache_key in self.cache:
             cached_item = self.cache[cache_key]
             if time.time() - cached_item['timestamp'] < self.cache_ttl.get(data_type, 300):
+                self.cache.move_to_end(cache_key)
                 print(f"✅ Cache hit pour {cache_key}")
                 return cached_item['data']
         
-        # Vérifier le cache persistant
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r') as f:
-                    cached_item = json.load(f)
-                
-                if time.time() - cached_item['timestamp'] < self.cache_ttl.get(data_type, 300):
-                    print(f"✅ Cache persistant hit pour {cache_key}")
-                    # Remettre en cache mémoire
-                    self.cache[cache_key] = cached_item
-                    return cached_item['data']
-            except:
-                pass
+        # Vérifier le cache persistant (pickle, binaire)
+        cached_item = self._read_cache_file(cache_key)
+        if cached_item is not None:
+            if time.time() - cached_item['timestamp'] < self.cache_ttl.get(data_type, 300):
+                print(f"✅ Cache persistant hit pour {cache_key}")
+                # Remettre en cache mémoire
+                self._remember(cache_key, cached_item)
+                return cached_item['data']
         
         return None
     
+    def _read_cache_file(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Lit une entrée du cache persistant (.pkl)"""
+        pkl_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
+        try:
+            with open(pkl_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+    
+    def _remember(self, cache_key: str, cache_item: Dict[str, Any]):
+        """Ajoute au cache mémoire en évinçant les entrées les moins récemment utilisées"""
+        self.cache[cache_key] = cache_item
+        self.cache.move_to_end(cache_key)
+        while len(self.cache) > self.max_cache_entries:
+            self.cache.popitem(last=False)
+    
     def cache_data(self, data_type: str, data: Dict[str, Any], **params):
         """Met en cache des données"""
         cache_key = self.get_cache_key(data_type, **params)
@@ -122,13 +134,13 @@ class CoinGeckoRateLimiter:
         }
         
         # Cache mémoire
-        self.cache[cache_key] = cache_item
+        self._remember(cache_key, cache_item)
         
         # Cache persistant
-        cache_file = os.path.join(self.cache_dir, f"{cache_key}.json")
+        cache_file = os.path.join(self.cache_dir, f"{cache_key}.pkl")
         try:
-            with open(cache_file, 'w') as f:
-                json.dump(cache_item, f)
+            with open(cache_file, 'wb') as f:
+                pickle.dump(cache_item, f, protocol=pickle.HIGHEST_PROTOCOL)
         except Exception as e:
             print(f"⚠️  Erreur sauvegarde cache: {e}")
     
@@ -11,6 +11,10 @@ from typing import Dict, Any, List
 from pathlib import Path
 from backend.config.paths import SESSIONS_DIR
 
+# Étapes flushées immédiatement sur disque (les autres restent dans le tampon fichier)
+FLUSH_STEP_TYPES = frozenset({"SESSION_START", "SESSION_END", "DECISION", "EXECUTION"})
+
+
 class SessionFileLogger:
     """Logger qui écrit chaque session dans un fichier texte dédié"""
     
@@ -37,8 +41,8 @@ class SessionFileLogger:
             'log_file': str(log_filepath)
         }
         
-        # Ouvrir le fichier en mode écriture
-        self.current_file = open(log_filepath, 'w', encoding='utf-8')
+        # Ouvrir le fichier en mode écriture, avec un tampon de 64 Ko
+        self.current_file = open(log_filepath, 'w', encoding='utf-8', buffering=64 * 1024)
         
         # Écrire l'en-tête de session
         self.write_log("SESSION_START", f"🚀 DÉBUT SESSION {analysis_type.upper()} - {asset_ticker}", {
@@ -58,16 +62,18 @@ class SessionFileLogger:
         timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
         
         # Format lisible pour les humains
-        log_line = f"[{timestamp}] {step_type}: {message}\n"
+        lines = [f"[{timestamp}] {step_type}: {message}\n"]
         
         # Si il y a des données, les ajouter de manière lisible
         if data:
-            for key, value in data.items():
-                # Écrire les prompts/réponses LLM en intégralité, sans troncature
-                log_line += f"  └─ {key}: {value}\n"
+            # Écrire les prompts/réponses LLM en intégralité, sans troncature
+            lines.extend(f"  └─ {key}: {value}\n" for key, value in data.items())
+        
+        self.current_file.writelines(lines)
         
-        self.current_file.write(log_line)
-        self.current_file.flush()  # Force l'écriture immédiate
+        # Écriture immédiate uniquement pour les étapes clés (robustesse en cas de crash)
+        if step_type in FLUSH_STEP_TYPES:
+            self.current_file.flush()
     
     def log_llm_exchange(self, agent_name: str, prompt: str, response: str, duration: float = None):
         """Log spécialisé pour les échanges LLM"""
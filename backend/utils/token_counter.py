@@ -0,0 +1,56 @@
+"""
+Token Counter - Compte les tokens d'un texte pour borner les historiques de conversation
+Utilise tiktoken (cl100k_base) si disponible, sinon l'heuristique ~4 caractères par token
+"""
+
+import logging
+import threading
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Heuristique de repli: ~4 caractères par token
+CHARS_PER_TOKEN = 4
+
+# Encodeur chargé une seule fois, dans un thread: get_encoding peut télécharger le
+# fichier BPE (sans timeout), ce qui bloquerait la boucle asyncio des WebSockets.
+# None tant qu'il n'est pas chargé (ou indisponible): on garde l'heuristique.
+_encoder = None
+_load_started = False
+_load_lock = threading.Lock()
+
+
+def _load_encoder():
+    global _encoder
+    try:
+        _encoder = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Hors ligne / derrière un pare-feu: le téléchargement du BPE échoue
+        logger.warning("tiktoken encoding unavailable, using %d chars/token: %s", CHARS_PER_TOKEN, e)
+
+
+def preload_encoder():
+    """Lancer (une seule fois) le chargement de l'encodeur tiktoken en arrière-plan"""
+    global _load_started
+    if tiktoken is None or _load_started:
+        return
+    with _load_lock:
+        if _load_started:
+            return
+        _load_started = True
+    threading.Thread(target=_load_encoder, name="tiktoken-load", daemon=True).start()
+
+
+def count_tokens(text: str) -> int:
+    """Nombre de tokens de text (tiktoken une fois chargé, sinon len // 4)"""
+    if not text:
+        return 0
+    encoder = _encoder
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    preload_encoder()
+    return len(text) // CHARS_PER_TOKEN
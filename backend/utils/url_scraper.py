@@ -2,15 +2,194 @@
 URL Scraper - Scrape web pages and PDFs for RAG system
 """
 
+import asyncio
+import contextlib
+import weakref
+import httpx
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import UnicodeDammit
+from lxml import etree, html as lxml_html
 import logging
-import tempfile
-import os
-from typing import Tuple, Optional
+import re
+from functools import lru_cache
+from io import BytesIO
+from typing import Tuple, Optional, Union
+from urllib.parse import urlparse
+
+from ..config.paths import SCRAPE_CACHE
+
+try:
+    # Persistent cache of scraped pages for conditional re-fetches, optional
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    # HTTP/2 for the async client (multiplexes requests to the same host), optional
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
 
 logger = logging.getLogger(__name__)
 
+# Elements dropped before extracting text (removed in bulk by libxml2)
+_STRIP_TAGS = ("script", "style", "nav", "footer", "header", "aside")
+
+_HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8', remove_comments=True)
+
+
+@lru_cache(maxsize=16)
+def _html_parser_for(encoding: str) -> lxml_html.HTMLParser:
+    """lxml parser decoding raw bytes with a server-declared encoding (LookupError if unknown)"""
+    return lxml_html.HTMLParser(encoding=encoding, remove_comments=True)
+
+# Segment boundaries of extracted text: any line break (as str.splitlines) or a
+# run of 2+ spaces, with the surrounding whitespace
+_SEGMENT_BREAK = re.compile(r'\s*(?:[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]| {2})\s*')
+
+
+def _create_session() -> requests.Session:
+    """HTTP session shared by all scrapes: keep-alive connection pool + retry"""
+    session = requests.Session()
+    retry_strategy = Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+    )
+    adapter = HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retry_strategy)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+    return session
+
+
+_SESSION = _create_session()
+
+# Scraped pages kept with their ETag/Last-Modified, revalidated with conditional requests
+SCRAPE_CACHE_SIZE_LIMIT = 500 * 1024 * 1024
+_scrape_cache = None
+
+
+def _get_scrape_cache():
+    """Open the on-disk scrape cache once (None if diskcache is unavailable)"""
+    global _scrape_cache
+    if _scrape_cache is None:
+        _scrape_cache = False
+        if diskcache is not None:
+            try:
+                _scrape_cache = diskcache.Cache(
+                    str(SCRAPE_CACHE),
+                    size_limit=SCRAPE_CACHE_SIZE_LIMIT,
+                    eviction_policy='least-recently-used',
+                )
+            except Exception as e:
+                logger.warning(f"Scrape cache unavailable: {e}")
+    # An empty Cache is falsy, so compare with the False sentinel explicitly
+    return None if _scrape_cache is False else _scrape_cache
+
+
+def _cached_scrape(url: str) -> Tuple[Optional[dict], dict]:
+    """Return the cached entry for url and the conditional request headers to send"""
+    cache = _get_scrape_cache()
+    cached = cache.get(url) if cache is not None else None
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    return cached, headers
+
+
+def _store_scrape(url: str, response_headers, result: Tuple[Optional[str], Optional[str], Optional[str]]):
+    """Cache a successful scrape when the server sent a validator to revalidate it later"""
+    cache = _get_scrape_cache()
+    title, content, error = result
+    etag = response_headers.get('etag')
+    last_modified = response_headers.get('last-modified')
+    if cache is None or error is not None or not (etag or last_modified):
+        return
+    cache.set(url, {
+        'etag': etag,
+        'last_modified': last_modified,
+        'title': title,
+        'content': content,
+    })
+
+
+# Async scraping: concurrency limits across all hosts and per host
+ASYNC_MAX_CONCURRENCY = 10
+ASYNC_MAX_PER_HOST = 4
+
+# httpx client and semaphores are bound to the event loop that created them,
+# so each running loop (main app, asyncio.run in a worker thread...) gets its own
+_async_states = weakref.WeakKeyDictionary()
+# Pending _close_with_loop tasks (the loop only keeps weak references to tasks)
+_closers = set()
+
+
+async def _close_with_loop(client: httpx.AsyncClient):
+    """
+    Keep the client open for the lifetime of its loop, then close it
+
+    asyncio.run cancels pending tasks before closing the loop, so the client's
+    connections are closed while the loop can still do it (a client left to a
+    closed loop cannot be closed and keeps its sockets until garbage collection).
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.create_future()
+    finally:
+        _async_states.pop(loop, None)
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.debug(f"Error closing async scrape client: {e}")
+
+
+def _get_async_state() -> dict:
+    """Return the async client and semaphores of the running loop, creating them if needed"""
+    loop = asyncio.get_running_loop()
+    state = _async_states.get(loop)
+    if state is None:
+        client = httpx.AsyncClient(
+            http2=_HTTP2,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=30.0,
+            follow_redirects=True,
+            headers={'User-Agent': _SESSION.headers['User-Agent']},
+        )
+        closer = loop.create_task(_close_with_loop(client))
+        _closers.add(closer)
+        closer.add_done_callback(_closers.discard)
+        state = _async_states[loop] = dict(
+            client=client,
+            semaphore=asyncio.Semaphore(ASYNC_MAX_CONCURRENCY),
+            hosts={},  # netloc -> [semaphore, requests using it]
+        )
+    return state
+
+
+@contextlib.asynccontextmanager
+async def _host_slot(state: dict, netloc: str):
+    """Hold one of the ASYNC_MAX_PER_HOST slots of a host; idle hosts are forgotten"""
+    entry = state["hosts"].get(netloc)
+    if entry is None:
+        entry = state["hosts"][netloc] = [asyncio.Semaphore(ASYNC_MAX_PER_HOST), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del state["hosts"][netloc]
+
 
 def scrape_url(url: str, timeout: int = 30) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
@@ -25,21 +204,21 @@ def scrape_url(url: str, timeout: int = 30) -> Tuple[Optional[str], Optional[str
         If successful, error_message is None
     """
     try:
-        # Fetch URL
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=timeout)
+        # Fetch URL (pooled connection, reused across calls to the same host),
+        # revalidating a cached copy when we have one
+        cached, conditional_headers = _cached_scrape(url)
+        response = _SESSION.get(url, timeout=timeout, headers=conditional_headers)
+        if response.status_code == 304 and cached:
+            logger.info(f"Not modified, using cached scrape of {url}")
+            return cached['title'], cached['content'], None
         response.raise_for_status()
 
-        # Detect content type
+        # requests stores a charset declared in Content-Type in response.encoding
         content_type = response.headers.get('content-type', '').lower()
-        is_pdf = 'pdf' in content_type or url.lower().endswith('.pdf')
-
-        if is_pdf:
-            return _scrape_pdf(url, response.content)
-        else:
-            return _scrape_html(url, response.content)
+        declared_encoding = response.encoding if 'charset=' in content_type else None
+        result = _scrape_content(url, content_type, response.content, declared_encoding)
+        _store_scrape(url, response.headers, result)
+        return result
 
     except requests.RequestException as e:
         logger.error(f"Failed to fetch URL {url}: {e}")
@@ -49,73 +228,134 @@ def scrape_url(url: str, timeout: int = 30) -> Tuple[Optional[str], Optional[str
         return None, None, f"Error scraping: {str(e)}"
 
 
-def _scrape_pdf(url: str, content: bytes) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-    """Extract text from PDF content"""
+async def scrape_url_async(url: str, timeout: int = 30) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Async variant of scrape_url, safe to asyncio.gather over many URLs
+
+    Fetches through a shared httpx client (HTTP/2 when available), with at most
+    ASYNC_MAX_CONCURRENCY requests in flight and ASYNC_MAX_PER_HOST per host.
+    Parsing runs in a worker thread so the event loop is not blocked.
+
+    Returns:
+        Tuple of (title, content, error_message), as scrape_url
+    """
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        state = _get_async_state()
+        cached, conditional_headers = await asyncio.to_thread(_cached_scrape, url)
+        async with state["semaphore"], _host_slot(state, urlparse(url).netloc):
+            response = await state["client"].get(url, timeout=timeout, headers=conditional_headers)
+        if response.status_code == 304 and cached:
+            logger.info(f"Not modified, using cached scrape of {url}")
+            return cached['title'], cached['content'], None
+        response.raise_for_status()
 
-        try:
-            # Try PyPDF2 (already in requirements)
-            from PyPDF2 import PdfReader
+        # httpx exposes only a charset declared in Content-Type (None otherwise)
+        content_type = response.headers.get('content-type', '').lower()
+        result = await asyncio.to_thread(
+            _scrape_content, url, content_type, response.content, response.charset_encoding
+        )
+        await asyncio.to_thread(_store_scrape, url, response.headers, result)
+        return result
+
+    except httpx.HTTPError as e:
+        logger.error(f"Failed to fetch URL {url}: {e}")
+        return None, None, f"Failed to fetch URL: {str(e)}"
+    except Exception as e:
+        logger.error(f"Error scraping URL {url}: {e}", exc_info=True)
+        return None, None, f"Error scraping: {str(e)}"
 
-            with open(tmp_path, 'rb') as f:
-                reader = PdfReader(f)
-                text_content = ""
-                for page in reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content += page_text + "\n"
 
-            # Extract title from URL
-            title = url.split('/')[-1].replace('.pdf', '')
+def _scrape_content(
+    url: str,
+    content_type: str,
+    content: bytes,
+    declared_encoding: Optional[str]
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Dispatch fetched content to the PDF or HTML extractor"""
+    is_pdf = 'pdf' in content_type or url.lower().endswith('.pdf')
 
-            logger.info(f"Extracted {len(text_content)} chars from PDF ({len(reader.pages)} pages)")
+    if is_pdf:
+        return _scrape_pdf(url, content)
+    else:
+        # With a declared charset, lxml decodes the raw bytes and detection is skipped
+        return _scrape_html(url, content, declared_encoding)
 
-            if not text_content.strip():
-                return None, None, "PDF appears to be empty or image-based"
 
-            return title, text_content, None
+def _scrape_pdf(url: str, content: bytes) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Extract text from PDF content"""
+    try:
+        # Try PyPDF2 (already in requirements) - reads straight from memory
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(BytesIO(content), strict=False)
+        # Pages share the reader's stream, so they are extracted sequentially;
+        # collect them in a list and join once instead of growing a string
+        page_texts = []
+        for page in reader.pages:
+            page_text = page.extract_text()
+            if page_text:
+                page_texts.append(page_text)
+        text_content = "\n".join(page_texts)
 
-        finally:
-            os.remove(tmp_path)
+        # Extract title from URL
+        title = url.split('/')[-1].replace('.pdf', '')
+
+        logger.info(f"Extracted {len(text_content)} chars from PDF ({len(reader.pages)} pages)")
+
+        if not text_content.strip():
+            return None, None, "PDF appears to be empty or image-based"
+
+        return title, text_content, None
 
     except Exception as e:
         logger.error(f"Failed to extract PDF: {e}", exc_info=True)
         return None, None, f"Failed to extract PDF: {str(e)}"
 
 
-def _scrape_html(url: str, content: bytes) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-    """Extract text from HTML content"""
+def _parse_html(content: Union[str, bytes], encoding: Optional[str] = None):
+    """Parse HTML into an lxml tree; undeclared byte encodings are detected first"""
+    if isinstance(content, bytes):
+        if encoding:
+            try:
+                return lxml_html.document_fromstring(content, parser=_html_parser_for(encoding.lower()))
+            except LookupError:
+                pass  # Unknown charset name: fall back to detection
+        content = UnicodeDammit(content, is_html=True).unicode_markup or content.decode('utf-8', 'replace')
+    # lxml rejects str input carrying an encoding declaration, so hand it UTF-8 bytes
+    return lxml_html.document_fromstring(content.encode('utf-8'), parser=_HTML_PARSER)
+
+
+def _scrape_html(
+    url: str,
+    content: Union[str, bytes],
+    encoding: Optional[str] = None
+) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Extract text from HTML content (encoding: charset declared by the server, if any)"""
     try:
-        soup = BeautifulSoup(content, 'html.parser')
+        tree = _parse_html(content, encoding)
 
         # Remove scripts, styles, nav, footer
-        for tag in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            tag.decompose()
+        etree.strip_elements(tree, *_STRIP_TAGS, with_tail=False)
 
         # Extract title
-        title_tag = soup.find('title')
-        title = title_tag.get_text().strip() if title_tag else url.split('//')[-1].split('/')[0]
+        title_tag = tree.find('.//title')
+        title = title_tag.text_content().strip() if title_tag is not None else url.split('//')[-1].split('/')[0]
 
         # Try to find main content (article, main, or full body)
-        main_content = soup.find('article') or soup.find('main') or soup.find('body')
+        main_content = tree.find('.//article')
+        if main_content is None:
+            main_content = tree.find('.//main')
+        if main_content is None:
+            main_content = tree.find('.//body')
 
-        if main_content:
-            text_content = main_content.get_text()
+        if main_content is not None:
+            text_content = main_content.text_content()
         else:
-            text_content = soup.get_text()
-
-        # Clean text
-        lines = (line.strip() for line in text_content.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text_content = '\n'.join(chunk for chunk in chunks if chunk)
+            text_content = tree.text_content()
 
-        # Remove excessive newlines
-        import re
-        text_content = re.sub(r'\n\s*\n\s*\n+', '\n\n', text_content)
-        text_content = text_content.strip()
+        # Clean text: one stripped, non-empty segment per line
+        segments = (segment.strip() for segment in _SEGMENT_BREAK.split(text_content))
+        text_content = '\n'.join(segment for segment in segments if segment)
 
         logger.info(f"Extracted {len(text_content)} chars from HTML")
 
@@ -124,6 +364,9 @@ def _scrape_html(url: str, content: bytes) -> Tuple[Optional[str], Optional[str]
 
         return title, text_content, None
 
+    except etree.ParserError:
+        # lxml refuses documents with no markup at all
+        return None, None, "Extracted text too short (0 chars)"
     except Exception as e:
         logger.error(f"Failed to parse HTML: {e}", exc_info=True)
         return None, None, f"Failed to parse HTML: {str(e)}"
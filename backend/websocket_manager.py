@@ -1,8 +1,11 @@
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Deque, Dict, List
+from collections import deque
 import json
 import logging
 
+from .utils.token_counter import count_tokens
+
 # Logger sécurisé pour éviter les erreurs I/O operation on closed file
 def safe_log(message, level="info"):
     """Log sécurisé qui évite les erreurs I/O operation on closed file"""
@@ -21,33 +24,41 @@ class WebSocketManager:
     def __init__(self):
         # Store active connections with client IDs
         self.active_connections: Dict[str, WebSocket] = {}
-        # Store conversation history for each client
-        self.conversation_history: Dict[str, List[Dict]] = {}
+        # Reverse map id(websocket) -> client_id for O(1) disconnect
+        self.ws_to_client: Dict[int, str] = {}
+        # Store conversation history for each client (system messages kept apart,
+        # never trimmed) with a running token total
+        self.conversation_history: Dict[str, Deque[Dict]] = {}
+        self.system_messages: Dict[str, List[Dict]] = {}
+        self.history_tokens: Dict[str, int] = {}
         # Store streaming state for each client
         self.streaming_state: Dict[str, bool] = {}
     
     async def connect(self, websocket: WebSocket, client_id: str):
         """Accept a new WebSocket connection and store it"""
         await websocket.accept()
+        self._remove_client(client_id)
         self.active_connections[client_id] = websocket
+        self.ws_to_client[id(websocket)] = client_id
         # Initialize conversation history if not exists
-        if client_id not in self.conversation_history:
-            self.conversation_history[client_id] = []
+        self._history(client_id)
         safe_log(f"Client {client_id} connected. Total connections: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
-        # Find and remove the connection
-        client_id = None
-        for cid, ws in self.active_connections.items():
-            if ws == websocket:
-                client_id = cid
-                break
-        
-        if client_id:
-            del self.active_connections[client_id]
+        # Find and remove the connection (O(1) via the reverse map)
+        client_id = self.ws_to_client.get(id(websocket))
+
+        if client_id and self.active_connections.get(client_id) is websocket:
+            self._remove_client(client_id)
             safe_log(f"Client {client_id} disconnected. Total connections: {len(self.active_connections)}")
     
+    def _remove_client(self, client_id: str):
+        """Drop a client's connection from both connection maps"""
+        websocket = self.active_connections.pop(client_id, None)
+        if websocket is not None:
+            self.ws_to_client.pop(id(websocket), None)
+
     async def send_personal_message(self, message: str, client_id: str):
         """Send a message to a specific client"""
         if client_id in self.active_connections:
@@ -71,26 +82,41 @@ class WebSocketManager:
             
             # Remove disconnected clients
             for client_id in disconnected_clients:
-                del self.active_connections[client_id]
+                self._remove_client(client_id)
     
+    def _history(self, client_id: str) -> Deque[Dict]:
+        """Return the (non-system) message deque of a client, creating it if needed"""
+        history = self.conversation_history.get(client_id)
+        if history is None:
+            history = self.conversation_history[client_id] = deque()
+            self.history_tokens[client_id] = 0
+        return history
+
     def add_to_conversation_history(self, client_id: str, role: str, content: str):
         """Add a message to the conversation history"""
-        if client_id not in self.conversation_history:
-            self.conversation_history[client_id] = []
-        
-        self.conversation_history[client_id].append({
+        message = {
             "role": role,
-            "content": content
-        })
-    
+            "content": content,
+            # Compté une fois à l'ajout, jamais recalculé lors du trim
+            "token_count": count_tokens(content)
+        }
+        if role == "system":
+            self.system_messages.setdefault(client_id, []).append(message)
+            return
+
+        self._history(client_id).append(message)
+        self.history_tokens[client_id] += message["token_count"]
+
     def get_conversation_history(self, client_id: str) -> List[Dict]:
         """Get the conversation history for a client"""
-        return self.conversation_history.get(client_id, [])
+        return self.system_messages.get(client_id, []) + list(self.conversation_history.get(client_id, ()))
     
     def clear_conversation_history(self, client_id: str):
         """Clear the conversation history for a client"""
         if client_id in self.conversation_history:
-            self.conversation_history[client_id] = []
+            self.conversation_history[client_id] = deque()
+            self.history_tokens[client_id] = 0
+        self.system_messages.pop(client_id, None)
 
     def set_streaming_state(self, client_id: str, is_streaming: bool):
         """Set the streaming state for a client"""
@@ -106,37 +132,18 @@ class WebSocketManager:
 
     def trim_conversation_history(self, client_id: str, max_tokens: int = 4000):
         """Trim conversation history to fit within token limit"""
-        if client_id not in self.conversation_history:
-            return
-
-        history = self.conversation_history[client_id]
+        history = self.conversation_history.get(client_id)
         if not history:
             return
 
-        # Rough estimation: 4 chars per token
-        chars_per_token = 4
-        max_chars = max_tokens * chars_per_token
-
-        # Keep system message if exists
-        system_messages = [msg for msg in history if msg.get("role") == "system"]
-        conversation_messages = [msg for msg in history if msg.get("role") != "system"]
-
-        # Calculate current size
-        total_chars = sum(len(msg.get("content", "")) for msg in conversation_messages)
-
-        # Remove oldest messages until we're under the limit
-        while total_chars > max_chars and len(conversation_messages) > 2:
-            # Remove the oldest user-assistant pair
-            if len(conversation_messages) >= 2:
-                removed_user = conversation_messages.pop(0)
-                removed_assistant = conversation_messages.pop(0)
-                total_chars -= len(removed_user.get("content", ""))
-                total_chars -= len(removed_assistant.get("content", ""))
-            else:
-                break
-
-        # Reconstruct history with system messages first
-        self.conversation_history[client_id] = system_messages + conversation_messages
+        # System messages live apart and are never trimmed; the running total
+        # (token counts stored per message) avoids rescanning the history.
+        # Remove the oldest user-assistant pairs until we're under the limit
+        total_tokens = self.history_tokens.get(client_id, 0)
+        while total_tokens > max_tokens and len(history) > 2:
+            total_tokens -= history.popleft()["token_count"]
+            total_tokens -= history.popleft()["token_count"]
+        self.history_tokens[client_id] = total_tokens
 
 # Global singleton instance
 _ws_manager_instance = None
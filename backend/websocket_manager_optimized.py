@@ -6,15 +6,51 @@ WebSocket Manager Optimisé pour HIVE AI
 """
 
 from fastapi import WebSocket
-from typing import Dict, List, Optional
+from typing import Deque, Dict, Iterable, List, Optional, Set
 import json
 import logging
 import asyncio
-from datetime import datetime, timedelta
+import time
+import zlib
+from datetime import datetime
 from collections import deque
 
+from .utils.token_counter import count_tokens
+
+try:
+    # Sérialisation JSON en Rust, renvoie directement des bytes UTF-8 (optionnel)
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Au-delà de cette taille (octets), un broadcast est compressé une seule fois (zlib)
+# avant d'être envoyé à tous les clients, qui le décompressent côté navigateur
+COMPRESS_THRESHOLD = 8192
+
+# Taille max de la file d'envoi d'un client; au-delà, les plus anciens messages sont abandonnés
+CLIENT_QUEUE_SIZE = 100
+
+# Durée (s) pendant laquelle l'état de conscience initial est réutilisé entre connexions
+CONSCIOUSNESS_CACHE_TTL = 0.5
+
+
+
+def json_dumps_bytes(obj) -> bytes:
+    """Sérialise en JSON compact (bytes UTF-8), via orjson si disponible"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def json_loads(data):
+    """Parse du JSON (str ou bytes), via orjson si disponible"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class OptimizedWebSocketManager:
     """
     WebSocket Manager avec optimisations pour réduire la latence
@@ -22,39 +58,60 @@ class OptimizedWebSocketManager:
 
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
-        self.conversation_history: Dict[str, List[Dict]] = {}
+        # Reverse map id(websocket) -> client_id for O(1) disconnect
+        self.ws_to_client: Dict[int, str] = {}
+        # Une file d'envoi + une tâche d'envoi longue durée par client
+        self.send_queues: Dict[str, asyncio.Queue] = {}
+        self.sender_tasks: Dict[str, asyncio.Task] = {}
+        self.conversation_history: Dict[str, Deque[Dict]] = {}
+        # System messages kept apart (never trimmed) and running token total per client
+        self.system_messages: Dict[str, List[Dict]] = {}
+        self.history_tokens: Dict[str, int] = {}
         # Store streaming state for each client
         self.streaming_state: Dict[str, bool] = {}
+        # Clients currently streaming, usable as a broadcast audience
+        self.streaming_clients: Set[str] = set()
 
         # Throttling: buffer pour éviter trop de broadcasts
         self.broadcast_buffer: deque = deque(maxlen=100)
-        self.last_broadcast: Dict[str, datetime] = {}
-        self.min_broadcast_interval = timedelta(milliseconds=100)  # Max 10 msg/sec
+        # Horloge monotone (secondes float): pas d'objets datetime/timedelta par message
+        self.last_broadcast: Dict[str, float] = {}
+        self.min_broadcast_interval = 0.1  # Max 10 msg/sec
+
+        # État de conscience initial déjà sérialisé, partagé par les connexions rapprochées
+        self._consciousness_message: Optional[str] = None
+        self._consciousness_ts = float("-inf")
+        self._consciousness_lock = asyncio.Lock()
 
         # Stats
         self.stats = {
             "total_messages": 0,
             "throttled_messages": 0,
-            "failed_sends": 0
+            "failed_sends": 0,
+            "dropped_messages": 0
         }
 
     async def connect(self, websocket: WebSocket, client_id: str):
         """Accept a new WebSocket connection"""
         await websocket.accept()
+        self._remove_client(client_id)
         self.active_connections[client_id] = websocket
+        self.ws_to_client[id(websocket)] = client_id
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.send_queues[client_id] = queue
+        self.sender_tasks[client_id] = asyncio.create_task(self._client_sender(client_id, websocket, queue))
 
-        if client_id not in self.conversation_history:
-            self.conversation_history[client_id] = []
+        self._history(client_id)
 
         logger.info(f"✅ Client {client_id} connected. Total: {len(self.active_connections)}")
 
         # Envoyer un message de bienvenue
-        await self.send_personal_message(json.dumps({
+        await self.send_personal_message(json_dumps_bytes({
             "type": "connection_status",
             "status": "connected",
             "client_id": client_id,
             "timestamp": datetime.now().isoformat()
-        }), client_id)
+        }).decode('utf-8'), client_id)
 
         # Broadcaster immédiatement l'état de conscience actuel au nouveau client
         await self._send_initial_consciousness(client_id)
@@ -62,58 +119,94 @@ class OptimizedWebSocketManager:
     async def _send_initial_consciousness(self, client_id: str):
         """Send the current consciousness state to a newly connected client"""
         try:
-            from .agent_consciousness import get_consciousness_broadcaster
-            from .agent_runtime import get_agent_runtime
-
-            # Obtenir le runtime de l'agent
-            runtime = get_agent_runtime()
-            if runtime and runtime.store:
-                # Charger la mémoire actuelle depuis le store
-                memory = await runtime.store.load()
-
-                working = memory.working
-                conscious = memory.conscious
-
-                # Build global consciousness summary
-                global_summary = working.get("global_summary", "")
-                if not global_summary and conscious:
-                    global_summary = conscious.summary
-
-                # Get recent activities
-                last_results = working.get("last_results", [])
-                last_tools = working.get("last_tools", {})
-
-                # Build consciousness payload using the broadcaster helper
-                broadcaster = get_consciousness_broadcaster()
-                consciousness_data = {
-                    "global_consciousness": global_summary or "Monitoring crypto markets and user activities...",
-                    "working_memory": broadcaster._build_working_summary(working, last_results, last_tools),
-                    "timestamp": datetime.now().timestamp(),
-                    "cycle": working.get("stats", {}).get("total_cycles", 0),
-                }
-
+            # Une seule lecture du store par fenêtre TTL, même lors d'une rafale de connexions
+            async with self._consciousness_lock:
+                now = time.monotonic()
+                if now - self._consciousness_ts >= CONSCIOUSNESS_CACHE_TTL:
+                    self._consciousness_message = await self._build_initial_consciousness()
+                    self._consciousness_ts = now
+                message = self._consciousness_message
+
+            if message:
                 # Envoyer au client spécifique
-                await self.send_personal_message(json.dumps({
-                    "type": "agent_consciousness",
-                    "payload": consciousness_data
-                }), client_id)
-
-                logger.info(f"📊 Initial consciousness sent to {client_id}: {global_summary[:60] if global_summary else 'No summary'}")
+                await self.send_personal_message(message, client_id)
+                logger.info(f"📊 Initial consciousness sent to {client_id}")
         except Exception as e:
             logger.warning(f"⚠️ Could not send initial consciousness to {client_id}: {e}", exc_info=True)
 
+    async def _build_initial_consciousness(self) -> Optional[str]:
+        """Load the agent memory and serialize the consciousness message (None if no runtime)"""
+        from .agent_consciousness import get_consciousness_broadcaster
+        from .agent_runtime import get_agent_runtime
+
+        # Obtenir le runtime de l'agent
+        runtime = get_agent_runtime()
+        if not (runtime and runtime.store):
+            return None
+
+        # Charger la mémoire actuelle depuis le store
+        memory = await runtime.store.load()
+
+        working = memory.working
+        conscious = memory.conscious
+
+        # Build global consciousness summary
+        global_summary = working.get("global_summary", "")
+        if not global_summary and conscious:
+            global_summary = conscious.summary
+
+        # Get recent activities
+        last_results = working.get("last_results", [])
+        last_tools = working.get("last_tools", {})
+
+        # Build consciousness payload using the broadcaster helper
+        broadcaster = get_consciousness_broadcaster()
+        consciousness_data = {
+            "global_consciousness": global_summary or "Monitoring crypto markets and user activities...",
+            "working_memory": broadcaster._build_working_summary(working, last_results, last_tools),
+            "timestamp": datetime.now().timestamp(),
+            "cycle": working.get("stats", {}).get("total_cycles", 0),
+        }
+
+        logger.debug(f"📊 Consciousness snapshot rebuilt: {global_summary[:60] if global_summary else 'No summary'}")
+        return json_dumps_bytes({
+            "type": "agent_consciousness",
+            "payload": consciousness_data
+        }).decode('utf-8')
+
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
-        client_id = None
-        for cid, ws in list(self.active_connections.items()):
-            if ws == websocket:
-                client_id = cid
-                break
-
-        if client_id:
-            del self.active_connections[client_id]
+        client_id = self.ws_to_client.get(id(websocket))
+
+        if client_id and self.active_connections.get(client_id) is websocket:
+            self._remove_client(client_id)
             logger.info(f"❌ Client {client_id} disconnected. Total: {len(self.active_connections)}")
 
+    def _remove_client(self, client_id: str):
+        """Drop a client's connection from the connection maps and stop its sender task"""
+        websocket = self.active_connections.pop(client_id, None)
+        if websocket is not None:
+            self.ws_to_client.pop(id(websocket), None)
+        self.send_queues.pop(client_id, None)
+        self.streaming_clients.discard(client_id)
+        task = self.sender_tasks.pop(client_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    async def _client_sender(self, client_id: str, websocket: WebSocket, queue: asyncio.Queue):
+        """Long-lived task draining a client's send queue onto its websocket"""
+        while True:
+            payload = await queue.get()
+            try:
+                await websocket.send_bytes(payload)
+                self.stats["total_messages"] += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Connexion perdue pour {client_id}: {e}")
+                self.stats["failed_sends"] += 1
+                if self.active_connections.get(client_id) is websocket:
+                    self._remove_client(client_id)
+                return
+
     async def send_personal_message(self, message: str, client_id: str):
         """Send a message to a specific client"""
         if client_id in self.active_connections:
@@ -125,125 +218,118 @@ class OptimizedWebSocketManager:
                 logger.error(f"❌ Erreur envoi message à {client_id}: {e}")
                 self.stats["failed_sends"] += 1
 
-    async def broadcast(self, message, skip_throttle: bool = False):
+    async def broadcast(self, message, skip_throttle: bool = False, audience: Optional[Set[str]] = None):
         """
-        Send a message to all connected clients
+        Send a message to all connected clients (or only to the client ids in audience,
+        e.g. self.streaming_clients)
         Avec throttling pour éviter surcharge
         """
         if not self.active_connections:
             return
-
-        # Convertir dict to JSON string si nécessaire
-        if isinstance(message, dict):
-            message = json.dumps(message)
+        if audience is not None:
+            queues: Iterable[asyncio.Queue] = [
+                self.send_queues[cid] for cid in audience & self.send_queues.keys()
+            ]
+            if not queues:
+                return
+        else:
+            queues = self.send_queues.values()
+
+        # Lire le type avant de sérialiser (évite de re-parser le JSON produit)
+        message_type = message.get("type", "unknown") if isinstance(message, dict) else None
 
         # Throttling (sauf si skip_throttle = True pour messages urgents)
         if not skip_throttle:
-            message_type = json.loads(message).get("type", "unknown")
-            now = datetime.now()
+            if message_type is None:
+                message_type = json_loads(message).get("type", "unknown")
+            now = time.monotonic()
 
             # Vérifier si on peut envoyer (throttle par type de message)
-            if message_type in self.last_broadcast:
-                elapsed = now - self.last_broadcast[message_type]
-                if elapsed < self.min_broadcast_interval:
-                    self.stats["throttled_messages"] += 1
-                    logger.debug(f"⏸️ Message {message_type} throttled")
-                    return
+            last = self.last_broadcast.get(message_type)
+            if last is not None and now - last < self.min_broadcast_interval:
+                self.stats["throttled_messages"] += 1
+                logger.debug(f"⏸️ Message {message_type} throttled")
+                return
 
             self.last_broadcast[message_type] = now
 
-        # Broadcast async à tous les clients
-        disconnected_clients = []
-        tasks = []
-
-        for client_id, websocket in self.active_connections.items():
-            async def send_to_client(cid, ws, msg):
-                try:
-                    await ws.send_text(msg)
-                    self.stats["total_messages"] += 1
-                except Exception as e:
-                    logger.warning(f"⚠️ Connexion perdue pour {cid}: {e}")
-                    disconnected_clients.append(cid)
-                    self.stats["failed_sends"] += 1
-
-            tasks.append(send_to_client(client_id, websocket, message))
-
-        # Exécuter tous les envois en parallèle
-        await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Nettoyer les clients déconnectés
-        for client_id in disconnected_clients:
-            if client_id in self.active_connections:
-                del self.active_connections[client_id]
-
-    async def broadcast_chunked(self, large_data: dict, chunk_size: int = 5000):
+        # Sérialiser une seule fois (bytes UTF-8 compacts): la même trame binaire part
+        # vers tous les clients; un message throttlé n'est jamais sérialisé
+        if isinstance(message, dict):
+            payload = json_dumps_bytes(message)
+        elif isinstance(message, str):
+            payload = message.encode('utf-8')
+        else:
+            payload = message
+        if len(payload) > COMPRESS_THRESHOLD:
+            payload = zlib.compress(payload, 1)
+
+        # Déposer dans la file de chaque client (pas de tâche créée par envoi);
+        # un client lent perd ses plus anciens messages plutôt que de bloquer les autres
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+                self.stats["dropped_messages"] += 1
+            queue.put_nowait(payload)
+
+    async def broadcast_large(self, large_data: dict):
         """
-        Envoie de gros messages en chunks pour éviter surcharge
-        Utile pour debug logs, historique, etc.
+        Envoie un gros message à tous les clients sans throttling
+        Utile pour debug logs, historique, etc. (compressé une seule fois par broadcast)
         """
-        data_str = json.dumps(large_data)
-
-        if len(data_str) < chunk_size:
-            await self.broadcast(data_str)
-            return
-
-        # Découper en chunks
-        chunks = [data_str[i:i+chunk_size] for i in range(0, len(data_str), chunk_size)]
-        total_chunks = len(chunks)
+        await self.broadcast(large_data, skip_throttle=True)
 
-        for i, chunk in enumerate(chunks):
-            chunk_message = {
-                "type": "chunked_data",
-                "chunk_index": i,
-                "total_chunks": total_chunks,
-                "data": chunk
-            }
-            await self.broadcast(chunk_message)
-            await asyncio.sleep(0.05)  # Petit délai entre chunks
+    def _history(self, client_id: str) -> Deque[Dict]:
+        """Return the (non-system) message deque of a client, creating it if needed"""
+        history = self.conversation_history.get(client_id)
+        if history is None:
+            history = self.conversation_history[client_id] = deque()
+            self.history_tokens[client_id] = 0
+        return history
 
     def add_to_conversation_history(self, client_id: str, role: str, content: str):
         """Add a message to the conversation history"""
-        if client_id not in self.conversation_history:
-            self.conversation_history[client_id] = []
-
-        # Limiter l'historique à 50 messages pour éviter surcharge mémoire
-        if len(self.conversation_history[client_id]) >= 50:
-            self.conversation_history[client_id].pop(0)
-
-        self.conversation_history[client_id].append({
+        message = {
             "role": role,
             "content": content,
+            # Compté une fois à l'ajout, jamais recalculé lors du trim
+            "token_count": count_tokens(content),
             "timestamp": datetime.now().isoformat()
-        })
+        }
+        if role == "system":
+            self.system_messages.setdefault(client_id, []).append(message)
+            return
+
+        history = self._history(client_id)
+
+        # Limiter l'historique à 50 messages pour éviter surcharge mémoire
+        if len(history) >= 50:
+            self.history_tokens[client_id] -= history.popleft()["token_count"]
+
+        history.append(message)
+        self.history_tokens[client_id] += message["token_count"]
 
     def get_conversation_history(self, client_id: str) -> List[Dict]:
         """Get the conversation history for a client"""
-        return self.conversation_history.get(client_id, [])
+        return self.system_messages.get(client_id, []) + list(self.conversation_history.get(client_id, ()))
 
     def clear_conversation_history(self, client_id: str):
         """Clear the conversation history for a client"""
         if client_id in self.conversation_history:
-            self.conversation_history[client_id] = []
+            self.conversation_history[client_id] = deque()
+            self.history_tokens[client_id] = 0
+        self.system_messages.pop(client_id, None)
 
     def update_system_message(self, client_id: str, content: str):
         """Update or add system message in conversation history"""
-        if client_id not in self.conversation_history:
-            self.conversation_history[client_id] = []
-
-        history = self.conversation_history[client_id]
-
-        # Find and update existing system message, or add new one
-        system_msg_found = False
-        for msg in history:
-            if msg.get("role") == "system":
-                msg["content"] = content
-                msg["timestamp"] = datetime.now().isoformat()
-                system_msg_found = True
-                break
-
-        if not system_msg_found:
-            # Add at the beginning
-            history.insert(0, {
+        system_messages = self.system_messages.setdefault(client_id, [])
+
+        # Update existing system message, or add new one
+        if system_messages:
+            system_messages[0]["content"] = content
+            system_messages[0]["timestamp"] = datetime.now().isoformat()
+        else:
+            system_messages.append({
                 "role": "system",
                 "content": content,
                 "timestamp": datetime.now().isoformat()
@@ -260,6 +346,10 @@ class OptimizedWebSocketManager:
     def set_streaming_state(self, client_id: str, is_streaming: bool):
         """Set the streaming state for a client"""
         self.streaming_state[client_id] = is_streaming
+        if is_streaming:
+            self.streaming_clients.add(client_id)
+        else:
+            self.streaming_clients.discard(client_id)
 
     def get_streaming_state(self, client_id: str) -> bool:
         """Get the streaming state for a client"""
@@ -268,40 +358,22 @@ class OptimizedWebSocketManager:
     def stop_stream(self, client_id: str):
         """Stop streaming for a client"""
         self.streaming_state[client_id] = False
+        self.streaming_clients.discard(client_id)
 
     def trim_conversation_history(self, client_id: str, max_tokens: int = 4000):
         """Trim conversation history to fit within token limit"""
-        if client_id not in self.conversation_history:
-            return
-
-        history = self.conversation_history[client_id]
+        history = self.conversation_history.get(client_id)
         if not history:
             return
 
-        # Rough estimation: 4 chars per token
-        chars_per_token = 4
-        max_chars = max_tokens * chars_per_token
-
-        # Keep system message if exists
-        system_messages = [msg for msg in history if msg.get("role") == "system"]
-        conversation_messages = [msg for msg in history if msg.get("role") != "system"]
-
-        # Calculate current size
-        total_chars = sum(len(msg.get("content", "")) for msg in conversation_messages)
-
-        # Remove oldest messages until we're under the limit
-        while total_chars > max_chars and len(conversation_messages) > 2:
-            # Remove the oldest user-assistant pair
-            if len(conversation_messages) >= 2:
-                removed_user = conversation_messages.pop(0)
-                removed_assistant = conversation_messages.pop(0)
-                total_chars -= len(removed_user.get("content", ""))
-                total_chars -= len(removed_assistant.get("content", ""))
-            else:
-                break
-
-        # Reconstruct history with system messages first
-        self.conversation_history[client_id] = system_messages + conversation_messages
+        # System messages live apart and are never trimmed; the running total
+        # (token counts stored per message) avoids rescanning the history.
+        # Remove the oldest user-assistant pairs until we're under the limit
+        total_tokens = self.history_tokens.get(client_id, 0)
+        while total_tokens > max_tokens and len(history) > 2:
+            total_tokens -= history.popleft()["token_count"]
+            total_tokens -= history.popleft()["token_count"]
+        self.history_tokens[client_id] = total_tokens
 
 
 # Global singleton instance
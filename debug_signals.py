@@ -3,6 +3,7 @@
 
 import asyncio
 import sys
+from itertools import islice
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -25,7 +26,7 @@ async def main():
 
             if signals_in_queue > 0:
                 print(f"\n   Premiers signaux dans la queue:")
-                for sig in bot.signals_queue[:3]:
+                for sig in islice(bot.signals_queue, 3):
                     print(f"   - {sig.get('symbol', 'N/A')} {sig.get('event', 'N/A')} {sig.get('side', 'N/A')}")
             else:
                 print("   ⚠️ AUCUN signal dans la queue !")
@@ -132,10 +133,11 @@ async def main():
             print(f"\n✅ Signaux injectés dans bot.signals_queue")
             print(f"   Queue size: {len(bot.signals_queue)}")
 
-            # Re-test gather_signals
+            # Re-test gather_signals et comparer au premier résultat (section 2)
             signal_state_after = await builder.gather_signals()
             print(f"\n   Après injection:")
-            print(f"   Signals récupérés: {signal_state_after.signal_count}")
+            print(f"   Signals récupérés: {signal_state_after.signal_count} "
+                  f"({signal_state_after.signal_count - signal_state.signal_count:+d} vs avant injection)")
 
     except Exception as e:
         print(f"❌ Erreur: {e}")
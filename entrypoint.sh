@@ -30,6 +30,6 @@ fi
 # 2. API + WEBSOCKET
 echo "🌐 Starting FastAPI application..."
 . /app/venv/bin/activate
-uvicorn backend.main:app --host 0.0.0.0 --port 8000
+uvicorn backend.main:app --host 0.0.0.0 --port 8000 --ws-per-message-deflate false
 
 wait
\ No newline at end of file
@@ -3,12 +3,39 @@
 Exemple d'agent de trading avec LlamaCpp + MCP Tools
 Démontre l'utilisation complète de l'intégration
 """
+import os
+import re
 import sys
+import asyncio
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 import dspy
 from backend.dspy_llm_adapter import get_dspy_lm
+from backend.config.paths import DSPY_PROGRAMS
+
+# Cache des réponses LM (mémoire LRU + disque): une requête identique (prompt,
+# modèle, température...) est rejouée sans appel au modèle, y compris entre exécutions
+dspy.configure_cache(
+    enable_disk_cache=True,
+    enable_memory_cache=True,
+    disk_cache_dir=os.getenv("DSPY_CACHEDIR", str(Path.home() / ".dspy_cache")),
+    memory_max_entries=1024,
+)
+
+
+def restore_state(module, name):
+    """
+    Recharge l'état d'un programme optimisé (démos, instructions), s'il existe
+
+    Seul un optimiseur écrit ce fichier (ex: optimizer.compile(...).save(path)):
+    un programme non optimisé garde les Signatures du code.
+    """
+    path = DSPY_PROGRAMS / f"{name}.compiled.json"
+    if path.exists():
+        module.load(str(path))
+    return module
+
 
 # Configuration DSPy avec LlamaCpp (par défaut)
 lm = get_dspy_lm()
@@ -36,11 +63,14 @@ class WorldContextAgent(dspy.Module):
     def forward(self, news):
         return self.analyze(news_summary=news)
 
+    async def aforward(self, news):
+        return await self.analyze.acall(news_summary=news)
+
 # Test
 print("\n1. World Context Agent:")
 print("-" * 40)
 
-world_agent = WorldContextAgent()
+world_agent = restore_state(WorldContextAgent(), "world_context")
 result = world_agent(news="""
 - Fed maintient les taux à 5.5%
 - Bitcoin atteint un nouveau ATH
@@ -72,11 +102,17 @@ class OpportunityAgent(dspy.Module):
             available_assets=assets
         )
 
+    async def aforward(self, context, assets):
+        return await self.find_opportunities.acall(
+            market_context=context,
+            available_assets=assets
+        )
+
 # Test
 print("\n2. Opportunity Selection Agent:")
 print("-" * 40)
 
-opportunity_agent = OpportunityAgent()
+opportunity_agent = restore_state(OpportunityAgent(), "opportunities")
 result = opportunity_agent(
     context=f"Sentiment: {result.market_sentiment}",
     assets="Bitcoin, Ethereum, Solana, Cardano, Polkadot"
@@ -109,11 +145,18 @@ class TradeDecisionAgent(dspy.Module):
             risk_level=risk
         )
 
+    async def aforward(self, asset, analysis, risk):
+        return await self.decide.acall(
+            asset=asset,
+            market_analysis=analysis,
+            risk_level=risk
+        )
+
 # Test
 print("\n3. Trade Decision Agent:")
 print("-" * 40)
 
-trade_agent = TradeDecisionAgent()
+trade_agent = restore_state(TradeDecisionAgent(), "trade_decision")
 result = trade_agent(
     asset="Bitcoin",
     analysis="ATH atteint, volume élevé, sentiment bullish",
@@ -132,14 +175,25 @@ print(f"Raison: {result.reason}")
 print("\n4. Pipeline complet de trading:")
 print("-" * 40)
 
+# Séparateur d'actifs: virgule et espaces autour, découpés en un seul passage
+_ASSET_SEPARATOR = re.compile(r"\s*,\s*")
+
+
+def split_assets(text):
+    """Liste des actifs d'une sortie "A, B, C" (sans entrées vides)"""
+    return [asset for asset in _ASSET_SEPARATOR.split(text.strip()) if asset]
+
+
 class TradingPipeline(dspy.Module):
     """Pipeline complet d'analyse et de décision"""
 
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 8):
         super().__init__()
         self.world_context = WorldContextAgent()
         self.opportunities = OpportunityAgent()
         self.trade_decision = TradeDecisionAgent()
+        # Appels LLM simultanés max (limites du serveur / du provider)
+        self.max_concurrency = max_concurrency
 
     def forward(self, news, assets, risk_level):
         # 1. Analyser le contexte
@@ -151,26 +205,54 @@ class TradingPipeline(dspy.Module):
             assets=assets
         )
 
-        # 3. Décider pour la première opportunité
-        # (en pratique, on itérerait sur toutes)
-        first_asset = opps.top_opportunities.split(",")[0].strip()
+        # 3. Décider pour toutes les opportunités: dspy.Parallel envoie les appels
+        # simultanément, le serveur (llama-server -cb -np N) les fusionne en un batch continu
+        assets_list = split_assets(opps.top_opportunities)
+        analysis = f"{context.market_sentiment} - {context.key_events}"
 
-        decision = self.trade_decision(
-            asset=first_asset,
-            analysis=f"{context.market_sentiment} - {context.key_events}",
-            risk=risk_level
+        decisions = dspy.Parallel(num_threads=self.max_concurrency)([
+            (self.trade_decision, dict(asset=asset, analysis=analysis, risk=risk_level))
+            for asset in assets_list
+        ]) if assets_list else []
+
+        return {
+            "context": context,
+            "opportunities": opps,
+            "decision": decisions[0] if decisions else None,
+            "decisions": dict(zip(assets_list, decisions))
+        }
+
+    async def aforward(self, news, assets, risk_level):
+        # 1-2. Contexte puis opportunités (dépendants, donc séquentiels)
+        context = await self.world_context.acall(news=news)
+        opps = await self.opportunities.acall(
+            context=context.market_sentiment,
+            assets=assets
         )
 
+        # 3. Décider pour toutes les opportunités en parallèle (appels LLM I/O-bound),
+        # avec un sémaphore pour rester dans les limites de concurrence du serveur
+        assets_list = split_assets(opps.top_opportunities)
+        analysis = f"{context.market_sentiment} - {context.key_events}"
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def decide(asset):
+            async with semaphore:
+                return await self.trade_decision.acall(asset=asset, analysis=analysis, risk=risk_level)
+
+        decisions = await asyncio.gather(*(decide(asset) for asset in assets_list))
+
         return {
             "context": context,
             "opportunities": opps,
-            "decision": decision
+            "decision": decisions[0] if decisions else None,
+            "decisions": dict(zip(assets_list, decisions))
         }
 
-# Exécuter le pipeline
-pipeline = TradingPipeline()
+# Exécuter le pipeline (version async: décisions par actif en parallèle)
+pipeline = restore_state(TradingPipeline(), "trading_pipeline")
 
-result = pipeline(
+result = asyncio.run(pipeline.acall(
     news="""
     - Inflation en baisse
     - Bitcoin ETF approuvé
@@ -178,13 +260,14 @@ result = pipeline(
     """,
     assets="Bitcoin, Ethereum, Solana",
     risk_level="conservateur"
-)
+))
 
 print(f"\n📊 Résultats du pipeline:")
 print(f"  Sentiment: {result['context'].market_sentiment}")
 print(f"  Opportunités: {result['opportunities'].top_opportunities}")
-print(f"  Décision: {result['decision'].action} {result['decision'].amount}")
-print(f"  Raison: {result['decision'].reason}")
+for asset, decision in result['decisions'].items():
+    print(f"  Décision {asset}: {decision.action} {decision.amount}")
+    print(f"    Raison: {decision.reason}")
 
 # ============================================================================
 # 5. Comparaison multi-modèles
@@ -198,21 +281,33 @@ lm_local = get_dspy_lm("default_llamacpp")
 dspy.configure(lm=lm_local)
 
 qa = dspy.ChainOfThought("question -> answer")
-local_answer = qa(question="Bitcoin ou Ethereum pour 2025?").answer
-
-print(f"LlamaCpp (local): {local_answer[:100]}...")
+question = "Bitcoin ou Ethereum pour 2025?"
 
 # Gemini (si disponible)
 try:
     lm_cloud = get_dspy_lm("gemini-pro")
-    dspy.configure(lm=lm_cloud)
-
-    cloud_answer = qa(question="Bitcoin ou Ethereum pour 2025?").answer
-    print(f"Gemini (cloud):   {cloud_answer[:100]}...")
-
 except Exception as e:
+    lm_cloud = None
     print(f"Gemini non disponible: {e}")
 
+
+async def compare_models():
+    # Les deux modèles sont interrogés en même temps; le LM est passé par appel
+    # (dspy.context est thread-local et ne doit pas être partagé entre coroutines)
+    calls = [qa.acall(question=question, lm=lm_local)]
+    if lm_cloud is not None:
+        calls.append(qa.acall(question=question, lm=lm_cloud))
+    return await asyncio.gather(*calls, return_exceptions=True)
+
+
+answers = asyncio.run(compare_models())
+
+for label, answer in zip(["LlamaCpp (local):", "Gemini (cloud):  "], answers):
+    if isinstance(answer, Exception):
+        print(f"{label} indisponible ({answer})")
+    else:
+        print(f"{label} {answer.answer[:100]}...")
+
 print("\n" + "=" * 60)
 print("✅ Exemple complet terminé!")
 print(f"   Modèle utilisé: {lm.provider}")
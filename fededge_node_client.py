@@ -4,13 +4,257 @@ FedEdge Node Client - Ultra Simple
 Fichier à copier dans votre application ../fededge/
 """
 
+import asyncio
 import json
+import os
 import platform
+import socket
 import uuid
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 from pathlib import Path
+from functools import lru_cache
 from typing import Optional, Dict, Any
-import requests
+
+# Délai max de nvidia-smi -L (le premier appel sans mode persistance peut prendre ~0.5 s)
+GPU_PROBE_TIMEOUT = 1.0
+
+# Identité de la machine: fixe pendant la vie du process, lue une seule fois
+_OS_NAME = platform.system()
+_OS_RELEASE = platform.release()
+_MACHINE = platform.machine()
+_NODE = platform.node()
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj) -> bytes:
+    """JSON compact à clés triées (bytes UTF-8), via orjson si disponible"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    """Parse du JSON (bytes), via orjson si disponible"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Statut d'enregistrement mis en cache (l'UI le demande à chaque rafraîchissement).
+# Partagé au niveau module: les appelants créent un FedEdgeNodeClient par requête.
+STATUS_CACHE_TTL = 30.0
+STATUS_REFRESH_INTERVAL = 25.0
+STATUS_TIMEOUT = 3
+
+_status_cache: Dict[tuple, tuple] = {}  # (api_url, email) -> (expiry monotonic, payload)
+_status_watched: Dict[tuple, Path] = {}  # (api_url, email) rafraîchies en arrière-plan -> fichier de config
+_status_lock = threading.Lock()
+_status_thread: Optional[threading.Thread] = None
+_status_http = None  # session HTTP du thread de rafraîchissement
+
+# IP publique persistée dans la config et réutilisée pendant BACKEND_IP_TTL secondes.
+# Après un échec (hors ligne), pas de nouvelle sonde avant BACKEND_IP_RETRY secondes
+BACKEND_IP_TTL = 6 * 3600
+BACKEND_IP_TIMEOUT = 2
+BACKEND_IP_RETRY = 300
+_backend_ip_lock = threading.Lock()
+_backend_ip_retry_at = 0.0  # time.monotonic() avant lequel ipify n'est pas resondé
+
+# Sérialise les écritures de la config (threads de rafraîchissement + requêtes)
+_config_lock = threading.Lock()
+
+# Client httpx asynchrone partagé (une connexion HTTP/2 multiplexée vers l'API),
+# ouvert et fermé avec l'application FastAPI (voir backend/main.py)
+_async_client = None
+
+
+def _write_config_file(config_file: Path, serialized: bytes):
+    """Écriture atomique (fichier temporaire + os.replace), appelée sous _config_lock"""
+    tmp_file = config_file.with_suffix('.json.tmp')
+    tmp_file.write_bytes(serialized)
+    os.replace(tmp_file, config_file)
+
+
+def _update_config_file(config_file: Path, updates: Dict[str, Any],
+                        expect: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Fusionner updates dans la config sur disque (relue sous _config_lock)
+
+    Chaque instance garde sa propre copie de la config: réécrire cette copie
+    écraserait les changements faits entre-temps par les autres instances.
+    Seuls les champs modifiés sont donc appliqués au fichier courant.
+
+    Args:
+        expect: Champs qui doivent encore avoir ces valeurs sur disque, sinon rien n'est écrit
+
+    Returns:
+        La config fusionnée, ou None si expect ne correspond plus
+    """
+    with _config_lock:
+        config = _json_loads(config_file.read_bytes()) if config_file.exists() else {}
+        if expect and any(config.get(k) != v for k, v in expect.items()):
+            return None
+
+        merged = {**config, **updates}
+        if merged != config:
+            _write_config_file(config_file, _json_dumps(merged))
+        return merged
+
+
+def _new_http_session(user_agent: str):
+    """Session HTTP: connexions keep-alive réutilisées (pas de handshake TLS par appel)"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': user_agent})
+    return session
+
+
+def open_async_client(user_agent: str = "fededge/0.1.0"):
+    """Créer le client httpx partagé (au démarrage de l'application, dans sa boucle)"""
+    global _async_client
+    if _async_client is None:
+        import httpx
+
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        _async_client = httpx.AsyncClient(
+            # retries: reconnexions uniquement (pas de rejeu des POST)
+            transport=httpx.AsyncHTTPTransport(
+                http2=http2, limits=httpx.Limits(max_connections=4), retries=2
+            ),
+            timeout=httpx.Timeout(5.0, connect=2.0),
+            headers={'User-Agent': user_agent},
+        )
+    return _async_client
+
+
+async def aclose():
+    """Fermer le client httpx partagé (à l'arrêt de l'application)"""
+    global _async_client
+    client, _async_client = _async_client, None
+    if client is not None:
+        await client.aclose()
+
+
+def _store_registration_status(api_url: str, email: str, config_file: Path, response) -> Dict[str, Any]:
+    """Traiter la réponse de /user/status (None si erreur réseau) et la mettre en cache"""
+    status = {'registered': True, 'verified': False}
+
+    try:
+        if response is not None and response.status_code == 200:
+            data = response.json()
+            if data.get('verified'):
+                # Seulement si cet email est toujours celui du node (réinscription entre-temps)
+                _update_config_file(config_file, {'registered': True}, expect={'user_email': email})
+
+            status = {
+                'registered': True,
+                'verified': data.get('verified', False),
+                'user': data
+            }
+    except:
+        pass
+
+    with _status_lock:
+        if status['verified']:
+            # Statut définitif: plus de rafraîchissement ni d'expiration pour cet email
+            _status_watched.pop((api_url, email), None)
+            _status_cache[(api_url, email)] = (float('inf'), status)
+        else:
+            _status_cache[(api_url, email)] = (time.monotonic() + STATUS_CACHE_TTL, status)
+    return status
+
+
+def _status_refresh_loop():
+    """
+    Rafraîchit périodiquement les statuts non vérifiés, hors du chemin des requêtes UI.
+    Le thread s'arrête quand il n'y a plus rien à surveiller.
+    """
+    global _status_http, _status_thread
+
+    while True:
+        time.sleep(STATUS_REFRESH_INTERVAL)
+        with _status_lock:
+            if not _status_watched:
+                _status_thread = None
+                return
+            watched = list(_status_watched.items())
+
+        for (api_url, email), config_file in watched:
+            try:
+                config = _json_loads(config_file.read_bytes())
+            except (OSError, ValueError):
+                continue
+
+            # Email remplacé par une réinscription: ne plus le surveiller
+            if config.get('user_email') != email:
+                with _status_lock:
+                    _status_watched.pop((api_url, email), None)
+                    _status_cache.pop((api_url, email), None)
+                continue
+
+            try:
+                if _status_http is None:
+                    _status_http = _new_http_session(f"fededge/{config.get('version', '0.1.0')}")
+                response = _status_http.get(
+                    f'{api_url}/user/status',
+                    params={'email': email},
+                    timeout=STATUS_TIMEOUT
+                )
+            except Exception:
+                response = None
+            _store_registration_status(api_url, email, config_file, response)
+
+
+@lru_cache(maxsize=1)
+def _probe_gpu() -> tuple[bool, Optional[str]]:
+    """Sonder le GPU via nvidia-smi; le résultat ne change pas pendant la vie du process"""
+    # GPU explicitement masqué par l'utilisateur: pas de fork
+    if os.environ.get('CUDA_VISIBLE_DEVICES', None) in ('', '-1'):
+        return (False, None)
+
+    try:
+        # -L: une ligne courte par GPU ("GPU 0: <nom> (UUID: ...)")
+        result = subprocess.run(['nvidia-smi', '-L'], capture_output=True, text=True,
+                              timeout=GPU_PROBE_TIMEOUT)
+        if result.returncode == 0:
+            names = [line.split(': ', 1)[1].split(' (')[0]
+                     for line in result.stdout.splitlines() if line.startswith('GPU ')]
+            if names:
+                return (True, ', '.join(names))
+    except:
+        pass
+
+    # Repli torch (import lourd + init CUDA): uniquement sur demande explicite
+    if os.environ.get('FEDEDGE_PROBE_TORCH'):
+        try:
+            import torch
+            if torch.cuda.is_available():
+                return (True, torch.cuda.get_device_name(0))
+        except:
+            pass
+
+    return (False, None)
+
 
 class FedEdgeNodeClient:
     def __init__(self, config_file: str = '.fededge_node.json', api_url: str = 'https://fededge.net/api'):
@@ -18,12 +262,20 @@ class FedEdgeNodeClient:
         self.api_url = api_url
         self.config = self._load_config()
         self.session_id = None
+        self._http_session = None  # créée au premier appel réseau (voir _http)
+
+        # Sonder l'IP publique en arrière-plan si absente/expirée (hors chemin de démarrage),
+        # sauf si une sonde tourne déjà ou a échoué récemment
+        if (not self._cached_backend_ip() and not _backend_ip_lock.locked()
+                and time.monotonic() >= _backend_ip_retry_at):
+            threading.Thread(target=self._get_backend_ip, name="fededge-ip-probe", daemon=True).start()
 
     def _load_config(self) -> Dict[str, Any]:
         """Charger la config du node depuis le fichier JSON"""
         if self.config_file.exists():
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
+            config = _json_loads(self.config_file.read_bytes())
+            self._last_saved = _json_dumps(config)
+            return config
 
         # Créer une nouvelle config
         config = {
@@ -37,52 +289,118 @@ class FedEdgeNodeClient:
         return config
 
     def _save_config(self, config: Optional[Dict[str, Any]] = None):
-        """Sauvegarder la config"""
+        """Sauvegarder la config (ignorée si inchangée, écriture atomique)"""
         if config:
             self.config = config
 
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        serialized = _json_dumps(self.config)
+        if serialized == getattr(self, '_last_saved', None):
+            return
+
+        # Fichier temporaire + os.replace: jamais de lecture d'un fichier à moitié écrit
+        with _config_lock:
+            _write_config_file(self.config_file, serialized)
+        self._last_saved = serialized
+
+    def _update_config(self, **updates) -> Dict[str, Any]:
+        """Appliquer des champs à la config sur disque (fusion) et rafraîchir la copie locale"""
+        merged = _update_config_file(self.config_file, updates)
+        self.config = merged
+        self._last_saved = _json_dumps(merged)
+        return merged
+
+    @property
+    def _http(self):
+        """Session HTTP paresseuse: requests (et certifi) ne sont importés qu'au premier appel réseau"""
+        if self._http_session is None:
+            self._http_session = self._create_http_session()
+        return self._http_session
+
+    def _create_http_session(self):
+        """Session HTTP partagée: connexions keep-alive réutilisées (pas de handshake TLS par appel)"""
+        return _new_http_session(f"fededge/{self.config.get('version', '0.1.0')}")
+
+    def _get_async_client(self):
+        """Client httpx partagé (HTTP/2 si h2 est installé), créé au premier appel hors application"""
+        return open_async_client(f"fededge/{self.config.get('version', '0.1.0')}")
 
     def _detect_gpu(self) -> tuple[bool, Optional[str]]:
-        """Détecter si GPU disponible"""
-        try:
-            # Try nvidia-smi
-            result = subprocess.run(['nvidia-smi', '--query-gpu=name', '--format=csv,noheader'],
-                                  capture_output=True, text=True, timeout=2)
-            if result.returncode == 0:
-                gpu_name = result.stdout.strip()
-                return (True, gpu_name)
-        except:
-            pass
-
-        return (False, None)
+        """Détecter si GPU disponible (sondé une seule fois par process)"""
+        return _probe_gpu()
+
+    def _cached_backend_ip(self) -> Optional[str]:
+        """IP publique persistée si encore fraîche"""
+        ip = self.config.get('backend_ip')
+        if ip and time.time() - self.config.get('backend_ip_ts', 0) < BACKEND_IP_TTL:
+            return ip
+        return None
 
     def _get_backend_ip(self) -> Optional[str]:
-        """Obtenir l'IP publique du backend/node"""
+        """Obtenir l'IP publique du backend/node (mise en cache dans la config)"""
+        global _backend_ip_retry_at
+
+        ip = self._cached_backend_ip()
+        if ip:
+            return ip
+
+        with _backend_ip_lock:
+            # Une sonde concurrente (peut-être d'une autre instance) a pu la persister
+            # pendant l'attente du verrou: relire la config sur disque
+            try:
+                disk_config = _json_loads(self.config_file.read_bytes())
+                for field in ('backend_ip', 'backend_ip_ts'):
+                    if field in disk_config:
+                        self.config[field] = disk_config[field]
+            except (OSError, ValueError):
+                pass
+
+            ip = self._cached_backend_ip()
+            if ip:
+                return ip
+
+            if time.monotonic() >= _backend_ip_retry_at:
+                try:
+                    # Utiliser un service externe pour obtenir l'IP publique du serveur
+                    response = self._http.get('https://api.ipify.org?format=json', timeout=BACKEND_IP_TIMEOUT)
+                    if response.status_code == 200:
+                        ip = response.json().get('ip')
+                except:
+                    pass
+
+                if ip:
+                    # Fusion: ne touche que ces champs (pas d'écrasement de la config des autres instances)
+                    self._update_config(backend_ip=ip, backend_ip_ts=time.time())
+                    return ip
+
+                _backend_ip_retry_at = time.monotonic() + BACKEND_IP_RETRY
+
+        # Sortie bloquée (LAN): IP locale, non persistée pour retenter ipify plus tard
         try:
-            # Utiliser un service externe pour obtenir l'IP publique du serveur
-            response = requests.get('https://api.ipify.org?format=json', timeout=3)
-            if response.status_code == 200:
-                return response.json().get('ip')
-        except:
-            pass
-        return None
+            return socket.gethostbyname(socket.gethostname())
+        except OSError:
+            return None
 
     def get_system_info(self) -> Dict[str, Any]:
-        """Récupérer les infos système"""
-        has_gpu, gpu_info = self._detect_gpu()
-        backend_ip = self._get_backend_ip()
+        """Récupérer les infos système (sonde GPU et IP publique en parallèle)"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fut_gpu = executor.submit(self._detect_gpu)
+            fut_ip = executor.submit(self._get_backend_ip)
+            has_gpu, gpu_info = fut_gpu.result()
+            backend_ip = fut_ip.result()
 
         return {
-            'os': platform.system(),
-            'architecture': platform.machine(),
+            'os': _OS_NAME,
+            'architecture': _MACHINE,
             'has_gpu': has_gpu,
             'gpu_info': gpu_info,
             'backend_ip': backend_ip,  # IP du serveur/node
             'port': 9010  # Port de votre application
         }
 
+    async def aget_system_info(self) -> Dict[str, Any]:
+        """Version async de get_system_info (sondes bloquantes déportées dans un thread)"""
+        return await asyncio.to_thread(self.get_system_info)
+
     def register_user(self, email: str, name: str = '', client_ip: Optional[str] = None):
         """
         Enregistrer l'utilisateur du node
@@ -93,97 +411,169 @@ class FedEdgeNodeClient:
             name: Nom de l'utilisateur
             client_ip: IP du client frontend (navigateur), si disponible
         """
-        print(f"📤 Registering user: email={email}, name={name}")
-        print(f"🌐 API URL: {self.api_url}/signup")
-
         # D'abord, s'inscrire sur le site si pas déjà fait
         try:
-            payload = {
-                'email': email,
-                'name': name,
-                'experience': 'developer',
-                'contact': ''
-            }
-
-            # Ajouter l'IP du client frontend si fournie
-            if client_ip:
-                payload['client_ip'] = client_ip
-                print(f"🌐 Client (frontend) IP: {client_ip}")
-
-            print(f"📦 Payload: {payload}")
+            payload = self._signup_payload(email, name, client_ip)
+            response = self._http.post(
+                f'{self.api_url}/signup',
+                json=payload,
+                timeout=10
+            )
+            return self._handle_signup_response(email, name, response)
+        except Exception as e:
+            return self._handle_signup_error(email, name, e)
 
-            response = requests.post(
+    async def aregister_user(self, email: str, name: str = '', client_ip: Optional[str] = None):
+        """Version async de register_user (client httpx partagé)"""
+        try:
+            payload = self._signup_payload(email, name, client_ip)
+            response = await self._get_async_client().post(
                 f'{self.api_url}/signup',
                 json=payload,
                 timeout=10
             )
+            return self._handle_signup_response(email, name, response)
+        except Exception as e:
+            return self._handle_signup_error(email, name, e)
 
-            print(f"📥 Response status: {response.status_code}")
-            print(f"📥 Response body: {response.text[:500]}")  # First 500 chars
-
-            # Que ça réussisse ou non (email déjà existant ok), on enregistre localement
-            self.config['user_email'] = email
-            self.config['node_name'] = name or f"Node-{platform.node()}"
-            self.config['registered'] = False  # Sera True quand email vérifié
-            self._save_config()
-            print(f"💾 Config saved locally")
-
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'success': True,
-                    'message': data.get('message', 'Registration successful. Please check your email.'),
-                    'needs_verification': True
-                }
-            else:
-                data = response.json()
-                return {
-                    'success': True,  # On a sauvegardé localement quand même
-                    'message': data.get('error', 'Email saved locally'),
-                    'needs_verification': True
-                }
+    def _signup_payload(self, email: str, name: str, client_ip: Optional[str]) -> Dict[str, Any]:
+        """Construire le payload de /signup"""
+        print(f"📤 Registering user: email={email}, name={name}")
+        print(f"🌐 API URL: {self.api_url}/signup")
 
-        except Exception as e:
-            # Même en cas d'erreur réseau, on sauvegarde localement
-            print(f"❌ Error during registration: {e}")
-            self.config['user_email'] = email
-            self.config['node_name'] = name or f"Node-{platform.node()}"
-            self._save_config()
+        payload = {
+            'email': email,
+            'name': name,
+            'experience': 'developer',
+            'contact': ''
+        }
 
+        # Ajouter l'IP du client frontend si fournie
+        if client_ip:
+            payload['client_ip'] = client_ip
+            print(f"🌐 Client (frontend) IP: {client_ip}")
+
+        print(f"📦 Payload: {payload}")
+        return payload
+
+    def _handle_signup_response(self, email: str, name: str, response) -> Dict[str, Any]:
+        """Traiter la réponse de /signup (requests ou httpx)"""
+        print(f"📥 Response status: {response.status_code}")
+        print(f"📥 Response body: {response.text[:500]}")  # First 500 chars
+
+        # Que ça réussisse ou non (email déjà existant ok), on enregistre localement
+        self._update_config(
+            user_email=email,
+            node_name=name or f"Node-{_NODE}",
+            registered=False,  # Sera True quand email vérifié
+        )
+        print(f"💾 Config saved locally")
+
+        if response.status_code == 200:
+            data = response.json()
             return {
                 'success': True,
-                'message': f'Saved locally. Network error: {str(e)}',
+                'message': data.get('message', 'Registration successful. Please check your email.'),
+                'needs_verification': True
+            }
+        else:
+            data = response.json()
+            return {
+                'success': True,  # On a sauvegardé localement quand même
+                'message': data.get('error', 'Email saved locally'),
                 'needs_verification': True
             }
 
+    def _handle_signup_error(self, email: str, name: str, e: Exception) -> Dict[str, Any]:
+        """Même en cas d'erreur réseau, on sauvegarde localement"""
+        print(f"❌ Error during registration: {e}")
+        self._update_config(user_email=email, node_name=name or f"Node-{_NODE}")
+
+        return {
+            'success': True,
+            'message': f'Saved locally. Network error: {str(e)}',
+            'needs_verification': True
+        }
+
     def check_registration_status(self) -> Dict[str, Any]:
-        """Vérifier si l'email est vérifié"""
+        """Vérifier si l'email est vérifié (cache TTL, rafraîchi en arrière-plan)"""
+        email = self.config.get('user_email')
+        if not email:
+            return {'registered': False, 'verified': False}
+
+        key = (self.api_url, email)
+        with _status_lock:
+            cached = _status_cache.get(key)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+
+        status = self._refresh_registration_status()
+        if not status.get('verified'):
+            self._watch_registration_status(key)
+        return status
+
+    async def acheck_registration_status(self) -> Dict[str, Any]:
+        """Version async de check_registration_status (même cache TTL)"""
         email = self.config.get('user_email')
         if not email:
             return {'registered': False, 'verified': False}
 
+        key = (self.api_url, email)
+        with _status_lock:
+            cached = _status_cache.get(key)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+
         try:
-            response = requests.get(
+            response = await self._get_async_client().get(
                 f'{self.api_url}/user/status',
                 params={'email': email},
-                timeout=10
+                timeout=STATUS_TIMEOUT
             )
-
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('verified'):
-                    self.config['registered'] = True
-                    self._save_config()
-
-                return {
-                    'registered': True,
-                    'verified': data.get('verified', False),
-                    'user': data
-                }
         except:
-            pass
+            response = None
+        status = self._store_registration_status(email, response)
+        if not status.get('verified'):
+            self._watch_registration_status(key)
+        return status
+
+    def _refresh_registration_status(self) -> Dict[str, Any]:
+        """Interroger le serveur et mettre à jour le cache de statut"""
+        email = self.config.get('user_email')
 
-        return {'registered': True, 'verified': False}
+        try:
+            response = self._http.get(
+                f'{self.api_url}/user/status',
+                params={'email': email},
+                timeout=STATUS_TIMEOUT
+            )
+        except Exception:
+            response = None
+        return self._store_registration_status(email, response)
+
+    def _store_registration_status(self, email: str, response) -> Dict[str, Any]:
+        """Mettre en cache le statut (et le flag registered sur disque), puis la copie locale"""
+        status = _store_registration_status(self.api_url, email, self.config_file, response)
+        if status.get('verified') and self.config.get('user_email') == email:
+            self.config['registered'] = True
+        return status
+
+    def _watch_registration_status(self, key: tuple):
+        """
+        Enregistrer la clé (api_url, email) pour le rafraîchissement périodique
+        (thread démon unique). Les anciens emails de ce node ne sont plus surveillés.
+        """
+        global _status_thread
+        with _status_lock:
+            for old_key, config_file in list(_status_watched.items()):
+                if config_file == self.config_file and old_key != key:
+                    del _status_watched[old_key]
+            _status_watched[key] = self.config_file
+            if _status_thread is None:
+                _status_thread = threading.Thread(
+                    target=_status_refresh_loop, name="fededge-status-refresh", daemon=True
+                )
+                _status_thread.start()
 
     def start_session(self, client_ip: Optional[str] = None):
         """Enregistrer le démarrage du node sur le serveur
@@ -192,65 +582,91 @@ class FedEdgeNodeClient:
             client_ip: IP du client frontend (navigateur), si disponible
         """
         try:
-            system_info = self.get_system_info()
-
-            payload = {
-                'node_id': self.config['node_id'],
-                'user_email': self.config.get('user_email'),
-                'node_name': self.config.get('node_name'),
-                'version': self.config['version'],
-                **system_info
-            }
-
-            # Ajouter l'IP du client frontend si fournie
-            if client_ip:
-                payload['client_ip'] = client_ip
-                print(f"🌐 Client (frontend) IP: {client_ip}")
-
-            # backend_ip dans system_info contient l'IP du backend/node
-            print(f"🖥️ Backend (node) IP: {system_info.get('backend_ip')}")
-            print(f"📦 Full payload being sent to /node/register:")
-            print(f"   {payload}")
-
-            response = requests.post(
+            payload = self._session_payload(self.get_system_info(), client_ip)
+            response = self._http.post(
                 f'{self.api_url}/node/register',
                 json=payload,
                 timeout=10
             )
+            return self._handle_session_response(response)
+        except Exception as e:
+            print(f"⚠️  Could not register node: {e}")
+            print("   App will run in offline mode")
 
-            print(f"📥 Response from /node/register: status={response.status_code}")
-            if response.status_code == 200:
-                data = response.json()
-                print(f"📥 Response data: {data}")
-                self.session_id = data.get('session', {}).get('id')
-                print(f"✅ Node registered: {self.config['node_id'][:8]}...")
-
-                if self.config.get('user_email'):
-                    print(f"📧 Registered to: {self.config['user_email']}")
-                else:
-                    print("⚠️  Unregistered node")
+        return None
 
-                return data
-            else:
-                print(f"❌ Registration failed: {response.text}")
-                return None
+    async def astart_session(self, client_ip: Optional[str] = None):
+        """Version async de start_session (client httpx partagé)"""
+        try:
+            payload = self._session_payload(await self.aget_system_info(), client_ip)
+            response = await self._get_async_client().post(
+                f'{self.api_url}/node/register',
+                json=payload,
+                timeout=10
+            )
+            return self._handle_session_response(response)
         except Exception as e:
             print(f"⚠️  Could not register node: {e}")
             print("   App will run in offline mode")
 
         return None
 
+    def _session_payload(self, system_info: Dict[str, Any], client_ip: Optional[str]) -> Dict[str, Any]:
+        """Construire le payload de /node/register"""
+        payload = {
+            'node_id': self.config['node_id'],
+            'user_email': self.config.get('user_email'),
+            'node_name': self.config.get('node_name'),
+            'version': self.config['version'],
+            **system_info
+        }
+
+        # Ajouter l'IP du client frontend si fournie
+        if client_ip:
+            payload['client_ip'] = client_ip
+            print(f"🌐 Client (frontend) IP: {client_ip}")
+
+        # backend_ip dans system_info contient l'IP du backend/node
+        print(f"🖥️ Backend (node) IP: {system_info.get('backend_ip')}")
+        print(f"📦 Full payload being sent to /node/register:")
+        print(f"   {payload}")
+        return payload
+
+    def _handle_session_response(self, response) -> Optional[Dict[str, Any]]:
+        """Traiter la réponse de /node/register (requests ou httpx)"""
+        print(f"📥 Response from /node/register: status={response.status_code}")
+        if response.status_code == 200:
+            data = response.json()
+            print(f"📥 Response data: {data}")
+            self.session_id = data.get('session', {}).get('id')
+            print(f"✅ Node registered: {self.config['node_id'][:8]}...")
+
+            if self.config.get('user_email'):
+                print(f"📧 Registered to: {self.config['user_email']}")
+            else:
+                print("⚠️  Unregistered node")
+
+            return data
+        else:
+            print(f"❌ Registration failed: {response.text}")
+            return None
+
     def get_node_info(self) -> Dict[str, Any]:
         """Obtenir les infos du node pour l'affichage dans l'UI"""
         status = self.check_registration_status()
+        has_gpu, _ = self._detect_gpu()
+        return self._node_info(status, has_gpu)
 
-        # Detect OS
-        os_name = platform.system()
-        os_version = platform.release()
-        os_info = f"{os_name} {os_version}"
+    async def aget_node_info(self) -> Dict[str, Any]:
+        """Version async de get_node_info (ne bloque pas la boucle événementielle)"""
+        status = await self.acheck_registration_status()
+        has_gpu, _ = await asyncio.to_thread(self._detect_gpu)
+        return self._node_info(status, has_gpu)
 
-        # Detect GPU
-        has_gpu = self._check_gpu()
+    def _node_info(self, status: Dict[str, Any], has_gpu: bool) -> Dict[str, Any]:
+        """Assembler les infos du node"""
+        # Detect OS
+        os_info = f"{_OS_NAME} {_OS_RELEASE}"
 
         # Get user name from config
         user_name = self.config.get('user_name', self.config.get('node_name', ''))
@@ -267,25 +683,6 @@ class FedEdgeNodeClient:
             'has_gpu': has_gpu
         }
 
-    def _check_gpu(self) -> bool:
-        """Check if GPU is available"""
-        try:
-            # Try nvidia-smi first
-            result = subprocess.run(['nvidia-smi'], capture_output=True, timeout=2)
-            if result.returncode == 0:
-                return True
-        except:
-            pass
-
-        try:
-            # Try to import torch and check CUDA
-            import torch
-            return torch.cuda.is_available()
-        except:
-            pass
-
-        return False
-
 
 # ==================================================================
 # INTEGRATION ULTRA SIMPLE DANS VOTRE run_server.py
@@ -15,6 +15,8 @@ export class WebSocketManager {
         this.maxReconnectAttempts = 5;
         this.reconnectDelay = 2000;
         this.customHandlers = []; // Initialize custom handlers array
+        this.textDecoder = new TextDecoder('utf-8'); // Broadcasts arrive as pre-encoded binary frames
+        this.messageChain = Promise.resolve(); // Keeps message order while compressed frames are inflated
     }
 
     /**
@@ -34,6 +36,7 @@ export class WebSocketManager {
 
         try {
             this.socket = new WebSocket(wsUrl);
+            this.socket.binaryType = 'arraybuffer';
 
             this.socket.onopen = async () => {
                 console.log('✅ WebSocket connected successfully');
@@ -67,12 +70,15 @@ export class WebSocketManager {
             };
 
             this.socket.onmessage = (event) => {
-                try {
-                    const data = JSON.parse(event.data);
-                    this.handleMessage(data);
-                } catch (error) {
-                    console.error('Error parsing WebSocket message:', error);
-                }
+                this.messageChain = this.messageChain.then(async () => {
+                    try {
+                        const text = await this.decodeMessage(event.data);
+                        const data = JSON.parse(text);
+                        this.handleMessage(data);
+                    } catch (error) {
+                        console.error('Error parsing WebSocket message:', error);
+                    }
+                });
             };
 
             this.socket.onerror = (error) => {
@@ -98,6 +104,21 @@ export class WebSocketManager {
         }
     }
 
+    /**
+     * Decode a WebSocket frame into JSON text.
+     * Binary frames are UTF-8 JSON, or zlib-compressed JSON (0x78 header) for large broadcasts
+     */
+    async decodeMessage(payload) {
+        if (typeof payload === 'string') {
+            return payload;
+        }
+        if (new Uint8Array(payload, 0, 1)[0] === 0x78) {
+            const stream = new Blob([payload]).stream().pipeThrough(new DecompressionStream('deflate'));
+            return await new Response(stream).text();
+        }
+        return this.textDecoder.decode(payload);
+    }
+
     /**
      * Attempt to reconnect to WebSocket
      */
@@ -20,13 +20,11 @@ from backend.db.models import (
 from sqlalchemy import inspect
 
 
-def check_tables_exist():
+def check_tables_exist(inspector):
     """Vérifie si les tables existent déjà"""
-    inspector = inspect(engine)
-    existing_tables = inspector.get_table_names()
-
-    entity_nodes_exists = "agent_entity_nodes" in existing_tables
-    entity_relations_exists = "agent_entity_relations" in existing_tables
+    # has_table: requête ciblée par table (pas de listing complet du schéma)
+    entity_nodes_exists = inspector.has_table("agent_entity_nodes")
+    entity_relations_exists = inspector.has_table("agent_entity_relations")
 
     return entity_nodes_exists, entity_relations_exists
 
@@ -38,12 +36,13 @@ def migrate():
     print("=" * 70)
 
     # Check existing tables
-    nodes_exist, relations_exist = check_tables_exist()
+    nodes_exist, relations_exist = check_tables_exist(inspect(engine))
 
     print(f"\n📊 État actuel:")
     print(f"   agent_entity_nodes: {'✅ Existe' if nodes_exist else '❌ Nexiste pas'}")
     print(f"   agent_entity_relations: {'✅ Existe' if relations_exist else '❌ Nexiste pas'}")
 
+    recreate = False
     if nodes_exist and relations_exist:
         print(f"\n⚠️ Les tables existent déjà!")
         response = input("Voulez-vous recréer les tables? (cela supprimera toutes les données) (y/N): ").strip().lower()
@@ -51,40 +50,42 @@ def migrate():
         if response != 'y':
             print("❌ Migration annulée")
             return False
+        recreate = True
 
-        print("\n🗑️ Suppression des tables existantes...")
-        AgentEntityRelation.__table__.drop(engine, checkfirst=True)
-        AgentEntityNode.__table__.drop(engine, checkfirst=True)
-        print("✅ Tables supprimées")
+    # Tout le DDL dans une seule connexion/transaction (pas d'état partiel en cas d'échec)
+    with engine.begin() as conn:
+        if recreate:
+            print("\n🗑️ Suppression des tables existantes...")
+            AgentEntityRelation.__table__.drop(conn, checkfirst=True)
+            AgentEntityNode.__table__.drop(conn, checkfirst=True)
+            print("✅ Tables supprimées")
 
-    # Create tables
-    print(f"\n🔨 Création des tables...")
+        # Create tables
+        print(f"\n🔨 Création des tables...")
 
-    # Create only the entity graph tables (not all Base tables)
-    AgentEntityNode.__table__.create(engine, checkfirst=True)
-    AgentEntityRelation.__table__.create(engine, checkfirst=True)
+        # Create only the entity graph tables (not all Base tables)
+        Base.metadata.create_all(conn, tables=[AgentEntityNode.__table__, AgentEntityRelation.__table__])
 
     print("✅ Tables créées:")
     print("   - agent_entity_nodes")
     print("   - agent_entity_relations")
 
-    # Verify
-    nodes_exist, relations_exist = check_tables_exist()
+    # Verify (nouvel inspecteur: la réflexion du premier est en cache et antérieure au DDL)
+    inspector = inspect(engine)
+    nodes_exist, relations_exist = check_tables_exist(inspector)
 
     if nodes_exist and relations_exist:
         print(f"\n✅ MIGRATION RÉUSSIE!")
         print(f"\n📊 Schéma:")
-        print_schema()
+        print_schema(inspector)
         return True
     else:
         print(f"\n❌ MIGRATION ÉCHOUÉE")
         return False
 
 
-def print_schema():
+def print_schema(inspector):
     """Affiche le schéma des tables"""
-    inspector = inspect(engine)
-
     for table_name in ["agent_entity_nodes", "agent_entity_relations"]:
         print(f"\n📋 Table: {table_name}")
         columns = inspector.get_columns(table_name)
@@ -9,25 +9,37 @@ Peuple le graphe avec :
 - Patterns d'exemple (depuis signaux récents)
 """
 
+import argparse
 import asyncio
 import sys
+import traceback
+from itertools import islice
 from pathlib import Path
+
+import numpy as np
+
 sys.path.insert(0, str(Path(__file__).parent))
 
 from backend.entity_memory import get_entity_graph, reset_entity_graph
-from backend.services.trading_bot_service import get_trading_bot_service
+
+
+def _emit(lines):
+    """Affiche le rapport d'une étape en une seule écriture (pas un write par ligne,
+    et pas d'entrelacement entre étapes concurrentes)"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
 
 
 async def populate_user(graph):
     """Créer entité utilisateur"""
-    print("\n1️⃣ CRÉATION USER")
-    print("-" * 70)
+    lines = ["\n1️⃣ CRÉATION USER", "-" * 70]
 
     # Check if user already exists
     existing = graph.find_entities(type="user", filters={"user_id": "default_user"})
 
     if existing:
-        print(f"✅ User existe déjà: {existing[0].id}")
+        lines.append(f"✅ User existe déjà: {existing[0].id}")
+        _emit(lines)
         return existing[0].id
 
     # Create default user
@@ -48,14 +60,14 @@ async def populate_user(graph):
         entity_id="user_default",  # Fixed ID for consistency
     )
 
-    print(f"✅ User créé: {user_id}")
+    lines.append(f"✅ User créé: {user_id}")
+    _emit(lines)
     return user_id
 
 
 async def populate_assets(graph):
     """Créer entités assets (top cryptos)"""
-    print("\n2️⃣ CRÉATION ASSETS")
-    print("-" * 70)
+    lines = ["\n2️⃣ CRÉATION ASSETS", "-" * 70]
 
     # Top crypto assets with current prices (approximate)
     assets_data = [
@@ -71,102 +83,117 @@ async def populate_assets(graph):
         {"symbol": "LINK", "name": "Chainlink", "price": 15, "market_cap": 9e9},
     ]
 
+    # Existing assets (single lookup instead of one per symbol)
     asset_ids = {}
+    for entity in graph.find_entities(type="asset"):
+        asset_ids.setdefault(entity.attributes.get("symbol"), entity.id)
 
+    new_assets = []
     for asset_data in assets_data:
-        # Check if exists
-        existing = graph.find_entities(type="asset", filters={"symbol": asset_data["symbol"]})
-
-        if existing:
-            print(f"✅ Asset existe: {asset_data['symbol']} ({existing[0].id})")
-            asset_ids[asset_data["symbol"]] = existing[0].id
+        if asset_data["symbol"] in asset_ids:
+            lines.append(f"✅ Asset existe: {asset_data['symbol']} ({asset_ids[asset_data['symbol']]})")
             continue
 
-        # Create asset
-        asset_id = graph.add_entity(
-            type="asset",
-            label=asset_data["name"],
-            attributes={
+        new_assets.append(asset_data)
+
+    # Create assets (one bulk insert)
+    created_ids = graph.add_entities_bulk([
+        {
+            "type": "asset",
+            "label": asset_data["name"],
+            "attributes": {
                 "symbol": asset_data["symbol"],
                 "name": asset_data["name"],
                 "price": asset_data["price"],
                 "market_cap": asset_data["market_cap"],
             },
-            importance=0.9 if asset_data["symbol"] in ["BTC", "ETH", "SOL"] else 0.7,
-            tags=["crypto", "top10"],
-            entity_id=f"asset_{asset_data['symbol']}",  # Fixed ID
-        )
-
-        print(f"✅ Asset créé: {asset_data['symbol']} ({asset_id})")
+            "importance": 0.9 if asset_data["symbol"] in ["BTC", "ETH", "SOL"] else 0.7,
+            "tags": ["crypto", "top10"],
+            "entity_id": f"asset_{asset_data['symbol']}",  # Fixed ID
+        }
+        for asset_data in new_assets
+    ])
+
+    for asset_data, asset_id in zip(new_assets, created_ids):
+        lines.append(f"✅ Asset créé: {asset_data['symbol']} ({asset_id})")
         asset_ids[asset_data["symbol"]] = asset_id
 
+    _emit(lines)
     return asset_ids
 
 
 async def populate_user_favorites(graph, user_id, asset_ids):
     """Créer relations WATCHES (favoris)"""
-    print("\n3️⃣ CRÉATION FAVORIS")
-    print("-" * 70)
+    lines = ["\n3️⃣ CRÉATION FAVORIS", "-" * 70]
 
     favorites = ["BTC", "ETH", "SOL"]
 
+    new_favorites = []
     for symbol in favorites:
         if symbol in asset_ids:
-            # Check if relation exists
-            existing_rels = graph.get_relations(user_id, "out", "WATCHES")
-            already_watches = any(rel.target == asset_ids[symbol] for rel in existing_rels)
-
-            if already_watches:
-                print(f"✅ Favoris existe: {symbol}")
+            if graph.has_relation(user_id, asset_ids[symbol], "WATCHES"):
+                lines.append(f"✅ Favoris existe: {symbol}")
                 continue
 
-            # Create WATCHES relation
-            graph.add_relation(
-                source=user_id,
-                target=asset_ids[symbol],
-                type="WATCHES",
-                attributes={"added_at": "2025-11-29"},
-                strength=0.8,
-            )
+            new_favorites.append(symbol)
+
+    # Create WATCHES relations (one bulk insert)
+    graph.add_relations_bulk([
+        {
+            "source": user_id,
+            "target": asset_ids[symbol],
+            "type": "WATCHES",
+            "attributes": {"added_at": "2025-11-29"},
+            "strength": 0.8,
+        }
+        for symbol in new_favorites
+    ])
 
-            print(f"✅ Favoris ajouté: {symbol}")
+    for symbol in new_favorites:
+        lines.append(f"✅ Favoris ajouté: {symbol}")
+
+    _emit(lines)
 
 
 async def populate_demo_positions(graph, user_id, asset_ids):
     """Créer positions de démonstration (optionnel)"""
-    print("\n4️⃣ CRÉATION POSITIONS DÉMO (optionnel)")
-    print("-" * 70)
+    lines = ["\n4️⃣ CRÉATION POSITIONS DÉMO (optionnel)", "-" * 70]
 
     demo_positions = [
         {"symbol": "BTC", "amount": 0.5, "entry_price": 45000},
         {"symbol": "ETH", "amount": 2.0, "entry_price": 2800},
     ]
 
+    new_positions = []
     for pos in demo_positions:
         symbol = pos["symbol"]
         if symbol not in asset_ids:
             continue
 
-        # Check if OWNS relation exists
-        existing_rels = graph.get_relations(user_id, "out", "OWNS")
-        already_owns = any(rel.target == asset_ids[symbol] for rel in existing_rels)
-
-        if already_owns:
-            print(f"✅ Position existe: {symbol}")
+        if graph.has_relation(user_id, asset_ids[symbol], "OWNS"):
+            lines.append(f"✅ Position existe: {symbol}")
             continue
 
-        # Create OWNS relation
-        graph.add_relation(
-            source=user_id,
-            target=asset_ids[symbol],
-            type="OWNS",
-            attributes={
+        new_positions.append(pos)
+
+    # Create OWNS relations (one bulk insert)
+    graph.add_relations_bulk([
+        {
+            "source": user_id,
+            "target": asset_ids[pos["symbol"]],
+            "type": "OWNS",
+            "attributes": {
                 "amount": pos["amount"],
                 "entry_price": pos["entry_price"],
                 "entry_date": "2025-01-15",
             },
-            strength=1.0,
-        )
+            "strength": 1.0,
+        }
+        for pos in new_positions
+    ])
+
+    for pos in new_positions:
+        symbol = pos["symbol"]
 
         # Calculate PnL
         asset = graph.get_entity(asset_ids[symbol])
@@ -174,97 +201,141 @@ async def populate_demo_positions(graph, user_id, asset_ids):
         entry_price = pos["entry_price"]
         pnl_pct = ((current_price - entry_price) / entry_price) * 100
 
-        print(f"✅ Position créée: {pos['amount']} {symbol} @ ${entry_price:,.0f} → ${current_price:,.0f} ({pnl_pct:+.1f}%)")
+        lines.append(f"✅ Position créée: {pos['amount']} {symbol} @ ${entry_price:,.0f} → ${current_price:,.0f} ({pnl_pct:+.1f}%)")
+
+    _emit(lines)
+
+
+def _recent_signals(limit=10):
+    """Derniers signaux du bot (None si le service n'est pas disponible) - bloquant"""
+    # Import paresseux: le service (pandas, ccxt, ...) n'est chargé que pour cette étape
+    from backend.services.trading_bot_service import get_trading_bot_service
+
+    bot_service = get_trading_bot_service()
 
+    if not bot_service:
+        return None
 
-async def populate_patterns_from_signals(graph, asset_ids):
+    if hasattr(bot_service, 'signals_queue') and bot_service.signals_queue:
+        queue = bot_service.signals_queue
+        # Parcours depuis la fin du deque: O(limit), pas O(len(queue))
+        return list(islice(reversed(queue), limit))[::-1]
+    return bot_service.get_signals(limit=limit)
+
+
+async def populate_patterns_from_signals(graph, asset_ids, verbose=False):
     """Créer patterns depuis signaux récents (si disponibles)"""
-    print("\n5️⃣ CRÉATION PATTERNS (depuis signaux)")
-    print("-" * 70)
+    lines = ["\n5️⃣ CRÉATION PATTERNS (depuis signaux)", "-" * 70]
 
     try:
-        bot_service = get_trading_bot_service()
+        # Get recent signals (hors boucle événementielle: les autres étapes avancent pendant ce temps)
+        signals = await asyncio.to_thread(_recent_signals, 10)
 
-        if not bot_service:
-            print("⚠️ Bot service non disponible, skip patterns")
+        if signals is None:
+            lines.append("⚠️ Bot service non disponible, skip patterns")
             return
 
-        # Get recent signals
-        if hasattr(bot_service, 'signals_queue') and bot_service.signals_queue:
-            signals = bot_service.signals_queue[-10:]  # Last 10
-        else:
-            signals = bot_service.get_signals(limit=10)
-
         if not signals:
-            print("⚠️ Aucun signal disponible, skip patterns")
+            lines.append("⚠️ Aucun signal disponible, skip patterns")
             return
 
-        print(f"📊 {len(signals)} signaux trouvés")
+        lines.append(f"📊 {len(signals)} signaux trouvés")
 
-        # Group signals by pattern type
-        pattern_counts = {}
+        # One representative (first occurrence) per pattern type, in a single sweep
+        representatives = {}
         for sig in signals:
             event = sig.get('event', 'unknown')
-            symbol = sig.get('ticker', sig.get('symbol', 'UNKNOWN'))
-
-            if event not in pattern_counts:
-                pattern_counts[event] = []
-            pattern_counts[event].append((symbol, sig))
-
-        # Create pattern entities
-        for pattern_type, occurrences in pattern_counts.items():
-            # Take first occurrence as representative
-            symbol, sig = occurrences[0]
-
-            # Check if pattern already exists
-            existing = graph.find_entities(
-                type="pattern",
-                filters={"pattern_type": pattern_type, "asset": symbol}
-            )
-
-            if existing:
-                print(f"✅ Pattern existe: {pattern_type} on {symbol}")
+            if event not in representatives:
+                representatives[event] = (sig.get('ticker', sig.get('symbol', 'UNKNOWN')), sig)
+
+        # Existing patterns (single lookup)
+        existing_patterns = {
+            (entity.attributes.get("pattern_type"), entity.attributes.get("asset"))
+            for entity in graph.find_entities(type="pattern")
+        }
+
+        new_patterns = []
+        for pattern_type, (symbol, sig) in representatives.items():
+            if (pattern_type, symbol) in existing_patterns:
+                lines.append(f"✅ Pattern existe: {pattern_type} on {symbol}")
                 continue
 
-            # Create pattern entity
-            pattern_id = graph.add_entity(
-                type="pattern",
-                label=f"{pattern_type} on {symbol}",
-                attributes={
+            new_patterns.append((pattern_type, symbol, sig))
+
+        # Create pattern entities (one bulk insert)
+        pattern_ids = graph.add_entities_bulk([
+            {
+                "type": "pattern",
+                "label": f"{pattern_type} on {symbol}",
+                "attributes": {
                     "pattern_type": pattern_type,
                     "asset": symbol,
                     "confidence": sig.get('confidence', 70) / 100.0,
                     "timeframe": "4h",
                     "active": True,
                 },
-                importance=0.7,
-                tags=["detected", "synthetic" if sig.get('synthetic') else "real"],
-            )
+                "importance": 0.7,
+                "tags": ["detected", "synthetic" if sig.get('synthetic') else "real"],
+            }
+            for pattern_type, symbol, sig in new_patterns
+        ])
 
-            print(f"✅ Pattern créé: {pattern_type} on {symbol} ({pattern_id})")
+        # Create DETECTED relations (Asset -> Pattern), mapped via the returned ids
+        relations = []
+        for (pattern_type, symbol, sig), pattern_id in zip(new_patterns, pattern_ids):
+            lines.append(f"✅ Pattern créé: {pattern_type} on {symbol} ({pattern_id})")
 
-            # Create DETECTED relation (Asset -> Pattern)
-            if symbol in asset_ids or f"asset_{symbol}" in graph.entities:
-                asset_id = asset_ids.get(symbol) or f"asset_{symbol}"
+            asset_id = asset_ids.get(symbol)
+            if asset_id is None:
+                fallback_id = f"asset_{symbol}"
+                asset_id = fallback_id if fallback_id in graph.entities else None
 
-                graph.add_relation(
-                    source=asset_id,
-                    target=pattern_id,
-                    type="FOLLOWS",
-                    attributes={"detected_at": sig.get('timestamp', '')},
-                    strength=0.7,
-                )
+            if asset_id:
+                relations.append({
+                    "source": asset_id,
+                    "target": pattern_id,
+                    "type": "FOLLOWS",
+                    "attributes": {"detected_at": sig.get('timestamp', '')},
+                    "strength": 0.7,
+                })
 
-                print(f"   → Relation: {symbol} FOLLOWS {pattern_type}")
+                lines.append(f"   → Relation: {symbol} FOLLOWS {pattern_type}")
+
+        graph.add_relations_bulk(relations)
 
     except Exception as e:
-        print(f"❌ Erreur création patterns: {e}")
-        import traceback
-        traceback.print_exc()
+        lines.append(f"❌ Erreur création patterns: {e}")
+        if verbose:
+            traceback.print_exc()
+
+    finally:
+        _emit(lines)
+
+
+def parse_args(argv=None):
+    """Options CLI (les questions interactives ne sont posées que sur un TTY)"""
+    parser = argparse.ArgumentParser(description="Population initiale Entity Graph")
+    parser.add_argument("--reset", action="store_true", help="Reset le graphe existant")
+    parser.add_argument("--demo-positions", action="store_true", help="Créer les positions démo")
+    parser.add_argument("--yes", "-y", action="store_true", help="Répondre oui à toutes les questions")
+    parser.add_argument("--snapshot", action="store_true", help="Écrire aussi le snapshot du graphe")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Afficher la trace complète des erreurs")
+    return parser.parse_args(argv)
 
 
-async def main():
+def confirm(flag, prompt, assume_yes=False):
+    """Flag CLI, sinon --yes, sinon question (TTY uniquement; 'non' en mode batch)"""
+    if flag or assume_yes:
+        return True
+    if not sys.stdin.isatty():
+        return False
+    return input(prompt).strip().lower() == 'y'
+
+
+async def main(args=None):
     """Peuple le graphe d'entités"""
+    args = args or parse_args()
+
     print("=" * 70)
     print("POPULATION ENTITY GRAPH")
     print("=" * 70)
@@ -273,8 +344,7 @@ async def main():
     agent_id = "fededge_core_v3"
 
     # Ask user if reset
-    response = input("\n⚠️ Reset graph existant? (y/N): ").strip().lower()
-    if response == 'y':
+    if confirm(args.reset, "\n⚠️ Reset graph existant? (y/N): ", args.yes):
         reset_entity_graph(agent_id)
         print("✅ Graph reset")
 
@@ -292,21 +362,24 @@ async def main():
         # 2. Assets
         asset_ids = await populate_assets(graph)
 
-        # 3. Favorites
-        await populate_user_favorites(graph, user_id, asset_ids)
+        # 3-5. Favorites, demo positions (optional) and patterns only depend on
+        # user/assets: run them concurrently. Graph mutations all happen on the
+        # event loop thread, so no lock is needed.
+        create_demo = confirm(args.demo_positions, "\n💰 Créer positions démo? (y/N): ", args.yes)
 
-        # 4. Demo positions (optional)
-        create_demo = input("\n💰 Créer positions démo? (y/N): ").strip().lower()
-        if create_demo == 'y':
-            await populate_demo_positions(graph, user_id, asset_ids)
+        stages = [
+            populate_patterns_from_signals(graph, asset_ids, verbose=args.verbose),
+            populate_user_favorites(graph, user_id, asset_ids),
+        ]
+        if create_demo:
+            stages.append(populate_demo_positions(graph, user_id, asset_ids))
 
-        # 5. Patterns from signals
-        await populate_patterns_from_signals(graph, asset_ids)
+        await asyncio.gather(*stages)
 
     except Exception as e:
         print(f"\n❌ Erreur: {e}")
-        import traceback
-        traceback.print_exc()
+        if args.verbose:
+            traceback.print_exc()
         return 1
 
     # Summary
@@ -325,8 +398,11 @@ async def main():
     positions = graph.get_user_positions(user_id)
     if positions:
         print(f"\n💰 Positions:")
-        for pos in positions:
-            pnl_pct = ((pos['current_price'] - pos['entry_price']) / pos['entry_price']) * 100
+        # PnL de toutes les positions en une opération vectorisée
+        current = np.fromiter((pos['current_price'] for pos in positions), dtype=np.float64, count=len(positions))
+        entry = np.fromiter((pos['entry_price'] for pos in positions), dtype=np.float64, count=len(positions))
+        pnl = (current - entry) / entry * 100.0
+        for pos, pnl_pct in zip(positions, pnl):
             print(f"   - {pos['symbol']}: {pos['amount']} @ ${pos['entry_price']:,.0f} → ${pos['current_price']:,.0f} ({pnl_pct:+.1f}%)")
 
     print(f"\n✅ Population terminée!")
@@ -334,18 +410,34 @@ async def main():
     # Save to SQL (Phase 2.5)
     print(f"\n💾 Sauvegarde SQL...")
     try:
-        graph.save_to_sql()
+        graph.save_to_sql(bulk_load=True)
         print(f"✅ Sauvegarde SQL réussie!")
         print(f"   Le graphe persistera entre les redémarrages")
     except Exception as e:
         print(f"⚠️ Erreur sauvegarde SQL: {e}")
         print(f"   Le graphe reste en mémoire uniquement")
 
+    # Snapshot (chargé au démarrage avec run_server.py --snapshot)
+    if args.snapshot:
+        try:
+            snapshot = graph.save_snapshot()
+            print(f"✅ Snapshot sauvegardé: {snapshot}")
+        except Exception as e:
+            print(f"⚠️ Erreur snapshot: {e}")
+
     print(f"\n📝 Le graphe est maintenant prêt pour Phase 2.5 (avec persistence SQL)")
 
     return 0
 
 
 if __name__ == "__main__":
-    exit_code = asyncio.run(main())
+    # uvloop (libuv) si disponible, sinon boucle asyncio standard (Windows)
+    run_loop = asyncio.run
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            run_loop = uvloop.run
+        except ImportError:
+            pass
+    exit_code = run_loop(main())
     sys.exit(exit_code)
@@ -11,6 +11,10 @@ if __name__ == "__main__":
     # Assurer que le PYTHONPATH est correct
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+    # --snapshot: charger les graphes d'entités depuis leur snapshot plutôt que SQL
+    if "--snapshot" in sys.argv:
+        os.environ["ENTITY_GRAPH_SNAPSHOT"] = "1"
+
     # Initialize FedEdge Node Client
     try:
         from fededge_node_client import FedEdgeNodeClient
@@ -22,6 +26,15 @@ if __name__ == "__main__":
         print(f"⚠️  FedEdge Node Client failed to initialize: {e}")
         print("   Application will run without node tracking")
 
+    # Boucle uvloop (libuv) si disponible, sinon asyncio standard (Windows)
+    loop = "asyncio"
+    if sys.platform != "win32":
+        try:
+            import uvloop  # noqa: F401
+            loop = "uvloop"
+        except ImportError:
+            pass
+
     # Lancer le serveur FastAPI
     # reload=False en production pour éviter les déconnexions WebSocket
     uvicorn.run(
@@ -29,5 +42,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=False,  # IMPORTANT: désactivé pour stabilité WebSocket
+        loop=loop,
+        ws_per_message_deflate=False,  # gros broadcasts déjà compressés une fois côté app
         log_level="info"
     )
@@ -9,6 +9,16 @@ BIN_DEFAULT="./bin/llama-server"
 CHAT_MODEL_DEFAULT="./models/unsloth_gemma-3-4b-it-GGUF_gemma-3-4b-it-Q4_K_M.gguf"
 CHAT_PORT_DEFAULT="${CHAT_PORT:-9001}"
 
+# Contexte par requête du serveur chat (historique + system/RAG prompt)
+CHAT_CTX_DEFAULT="${CHAT_CTX:-4096}"
+# Batching continu: N slots parallèles partagent un même batch. llama-server répartit
+# le contexte entre les slots, il est donc multiplié par N (KV cache N fois plus gros).
+# 1 par défaut; ex. CHAT_PARALLEL=8 pour les appels dspy.Parallel de example_agent_llamacpp.py
+CHAT_PARALLEL_DEFAULT="${CHAT_PARALLEL:-1}"
+CHAT_BATCH_SIZE_DEFAULT="${CHAT_BATCH_SIZE:-512}"
+# Réutilisation du KV cache pour les préfixes communs (min. tokens par morceau réutilisé)
+CHAT_CACHE_REUSE_DEFAULT="${CHAT_CACHE_REUSE:-256}"
+
 EMB_MODEL_DEFAULT="./models/unsloth_embeddinggemma-300m-GGUF_embeddinggemma-300M-Q8_0.gguf"
 EMB_PORT_DEFAULT="${EMB_PORT:-9002}"
 
@@ -136,13 +146,18 @@ BIN="${LLAMA_BIN:-$BIN_DEFAULT}"
 
 CHAT_MODEL="${LLAMA_CHAT_MODEL:-$CHAT_MODEL_DEFAULT}"
 CHAT_PORT="${CHAT_PORT:-$CHAT_PORT_DEFAULT}"
+CHAT_CTX="${CHAT_CTX:-$CHAT_CTX_DEFAULT}"
+CHAT_PARALLEL="${CHAT_PARALLEL:-$CHAT_PARALLEL_DEFAULT}"
+CHAT_BATCH_SIZE="${CHAT_BATCH_SIZE:-$CHAT_BATCH_SIZE_DEFAULT}"
+CHAT_CACHE_REUSE="${CHAT_CACHE_REUSE:-$CHAT_CACHE_REUSE_DEFAULT}"
 
 EMB_MODEL="${LLAMA_EMB_MODEL:-$EMB_MODEL_DEFAULT}"
 EMB_PORT="${EMB_PORT:-$EMB_PORT_DEFAULT}"
 
 # === Lancements ===============================================================
-# Chat server : avec GPU si disponible
-start_server "chat" "$BIN" "$CHAT_MODEL" "$CHAT_PORT" "$GPU_FLAGS"
+# Chat server : avec GPU si disponible + batching continu (requêtes parallèles fusionnées,
+# CHAT_CTX tokens par slot) + réutilisation du KV cache des préfixes partagés
+start_server "chat" "$BIN" "$CHAT_MODEL" "$CHAT_PORT" "$GPU_FLAGS -c $((CHAT_CTX * CHAT_PARALLEL)) -np $CHAT_PARALLEL --batch-size $CHAT_BATCH_SIZE --cache-reuse $CHAT_CACHE_REUSE"
 
 # Embeddings server : avec GPU si disponible + mode embeddings
 start_server "embeddings" "$BIN" "$EMB_MODEL" "$EMB_PORT" "$GPU_FLAGS --embedding"
@@ -7,6 +7,9 @@ Valide le fonctionnement du graphe d'entités-relations
 
 import sys
 from pathlib import Path
+
+import numpy as np
+
 sys.path.insert(0, str(Path(__file__).parent))
 
 from backend.entity_memory import (
@@ -14,6 +17,10 @@ from backend.entity_memory import (
     reset_entity_graph,
 )
 
+# Ids des entités canoniques créées par test_1/test_2, réutilisés par les tests
+# suivants (pas de find_entities sur tout le graphe pour les retrouver)
+FIXTURES = {}
+
 
 def test_1_basic_crud():
     """Test 1: CRUD de base"""
@@ -22,7 +29,8 @@ def test_1_basic_crud():
     print("=" * 70)
 
     reset_entity_graph("test_agent")
-    graph = get_entity_graph("test_agent")
+    # Graphe en mémoire uniquement: pas de chargement SQL (plus rapide, pas d'état hérité de la base)
+    graph = get_entity_graph("test_agent", auto_load=False)
 
     # Create user
     user_id = graph.add_entity(
@@ -69,6 +77,8 @@ def test_1_basic_crud():
     )
     print(f"✅ Relation created: {user_id} WATCHES {eth_id}")
 
+    FIXTURES.update(user_id=user_id, btc_id=btc_id, eth_id=eth_id)
+
     # Read
     user = graph.get_entity(user_id)
     print(f"\n📊 User: {user.label}")
@@ -79,8 +89,11 @@ def test_1_basic_crud():
     # Query positions
     positions = graph.get_user_positions(user_id)
     print(f"\n💰 Positions:")
-    for pos in positions:
-        pnl_pct = ((pos['current_price'] - pos['entry_price']) / pos['entry_price']) * 100
+    # PnL de toutes les positions en une opération vectorisée
+    current = np.fromiter((pos['current_price'] for pos in positions), dtype=np.float64, count=len(positions))
+    entry = np.fromiter((pos['entry_price'] for pos in positions), dtype=np.float64, count=len(positions))
+    pnl = (current - entry) / entry * 100.0
+    for pos, pnl_pct in zip(positions, pnl):
         print(f"   - {pos['symbol']}: {pos['amount']} @ ${pos['entry_price']:,.0f} → ${pos['current_price']:,.0f} ({pnl_pct:+.1f}%)")
 
     print(f"\n✅ Test 1 PASSED")
@@ -95,14 +108,12 @@ def test_2_pattern_tracking():
 
     graph = get_entity_graph("test_agent")
 
-    # Find BTC asset
-    btc_entities = graph.find_entities(type="asset", filters={"symbol": "BTC"})
-    if not btc_entities:
+    # BTC asset (créé par test_1)
+    btc_id = FIXTURES.get("btc_id")
+    if btc_id is None or graph.get_entity(btc_id) is None:
         print("❌ BTC asset not found")
         return False
 
-    btc = btc_entities[0]
-
     # Create pattern detected on BTC
     pattern_id = graph.add_entity(
         type="pattern",
@@ -120,7 +131,7 @@ def test_2_pattern_tracking():
 
     # Relation: BTC FOLLOWS pattern
     graph.add_relation(
-        source=btc.id,
+        source=btc_id,
         target=pattern_id,
         type="FOLLOWS",
         attributes={"detected_at": "2025-11-20T10:00:00Z"},
@@ -175,6 +186,8 @@ def test_2_pattern_tracking():
     )
     print(f"✅ Relation: signal RESULTED_IN outcome")
 
+    FIXTURES.update(pattern_id=pattern_id, signal_id=signal_id, outcome_id=outcome_id)
+
     # Query pattern occurrences
     occurrences = graph.get_pattern_occurrences("golden_cross", asset="BTC")
     print(f"\n📈 Pattern occurrences (golden_cross on BTC):")
@@ -197,22 +210,16 @@ def test_3_decision_history():
 
     graph = get_entity_graph("test_agent")
 
-    # Get user
-    users = graph.find_entities(type="user")
-    if not users:
+    user_id = FIXTURES.get("user_id")
+    if user_id is None:
         print("❌ User not found")
         return False
 
-    user = users[0]
-
-    # Get signal
-    signals = graph.find_entities(type="signal")
-    if not signals:
+    signal_id = FIXTURES.get("signal_id")
+    if signal_id is None:
         print("❌ Signal not found")
         return False
 
-    signal = signals[0]
-
     # Create decision
     decision_id = graph.add_entity(
         type="decision",
@@ -229,7 +236,7 @@ def test_3_decision_history():
 
     # User DECIDED
     graph.add_relation(
-        source=user.id,
+        source=user_id,
         target=decision_id,
         type="DECIDED",
         attributes={"reasoning": "Golden cross pattern detected"},
@@ -239,25 +246,25 @@ def test_3_decision_history():
     # Decision BASED_ON signal
     graph.add_relation(
         source=decision_id,
-        target=signal.id,
+        target=signal_id,
         type="BASED_ON",
         attributes={},
     )
     print(f"✅ Relation: decision BASED_ON signal")
 
     # Decision RESULTED_IN outcome
-    outcomes = graph.find_entities(type="outcome")
-    if outcomes:
+    outcome_id = FIXTURES.get("outcome_id")
+    if outcome_id:
         graph.add_relation(
             source=decision_id,
-            target=outcomes[0].id,
+            target=outcome_id,
             type="RESULTED_IN",
             attributes={},
         )
         print(f"✅ Relation: decision RESULTED_IN outcome")
 
     # Query decision history
-    history = graph.get_decision_history(user.id)
+    history = graph.get_decision_history(user_id)
     print(f"\n📜 Decision history:")
     for dec in history:
         print(f"   Decision: {dec['decision']}")
@@ -279,16 +286,13 @@ def test_4_graph_queries():
 
     graph = get_entity_graph("test_agent")
 
-    # Get user
-    users = graph.find_entities(type="user")
-    if not users:
+    user_id = FIXTURES.get("user_id")
+    if user_id is None:
         print("❌ User not found")
         return False
 
-    user = users[0]
-
     # Neighborhood
-    neighborhood = graph.neighborhood(user.id, radius=2, max_entities=20)
+    neighborhood = graph.neighborhood(user_id, radius=2, max_entities=20)
     print(f"✅ Neighborhood (radius=2):")
     print(f"   Entities: {len(neighborhood['entities'])}")
     print(f"   Relations: {len(neighborhood['relations'])}")
@@ -298,11 +302,14 @@ def test_4_graph_queries():
         print(f"   - {ent['type']}: {ent['label']}")
 
     # Path between user and outcome
-    outcomes = graph.find_entities(type="outcome")
-    if outcomes:
-        paths = graph.path_between(user.id, outcomes[0].id, max_depth=3)
+    outcome_id = FIXTURES.get("outcome_id")
+    if outcome_id:
+        paths = graph.path_between(user_id, outcome_id, max_depth=3)
         print(f"\n✅ Paths from user to outcome:")
         print(f"   Found {len(paths)} path(s)")
+        if not paths or any(path[0] != user_id or path[-1] != outcome_id or len(path) > 4 for path in paths):
+            print(f"❌ Invalid paths: {paths}")
+            return False
         for i, path in enumerate(paths[:3]):
             entities_labels = []
             for eid in path:
@@ -349,10 +356,101 @@ def test_5_serialization():
         print(f"❌ Relation count mismatch")
         return False
 
+    # Snapshot bytes → restore en place
+    graph3 = EntityGraph(agent_id="test_agent")
+    graph3.restore(graph.snapshot())
+    if graph3.to_dict() != data:
+        print(f"❌ Snapshot restore mismatch")
+        return False
+    print(f"✅ Snapshot restored in place")
+
     print(f"\n✅ Test 5 PASSED")
     return True
 
 
+def test_6_bulk_insert():
+    """Test 6: Insertion en masse (add_entities_bulk / add_relations_bulk)"""
+    print("\n" + "=" * 70)
+    print("TEST 6: Bulk insert")
+    print("=" * 70)
+
+    reset_entity_graph("test_agent_bulk")
+    graph = get_entity_graph("test_agent_bulk", auto_load=False)
+
+    user_id = graph.add_entity(type="user", label="Bob")
+    asset_ids = graph.add_entities_bulk([
+        {"type": "asset", "label": symbol, "attributes": {"symbol": symbol}, "entity_id": f"asset_{symbol}"}
+        for symbol in ["BTC", "ETH", "SOL"]
+    ])
+    print(f"✅ Assets created: {asset_ids}")
+
+    if asset_ids != ["asset_BTC", "asset_ETH", "asset_SOL"] or len(graph.find_entities(type="asset")) != 3:
+        print(f"❌ Bulk entities not indexed")
+        return False
+
+    graph.add_relations_bulk([
+        {"source": user_id, "target": asset_id, "type": "WATCHES"}
+        for asset_id in asset_ids
+    ])
+    print(f"✅ Relations created: {len(graph.relations)}")
+
+    if len(graph.get_relations(user_id, "out", "WATCHES")) != 3:
+        print(f"❌ Bulk relations not indexed")
+        return False
+
+    if not graph.has_relation(user_id, "asset_ETH", "WATCHES") or graph.has_relation(user_id, "asset_ETH", "OWNS"):
+        print(f"❌ has_relation mismatch")
+        return False
+
+    if abs(graph.get_entity(user_id).consolidation - 0.15) > 1e-9:
+        print(f"❌ Consolidation mismatch: {graph.get_entity(user_id).consolidation}")
+        return False
+
+    # Unknown target: nothing must be inserted
+    try:
+        graph.add_relations_bulk([
+            {"source": user_id, "target": "asset_BTC", "type": "OWNS"},
+            {"source": user_id, "target": "missing", "type": "OWNS"},
+        ])
+        print(f"❌ Missing entity not rejected")
+        return False
+    except ValueError:
+        pass
+
+    if len(graph.relations) != 3:
+        print(f"❌ Partial bulk insert")
+        return False
+    print(f"✅ Invalid batch rejected without partial insert")
+
+    graph.remove_relation(graph.get_relations(user_id, "out", "WATCHES")[0].id)
+    graph.remove_entity("asset_SOL")
+    if graph.has_relation(user_id, "asset_BTC", "WATCHES") or graph.has_relation(user_id, "asset_SOL", "WATCHES"):
+        print(f"❌ Adjacency not updated on removal")
+        return False
+    print(f"✅ Adjacency updated on removal")
+
+    # Relations orphelines (suppression sans cascade): plus de chemin par l'entité supprimée
+    graph.add_entities_bulk([
+        {"type": "asset", "label": label, "entity_id": label}
+        for label in ["a", "b", "c"]
+    ])
+    graph.add_relations_bulk([
+        {"source": "a", "target": "b", "type": "CORRELATES"},
+        {"source": "b", "target": "c", "type": "CORRELATES"},
+    ])
+    if graph.path_between("a", "c") != [["a", "b", "c"]]:
+        print(f"❌ Path a → b → c not found")
+        return False
+    graph.remove_entity("b", cascade=False)
+    if graph.path_between("a", "c") != []:
+        print(f"❌ Path through removed entity: {graph.path_between('a', 'c')}")
+        return False
+    print(f"✅ No path through removed entity")
+
+    print(f"\n✅ Test 6 PASSED")
+    return True
+
+
 def main():
     """Run all tests"""
     print("\n" + "🧪" * 35)
@@ -367,6 +465,7 @@ def main():
         ("Decision History", test_3_decision_history),
         ("Graph Queries", test_4_graph_queries),
         ("Serialization", test_5_serialization),
+        ("Bulk Insert", test_6_bulk_insert),
     ]
 
     for name, test_func in tests:
@@ -7,14 +7,12 @@ Génère des signaux synthétiques et force une mise à jour de la conscience
 import asyncio
 import sys
 import time
-import requests
+import httpx
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from backend.services.synthetic_signals import generate_signal_batch
-from backend.services.trading_bot_service import get_trading_bot_service
 from backend.agent_runtime import get_agent_runtime
 from backend.agent_core_types import EventKind, Topic
 
@@ -25,6 +23,10 @@ async def test_1_synthetic_signals():
     print("TEST 1: Génération signaux synthétiques")
     print("=" * 70)
 
+    # Import paresseux: le service (pandas, ccxt, ...) n'est chargé que pour ce test
+    from backend.services.synthetic_signals import generate_signal_batch
+    from backend.services.trading_bot_service import get_trading_bot_service
+
     # Générer 5 signaux (scénario extreme_fear = oversold)
     signals = generate_signal_batch(count=5, scenario="extreme_fear")
 
@@ -44,6 +46,19 @@ async def test_1_synthetic_signals():
     return True
 
 
+async def wait_for_consciousness(runtime, since: float, timeout: float = 5.0, interval: float = 0.05):
+    """Attend une conscience V2 plus récente que since (polling court, timeout de sécurité)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        mem = await runtime.store.load()
+        consciousness_v2 = mem.working.get("global_consciousness_v2")
+        if consciousness_v2 and consciousness_v2.get("timestamp", 0) >= since:
+            return consciousness_v2
+        if time.monotonic() >= deadline:
+            return consciousness_v2
+        await asyncio.sleep(interval)
+
+
 async def test_2_trigger_consciousness_update():
     """Test 2: Forcer une mise à jour de la conscience"""
     print("\n" + "=" * 70)
@@ -56,6 +71,7 @@ async def test_2_trigger_consciousness_update():
         return False
 
     # Poster un event market_tick pour déclencher UPDATE_CONSCIOUSNESS
+    posted_at = time.time()
     await runtime.post_event(
         kind=EventKind.MISSION_UPDATE,
         topic=Topic.SYSTEM,
@@ -68,12 +84,10 @@ async def test_2_trigger_consciousness_update():
     )
 
     print("✅ Event market_tick posté")
-    print("⏳ Attente traitement (5s)...")
-    await asyncio.sleep(5)
+    print("⏳ Attente traitement (max 5s)...")
 
-    # Vérifier la working memory
-    mem = await runtime.store.load()
-    consciousness_v2 = mem.working.get("global_consciousness_v2")
+    # Vérifier la working memory (dès que la conscience est mise à jour)
+    consciousness_v2 = await wait_for_consciousness(runtime, since=posted_at)
 
     if consciousness_v2:
         print("\n✅ Conscience V2 présente dans working memory")
@@ -121,17 +135,17 @@ async def test_2_trigger_consciousness_update():
         return False
 
 
-async def test_3_api_scan_synthetic():
+async def test_3_api_scan_synthetic(client: httpx.AsyncClient):
     """Test 3: API /trading-bot/scan avec synthetic"""
     print("\n" + "=" * 70)
     print("TEST 3: API scan synthétique")
     print("=" * 70)
 
     try:
-        response = requests.post(
+        # Client async partagé: la requête ne bloque pas la boucle (tests exécutés en parallèle)
+        response = await client.post(
             "http://localhost:5000/trading-bot/scan",
             json={"use_synthetic": True, "scenario": "bullish"},
-            timeout=10
         )
 
         if response.status_code == 200:
@@ -183,38 +197,28 @@ async def main():
     print("VALIDATION PHASE 1 - Conscience Multi-Sources")
     print("🧪" * 35)
 
-    results = {}
-
-    # Test 1: Signaux synthétiques
-    try:
-        results['test_1'] = await test_1_synthetic_signals()
-    except Exception as e:
-        print(f"\n❌ Test 1 failed: {e}")
-        results['test_1'] = False
-
-    # Attendre un peu
-    await asyncio.sleep(2)
-
-    # Test 2: Mise à jour conscience
-    try:
-        results['test_2'] = await test_2_trigger_consciousness_update()
-    except Exception as e:
-        print(f"\n❌ Test 2 failed: {e}")
-        results['test_2'] = False
-
-    # Test 3: API
-    try:
-        results['test_3'] = await test_3_api_scan_synthetic()
-    except Exception as e:
-        print(f"\n❌ Test 3 failed: {e}")
-        results['test_3'] = False
+    async def run_test(number, test_func, *args):
+        try:
+            return await test_func(*args)
+        except Exception as e:
+            print(f"\n❌ Test {number} failed: {e}")
+            return False
 
-    # Test 4: Broadcast
-    try:
-        results['test_4'] = await test_4_check_broadcast()
-    except Exception as e:
-        print(f"\n❌ Test 4 failed: {e}")
-        results['test_4'] = False
+    async def run_consciousness_tests():
+        # Test 2 dépend des signaux injectés par le test 1: séquentiels
+        test_1 = await run_test(1, test_1_synthetic_signals)
+        test_2 = await run_test(2, test_2_trigger_consciousness_update)
+        return test_1, test_2
+
+    # Tests 3 (API) et 4 (broadcast) sont indépendants: exécutés en même temps.
+    # Un seul client HTTP (connexions keep-alive réutilisées par les tests API)
+    async with httpx.AsyncClient(timeout=10) as client:
+        (test_1, test_2), test_3, test_4 = await asyncio.gather(
+            run_consciousness_tests(),
+            run_test(3, test_3_api_scan_synthetic, client),
+            run_test(4, test_4_check_broadcast),
+        )
+    results = {'test_1': test_1, 'test_2': test_2, 'test_3': test_3, 'test_4': test_4}
 
     # Résumé
     print("\n" + "=" * 70)
@@ -11,18 +11,31 @@ Simule un cycle complet :
 """
 
 import asyncio
+import os
 import sys
+import traceback
 from pathlib import Path
+
+import numpy as np
+
 sys.path.insert(0, str(Path(__file__).parent))
 
 from backend.entity_memory import get_entity_graph, reset_entity_graph
 
+# FEDEDGE_TEST_COLD_RESTART=1: phase 2 recharge réellement depuis SQL (sinon
+# restauration du graphe depuis un snapshot en mémoire, sans relecture SQL)
+COLD_RESTART = bool(os.getenv("FEDEDGE_TEST_COLD_RESTART"))
+
+
+def _emit(lines):
+    """Affiche une section en une seule écriture (pas un write par ligne)"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
 
 async def phase_1_populate():
     """Phase 1: Peupler le graphe"""
-    print("=" * 70)
-    print("PHASE 1: POPULATION + SAVE SQL")
-    print("=" * 70)
+    lines = ["=" * 70, "PHASE 1: POPULATION + SAVE SQL", "=" * 70]
 
     agent_id = "fededge_core_v3"
 
@@ -32,95 +45,82 @@ async def phase_1_populate():
     # Get graph WITHOUT auto-load (fresh start)
     graph = get_entity_graph(agent_id, auto_load=False)
 
-    # Create user
-    user_id = graph.add_entity(
-        type="user",
-        label="Test User Phase 2.5",
-        attributes={
-            "user_id": "default_user",
-            "risk_profile": "aggressive",
-            "portfolio_value": 150000,
+    # Create entities (one bulk insert)
+    user_id, btc_id, eth_id, pattern_id, outcome_id = graph.add_entities_bulk([
+        {
+            "type": "user",
+            "label": "Test User Phase 2.5",
+            "attributes": {
+                "user_id": "default_user",
+                "risk_profile": "aggressive",
+                "portfolio_value": 150000,
+            },
+            "importance": 1.0,
+            "entity_id": "user_default",
         },
-        importance=1.0,
-        entity_id="user_default",
-    )
-    print(f"✅ User: {user_id}")
-
-    # Create assets
-    btc_id = graph.add_entity(
-        type="asset",
-        label="Bitcoin",
-        attributes={"symbol": "BTC", "price": 90600},
-        importance=1.0,
-        entity_id="asset_BTC",
-    )
-    print(f"✅ Asset: BTC")
-
-    eth_id = graph.add_entity(
-        type="asset",
-        label="Ethereum",
-        attributes={"symbol": "ETH", "price": 3005},
-        importance=0.9,
-        entity_id="asset_ETH",
-    )
-    print(f"✅ Asset: ETH")
-
-    # Create positions
-    graph.add_relation(
-        source=user_id,
-        target=btc_id,
-        type="OWNS",
-        attributes={"amount": 0.5, "entry_price": 45000},
-        strength=1.0,
-    )
-    print(f"✅ Position: 0.5 BTC @ $45,000")
-
-    graph.add_relation(
-        source=user_id,
-        target=eth_id,
-        type="OWNS",
-        attributes={"amount": 2.0, "entry_price": 2800},
-        strength=1.0,
-    )
-    print(f"✅ Position: 2.0 ETH @ $2,800")
-
-    # Create pattern with outcome
-    pattern_id = graph.add_entity(
-        type="pattern",
-        label="Golden Cross BTC",
-        attributes={
-            "pattern_type": "golden_cross",
-            "asset": "BTC",
-            "confidence": 0.85,
+        {
+            "type": "asset",
+            "label": "Bitcoin",
+            "attributes": {"symbol": "BTC", "price": 90600},
+            "importance": 1.0,
+            "entity_id": "asset_BTC",
         },
-        importance=0.8,
-    )
-
-    graph.add_relation(
-        source=btc_id,
-        target=pattern_id,
-        type="FOLLOWS",
-        attributes={},
-    )
-
-    outcome_id = graph.add_entity(
-        type="outcome",
-        label="GC BTC Success",
-        attributes={"pnl_pct": 12.5, "duration_hours": 48},
-    )
-
-    graph.add_relation(
-        source=pattern_id,
-        target=outcome_id,
-        type="RESULTED_IN",
-        attributes={},
-    )
-
-    print(f"✅ Pattern + Outcome: golden_cross BTC → +12.5%")
-
-    print(f"\n📊 Graph état:")
-    print(f"   Entities: {len(graph.entities)}")
-    print(f"   Relations: {len(graph.relations)}")
+        {
+            "type": "asset",
+            "label": "Ethereum",
+            "attributes": {"symbol": "ETH", "price": 3005},
+            "importance": 0.9,
+            "entity_id": "asset_ETH",
+        },
+        {
+            "type": "pattern",
+            "label": "Golden Cross BTC",
+            "attributes": {
+                "pattern_type": "golden_cross",
+                "asset": "BTC",
+                "confidence": 0.85,
+            },
+            "importance": 0.8,
+        },
+        {
+            "type": "outcome",
+            "label": "GC BTC Success",
+            "attributes": {"pnl_pct": 12.5, "duration_hours": 48},
+        },
+    ])
+    lines.append(f"✅ User: {user_id}")
+    lines.append(f"✅ Asset: BTC")
+    lines.append(f"✅ Asset: ETH")
+
+    # Create positions + pattern/outcome relations (one bulk insert)
+    graph.add_relations_bulk([
+        {
+            "source": user_id,
+            "target": btc_id,
+            "type": "OWNS",
+            "attributes": {"amount": 0.5, "entry_price": 45000},
+            "strength": 1.0,
+        },
+        {
+            "source": user_id,
+            "target": eth_id,
+            "type": "OWNS",
+            "attributes": {"amount": 2.0, "entry_price": 2800},
+            "strength": 1.0,
+        },
+        {"source": btc_id, "target": pattern_id, "type": "FOLLOWS"},
+        {"source": pattern_id, "target": outcome_id, "type": "RESULTED_IN"},
+    ])
+    lines.append(f"✅ Position: 0.5 BTC @ $45,000")
+    lines.append(f"✅ Position: 2.0 ETH @ $2,800")
+
+    lines.append(f"✅ Pattern + Outcome: golden_cross BTC → +12.5%")
+
+    lines.append(f"\n📊 Graph état:")
+    lines.append(f"   Entities: {len(graph.entities)}")
+    lines.append(f"   Relations: {len(graph.relations)}")
+
+    _emit(lines)
 
     # SAVE TO SQL
     print(f"\n💾 Sauvegarde SQL...")
@@ -138,15 +138,23 @@ async def phase_2_restart_and_load():
 
     agent_id = "fededge_core_v3"
 
+    # Snapshot en mémoire du graphe sauvegardé (mode warm)
+    blob = None if COLD_RESTART else get_entity_graph(agent_id, auto_load=False).snapshot()
+
     # Reset in-memory (simule restart)
     print(f"🔄 Reset in-memory graph (simule restart)...")
     reset_entity_graph(agent_id)
 
-    # Get graph WITH auto-load (should load from SQL)
-    print(f"📂 Load from SQL (auto-load=True)...")
-    graph = get_entity_graph(agent_id, auto_load=True)
+    if COLD_RESTART:
+        # Get graph WITH auto-load (should load from SQL)
+        print(f"📂 Load from SQL (auto-load=True)...")
+        graph = get_entity_graph(agent_id, auto_load=True)
+    else:
+        print(f"📂 Restore from in-memory snapshot (FEDEDGE_TEST_COLD_RESTART=1 pour relire SQL)...")
+        graph = get_entity_graph(agent_id, auto_load=False)
+        graph.restore(blob)
 
-    print(f"\n📊 Graph après load SQL:")
+    print(f"\n📊 Graph après load:")
     print(f"   Entities: {len(graph.entities)}")
     print(f"   Relations: {len(graph.relations)}")
 
@@ -171,8 +179,11 @@ async def phase_2_restart_and_load():
         return False
 
     print(f"\n💰 Positions restaurées:")
-    for pos in positions:
-        pnl_pct = ((pos['current_price'] - pos['entry_price']) / pos['entry_price']) * 100
+    # PnL de toutes les positions en une opération vectorisée
+    current = np.fromiter((pos['current_price'] for pos in positions), dtype=np.float64, count=len(positions))
+    entry = np.fromiter((pos['entry_price'] for pos in positions), dtype=np.float64, count=len(positions))
+    pnl = (current - entry) / entry * 100.0
+    for pos, pnl_pct in zip(positions, pnl):
         print(f"   - {pos['symbol']}: {pos['amount']} @ ${pos['entry_price']:,.0f} → ${pos['current_price']:,.0f} ({pnl_pct:+.1f}%)")
 
     # Verify patterns
@@ -185,7 +196,7 @@ async def phase_2_restart_and_load():
     for p in patterns:
         print(f"   - {p.label} ({p.attributes.get('confidence', 0):.0%})")
 
-    print(f"\n✅ TOUTES LES DONNÉES RESTAURÉES DEPUIS SQL!")
+    print(f"\n✅ TOUTES LES DONNÉES RESTAURÉES DEPUIS {'SQL' if COLD_RESTART else 'LE SNAPSHOT'}!")
     return True
 
 
@@ -249,8 +260,9 @@ async def cleanup():
         from backend.db.models import SessionLocal, AgentEntityNode, AgentEntityRelation
 
         with SessionLocal() as db:
-            deleted_rels = db.query(AgentEntityRelation).filter_by(agent_id="fededge_core_v3").delete()
-            deleted_nodes = db.query(AgentEntityNode).filter_by(agent_id="fededge_core_v3").delete()
+            # DELETE en masse dans une seule transaction (session vide: pas de synchronisation)
+            deleted_rels = db.query(AgentEntityRelation).filter_by(agent_id="fededge_core_v3").delete(synchronize_session=False)
+            deleted_nodes = db.query(AgentEntityNode).filter_by(agent_id="fededge_core_v3").delete(synchronize_session=False)
             db.commit()
 
             print(f"✅ Cleanup: {deleted_nodes} entities, {deleted_rels} relations deleted")
@@ -269,33 +281,22 @@ async def main():
     print("🧪" * 35)
 
     results = {}
-
-    # Phase 1: Populate + Save
-    try:
-        results["populate"] = await phase_1_populate()
-    except Exception as e:
-        print(f"\n❌ Phase 1 failed: {e}")
-        import traceback
-        traceback.print_exc()
-        results["populate"] = False
-
-    # Phase 2: Restart + Load
-    try:
-        results["restart_load"] = await phase_2_restart_and_load()
-    except Exception as e:
-        print(f"\n❌ Phase 2 failed: {e}")
-        import traceback
-        traceback.print_exc()
-        results["restart_load"] = False
-
-    # Phase 3: Consciousness
-    try:
-        results["consciousness"] = await phase_3_consciousness()
-    except Exception as e:
-        print(f"\n❌ Phase 3 failed: {e}")
-        import traceback
-        traceback.print_exc()
-        results["consciousness"] = False
+    # Tracebacks collectés et affichés une seule fois après le résumé
+    failures = []
+
+    phases = [
+        ("populate", phase_1_populate),              # Phase 1: Populate + Save
+        ("restart_load", phase_2_restart_and_load),  # Phase 2: Restart + Load
+        ("consciousness", phase_3_consciousness),    # Phase 3: Consciousness
+    ]
+
+    for number, (phase, phase_func) in enumerate(phases, 1):
+        try:
+            results[phase] = await phase_func()
+        except Exception as e:
+            print(f"\n❌ Phase {number} failed: {e}")
+            failures.append((phase, traceback.format_exc()))
+            results[phase] = False
 
     # Cleanup
     await cleanup()
@@ -309,6 +310,12 @@ async def main():
         status = "✅ PASS" if result else "❌ FAIL"
         print(f"{phase}: {status}")
 
+    if failures:
+        sys.stderr.write("".join(
+            f"\n--- {phase} ---\n{trace}" for phase, trace in failures
+        ))
+        sys.stderr.flush()
+
     total_pass = sum(results.values())
     total_tests = len(results)
     print(f"\nRésultat: {total_pass}/{total_tests} phases passées")
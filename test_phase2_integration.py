@@ -7,17 +7,22 @@ Valide que la conscience est enrichie par le Memory Graph
 
 import asyncio
 import sys
+import traceback
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from backend.entity_memory import get_entity_graph, reset_entity_graph
 
 
+def _emit(lines):
+    """Affiche une section en une seule écriture (pas un write par ligne)"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+
 async def setup_test_graph():
     """Setup un graph de test avec données"""
-    print("=" * 70)
-    print("SETUP TEST GRAPH")
-    print("=" * 70)
+    lines = ["=" * 70, "SETUP TEST GRAPH", "=" * 70]
 
     agent_id = "fededge_core_v3"
     reset_entity_graph(agent_id)
@@ -35,163 +40,100 @@ async def setup_test_graph():
         importance=1.0,
         entity_id="user_default",
     )
-    print(f"✅ User: {user_id}")
+    lines.append(f"✅ User: {user_id}")
 
-    # 2. Assets
+    # 2. Assets (one bulk insert)
     assets = [
         ("BTC", "Bitcoin", 90600),
         ("ETH", "Ethereum", 3005),
         ("SOL", "Solana", 137),
     ]
 
+    created_ids = graph.add_entities_bulk([
+        {
+            "type": "asset",
+            "label": name,
+            "attributes": {"symbol": symbol, "price": price},
+            "importance": 0.9,
+            "entity_id": f"asset_{symbol}",
+        }
+        for symbol, name, price in assets
+    ])
+
     asset_ids = {}
-    for symbol, name, price in assets:
-        asset_id = graph.add_entity(
-            type="asset",
-            label=name,
-            attributes={"symbol": symbol, "price": price},
-            importance=0.9,
-            entity_id=f"asset_{symbol}",
-        )
+    for (symbol, name, price), asset_id in zip(assets, created_ids):
         asset_ids[symbol] = asset_id
-        print(f"✅ Asset: {symbol} @ ${price}")
+        lines.append(f"✅ Asset: {symbol} @ ${price}")
 
-    # 3. Positions (OWNS)
+    # 3. Positions (OWNS) + 4. Favorites (WATCHES), one bulk insert
     positions = [
         ("BTC", 0.5, 45000),
         ("ETH", 2.0, 2800),
     ]
+    favorites = ["BTC", "ETH", "SOL"]
+
+    graph.add_relations_bulk([
+        {
+            "source": user_id,
+            "target": asset_ids[symbol],
+            "type": "OWNS",
+            "attributes": {"amount": amount, "entry_price": entry},
+            "strength": 1.0,
+        }
+        for symbol, amount, entry in positions
+    ] + [
+        {"source": user_id, "target": asset_ids[symbol], "type": "WATCHES", "strength": 0.8}
+        for symbol in favorites
+    ])
 
     for symbol, amount, entry in positions:
-        graph.add_relation(
-            source=user_id,
-            target=asset_ids[symbol],
-            type="OWNS",
-            attributes={"amount": amount, "entry_price": entry},
-            strength=1.0,
-        )
-        print(f"✅ Position: {amount} {symbol} @ ${entry}")
-
-    # 4. Favorites (WATCHES)
-    for symbol in ["BTC", "ETH", "SOL"]:
-        graph.add_relation(
-            source=user_id,
-            target=asset_ids[symbol],
-            type="WATCHES",
-            attributes={},
-            strength=0.8,
-        )
-    print(f"✅ Favorites: BTC, ETH, SOL")
-
-    # 5. Patterns avec outcomes
-    # Pattern 1: golden_cross BTC (successful)
-    pattern1 = graph.add_entity(
-        type="pattern",
-        label="Golden Cross BTC",
-        attributes={
-            "pattern_type": "golden_cross",
-            "asset": "BTC",
-            "confidence": 0.85,
-        },
-        importance=0.8,
-    )
-
-    graph.add_relation(
-        source=asset_ids["BTC"],
-        target=pattern1,
-        type="FOLLOWS",
-        attributes={},
-    )
-
-    outcome1 = graph.add_entity(
-        type="outcome",
-        label="GC BTC Success",
-        attributes={"pnl_pct": 12.5, "duration_hours": 48},
-        importance=0.6,
-    )
-
-    graph.add_relation(
-        source=pattern1,
-        target=outcome1,
-        type="RESULTED_IN",
-        attributes={},
-    )
-
-    print(f"✅ Pattern: golden_cross BTC → +12.5%")
-
-    # Pattern 2: rsi_oversold ETH (successful)
-    pattern2 = graph.add_entity(
-        type="pattern",
-        label="RSI Oversold ETH",
-        attributes={
-            "pattern_type": "rsi_oversold",
-            "asset": "ETH",
-            "confidence": 0.78,
-        },
-        importance=0.7,
-    )
-
-    graph.add_relation(
-        source=asset_ids["ETH"],
-        target=pattern2,
-        type="FOLLOWS",
-        attributes={},
-    )
-
-    outcome2 = graph.add_entity(
-        type="outcome",
-        label="RSI ETH Success",
-        attributes={"pnl_pct": 8.3, "duration_hours": 24},
-        importance=0.6,
-    )
-
-    graph.add_relation(
-        source=pattern2,
-        target=outcome2,
-        type="RESULTED_IN",
-        attributes={},
-    )
-
-    print(f"✅ Pattern: rsi_oversold ETH → +8.3%")
-
-    # Pattern 3: death_cross SOL (failed)
-    pattern3 = graph.add_entity(
-        type="pattern",
-        label="Death Cross SOL",
-        attributes={
-            "pattern_type": "death_cross",
-            "asset": "SOL",
-            "confidence": 0.70,
-        },
-        importance=0.7,
-    )
-
-    graph.add_relation(
-        source=asset_ids["SOL"],
-        target=pattern3,
-        type="FOLLOWS",
-        attributes={},
-    )
-
-    outcome3 = graph.add_entity(
-        type="outcome",
-        label="DC SOL Failed",
-        attributes={"pnl_pct": -5.2, "duration_hours": 12},
-        importance=0.6,
-    )
-
-    graph.add_relation(
-        source=pattern3,
-        target=outcome3,
-        type="RESULTED_IN",
-        attributes={},
-    )
-
-    print(f"✅ Pattern: death_cross SOL → -5.2%")
+        lines.append(f"✅ Position: {amount} {symbol} @ ${entry}")
+    lines.append(f"✅ Favorites: BTC, ETH, SOL")
+
+    # 5. Patterns avec outcomes (entities puis relations, un bulk insert chacun)
+    patterns = [
+        # golden_cross BTC (successful)
+        ("BTC", "Golden Cross BTC", "golden_cross", 0.85, 0.8, "GC BTC Success", 12.5, 48),
+        # rsi_oversold ETH (successful)
+        ("ETH", "RSI Oversold ETH", "rsi_oversold", 0.78, 0.7, "RSI ETH Success", 8.3, 24),
+        # death_cross SOL (failed)
+        ("SOL", "Death Cross SOL", "death_cross", 0.70, 0.7, "DC SOL Failed", -5.2, 12),
+    ]
 
-    print(f"\n📊 Graph totals:")
-    print(f"   Entities: {len(graph.entities)}")
-    print(f"   Relations: {len(graph.relations)}")
+    entities = []
+    for symbol, label, pattern_type, confidence, importance, outcome_label, pnl_pct, duration in patterns:
+        entities.append({
+            "type": "pattern",
+            "label": label,
+            "attributes": {
+                "pattern_type": pattern_type,
+                "asset": symbol,
+                "confidence": confidence,
+            },
+            "importance": importance,
+        })
+        entities.append({
+            "type": "outcome",
+            "label": outcome_label,
+            "attributes": {"pnl_pct": pnl_pct, "duration_hours": duration},
+            "importance": 0.6,
+        })
+    entity_ids = graph.add_entities_bulk(entities)
+
+    relations = []
+    for (symbol, *_), pattern_id, outcome_id in zip(patterns, entity_ids[::2], entity_ids[1::2]):
+        relations.append({"source": asset_ids[symbol], "target": pattern_id, "type": "FOLLOWS"})
+        relations.append({"source": pattern_id, "target": outcome_id, "type": "RESULTED_IN"})
+    graph.add_relations_bulk(relations)
+
+    for symbol, _, pattern_type, _, _, _, pnl_pct, _ in patterns:
+        lines.append(f"✅ Pattern: {pattern_type} {symbol} → {pnl_pct:+.1f}%")
+
+    lines.append(f"\n📊 Graph totals:")
+    lines.append(f"   Entities: {len(graph.entities)}")
+    lines.append(f"   Relations: {len(graph.relations)}")
+
+    _emit(lines)
 
     return graph
 
@@ -307,8 +249,8 @@ async def main():
 
     except Exception as e:
         print(f"\n❌ ERREUR: {e}")
-        import traceback
-        traceback.print_exc()
+        # Trace formatée puis écrite en une fois
+        sys.stderr.write(traceback.format_exc())
         return 1
 
 
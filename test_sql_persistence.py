@@ -213,8 +213,8 @@ def cleanup():
 
         with SessionLocal() as db:
             # Delete test data
-            deleted_rels = db.query(AgentEntityRelation).filter_by(agent_id="test_persistence").delete()
-            deleted_nodes = db.query(AgentEntityNode).filter_by(agent_id="test_persistence").delete()
+            deleted_rels = db.query(AgentEntityRelation).filter_by(agent_id="test_persistence").delete(synchronize_session=False)
+            deleted_nodes = db.query(AgentEntityNode).filter_by(agent_id="test_persistence").delete(synchronize_session=False)
             db.commit()
 
             print(f"✅ Cleanup: {deleted_nodes} entities, {deleted_rels} relations deleted")